@@ -0,0 +1,169 @@
+"""
+Точные денежные вычисления в копейках
+
+Все суммы представлены целым числом копеек (int, либо int64 в pandas). Это позволяет складывать любое количество
+трансакций без накопления ошибки округления float и сверять баланс без допуска на погрешность
+"""
+
+from __future__ import annotations
+
+import re
+from typing import TYPE_CHECKING, Union
+
+import exceptions
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# any whitespace, including non-breaking spaces, which are used in Sberbank statements as thousands separators.
+# Non-breaking spaces are listed explicitly, as the regex engine of pandas string columns may treat \s as ASCII only
+_WHITESPACE_RE = re.compile('[\\s\u00a0\u2007\u2009\u202f]+')
+
+# money without whitespace like '+21107,75', '1189.4', '750'
+_MONEY_RE = re.compile(r'([+-]?)(\d+)(?:[.,](\d{1,2}))?')
+
+
+def get_kopecks_from_money(money_str: str, process_no_sign_as_negative=False) -> int:
+    """
+    Converts string, representing money to an integer amount of kopecks.
+    If process_no_sign_as_negative is set to True, then the sign of a number is inverted in case no leading '+' is available
+
+    Example:
+    get_kopecks_from_money('1 189,40', True) -> -118940
+    """
+    match = _MONEY_RE.fullmatch(_WHITESPACE_RE.sub('', money_str))
+
+    if not match:
+        # rare characters (e.g. unicode minus) are transliterated the slow way
+        import unidecode
+
+        match = _MONEY_RE.fullmatch(unidecode.unidecode(money_str).replace(' ', ''))
+
+        if not match:
+            raise ValueError(f"could not convert string to money: '{money_str}'")
+
+    sign, rubles, kopecks = match.groups()
+
+    money_kopecks = int(rubles) * 100 + (int(kopecks.ljust(2, '0')) if kopecks else 0)
+
+    if sign == '-':
+        money_kopecks = -money_kopecks
+
+    if process_no_sign_as_negative and not sign == '+':
+        money_kopecks = -money_kopecks
+
+    return money_kopecks
+
+
+def get_signed_money(money_str: str, process_no_sign_as_negative=False) -> str:
+    """
+    Checks, that the string represents money, and returns it without whitespace and with its actual sign, so that
+    all values of a column can later be parsed to kopecks at once (see money_series_to_kopecks())
+    If process_no_sign_as_negative is set to True, then the sign of a number is inverted in case no leading '+' is available
+
+    Example:
+    get_signed_money('1 189,40', True) -> '-1189,40'
+    """
+    money = _WHITESPACE_RE.sub('', money_str)
+
+    if not _MONEY_RE.fullmatch(money):
+        # rare characters (e.g. unicode minus) are transliterated the slow way
+        import unidecode
+
+        money = unidecode.unidecode(money_str).replace(' ', '')
+
+        if not _MONEY_RE.fullmatch(money):
+            raise ValueError(f"could not convert string to money: '{money_str}'")
+
+    if process_no_sign_as_negative:
+        money = money[1:] if money[0] in '+-' else '-' + money
+
+    return money
+
+
+def money_series_to_kopecks(money_series: pd.Series, process_no_sign_as_negative=False) -> pd.Series:
+    """
+    Vectorised version of get_kopecks_from_money() for a pandas Series of strings. Returns Series of int64 or,
+    if some values are missing (None, NaN), nullable Int64
+
+    After validation every value has at most 2 decimal places, therefore round(value * 100) of its float
+    representation is exactly the amount of kopecks (for any amount below 2**53 kopecks)
+    """
+    import pandas as pd
+
+    is_missing = money_series.isna()
+    if is_missing.any():
+        if is_missing.all():
+            return pd.Series(pd.NA, index=money_series.index, dtype='Int64')
+
+        money_kopecks = money_series_to_kopecks(money_series[~is_missing], process_no_sign_as_negative)
+        return money_kopecks.reindex(money_series.index).astype('Int64')
+
+    money_series = money_series.str.replace(_WHITESPACE_RE.pattern, '', regex=True)
+
+    is_money = money_series.str.fullmatch(_MONEY_RE.pattern).fillna(False).astype(bool)
+    if not is_money.all():
+        wrong_value = money_series[~is_money].iloc[0]
+        raise exceptions.InputFileStructureError(f"Не удалось преобразовать строку в денежную сумму: '{wrong_value}'")
+
+    money_kopecks = (pd.to_numeric(money_series.str.replace(',', '.', regex=False)) * 100).round().astype('int64')
+
+    if process_no_sign_as_negative:
+        money_kopecks = money_kopecks.where(money_series.str.startswith('+'), -money_kopecks)
+
+    return money_kopecks
+
+
+def format_kopecks(money_kopecks: int) -> str:
+    """
+    Formats kopecks as rubles, e.g. -118940 -> '-1189.40'
+    """
+    sign = '-' if money_kopecks < 0 else ''
+    rubles, kopecks = divmod(abs(money_kopecks), 100)
+    return f"{sign}{rubles}.{kopecks:02d}"
+
+
+def check_balance(balance_kopecks: int, calculated_balance_kopecks: int) -> None:
+    """
+    сравниваем баланс периода из шапки выписки и баланс периода, вычисленный по трансакциям.
+    Оба баланса в копейках, поэтому сравнение точное: при любой разнице выдаётся ошибка
+    """
+    if balance_kopecks != calculated_balance_kopecks:
+        raise exceptions.BalanceVerificationError(f"""
+            Ошибка проверки балланса по трансакциям:
+                Вычисленный баланс по информации в шапке выписки = {format_kopecks(balance_kopecks)}
+                Вычисленный баланс по всем трансакциям = {format_kopecks(calculated_balance_kopecks)}
+        """)
+
+
+def find_running_balance_mismatch(values_kopecks, remainders_kopecks) -> Union[int, None]:
+    """
+    Checks, that the remainder after every transaction is the remainder after the previous transaction plus
+    its value. Statements list transactions either in chronological or in reverse chronological order, the order
+    is chosen by the majority of consistent neighbours. Returns the index of the first transaction (in the given
+    order), at which the running balance diverges, or None, if all transactions are consistent.
+
+    Both arguments are sequences (lists, numpy arrays, pandas Series) of kopecks. The check is vectorised, O(n)
+    """
+    import numpy as np
+
+    values = np.asarray(values_kopecks, dtype=np.int64)
+    remainders = np.asarray(remainders_kopecks, dtype=np.int64)
+    if len(values) < 2:
+        return None
+
+    remainder_changes = np.diff(remainders)
+    # in chronological order the change of the remainder is the value of the later transaction,
+    # in reverse order it is the negated value of the earlier one. In both cases the later transaction is reported
+    consistent_chronological = remainder_changes == values[1:]
+    consistent_reverse = remainder_changes == -values[:-1]
+
+    if np.count_nonzero(consistent_chronological) >= np.count_nonzero(consistent_reverse):
+        inconsistent_pairs, later_transaction_shift = np.flatnonzero(~consistent_chronological), 1
+    else:
+        inconsistent_pairs, later_transaction_shift = np.flatnonzero(~consistent_reverse), 0
+
+    if len(inconsistent_pairs) == 0:
+        return None
+
+    return int(inconsistent_pairs[0]) + later_transaction_shift
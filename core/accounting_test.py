@@ -0,0 +1,63 @@
+import pytest
+import pandas as pd
+
+import accounting
+import exceptions
+
+
+@pytest.mark.parametrize("money_str, process_no_sign_as_negative, expected", [
+    ('1 189,40', True, -118940),
+    ('+21107,75', True, 2110775),
+    ('7 585.50', False, 758550),
+    ('11 111,1', False, 1111110),
+    ('750', False, 75000),
+])
+def test_get_kopecks_from_money(money_str, process_no_sign_as_negative, expected):
+    assert accounting.get_kopecks_from_money(money_str, process_no_sign_as_negative) == expected
+
+
+def test_vectorised_parsing_gives_the_same_result_as_scalar():
+    money_strings = ['1 189,40', '+21107,75', '-750,00', '3,5', '11 111,11']
+
+    vectorised = accounting.money_series_to_kopecks(pd.Series(money_strings), True)
+
+    assert list(vectorised) == [accounting.get_kopecks_from_money(money, True) for money in money_strings]
+
+
+
+def test_signed_money_is_parsed_like_the_original_string():
+    money_strings = ['1 189,40', '+21107,75', '-750,00', '3,5', '11\u00a0111,11']
+
+    for process_no_sign_as_negative in (True, False):
+        signed_money = [accounting.get_signed_money(money, process_no_sign_as_negative) for money in money_strings]
+
+        assert list(accounting.money_series_to_kopecks(pd.Series(signed_money))) == \
+               [accounting.get_kopecks_from_money(money, process_no_sign_as_negative) for money in money_strings]
+
+
+def test_missing_money_stays_missing():
+    kopecks = accounting.money_series_to_kopecks(pd.Series([None, '2,09', None]))
+
+    assert str(kopecks.dtype) == 'Int64'
+    assert kopecks.isna().tolist() == [True, False, True]
+    assert kopecks.iloc[1] == 209
+
+def test_balance_check_has_no_tolerance():
+    accounting.check_balance(-758550, -758550)
+
+    with pytest.raises(exceptions.BalanceVerificationError):
+        accounting.check_balance(-758551, -758550)
+
+
+@pytest.mark.parametrize("reverse_order", [False, True])
+def test_first_transaction_with_wrong_running_balance_is_found(reverse_order):
+    values = [10000, -2500, 700, -1200, 300, 4500]
+    remainders = [sum(values[:i + 1]) for i in range(len(values))]
+    if reverse_order:
+        values, remainders = values[::-1], remainders[::-1]
+
+    assert accounting.find_running_balance_mismatch(values, remainders) is None
+
+    # the value of the transaction with the index 3 is parsed wrongly
+    values[3] += 1
+    assert accounting.find_running_balance_mismatch(pd.Series(values), pd.Series(remainders)) == 3
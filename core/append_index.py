@@ -0,0 +1,159 @@
+"""
+Индекс для режима дописывания (append) новых трансакций в уже существующий выходной файл
+
+Рядом с выходным файлом (csv, parquet, sqlite) хранится маленький файл-индекс <выходной файл>.index.json,
+в котором записаны дата последней сохранённой трансакции и ключи трансакций с этой датой вместе с количеством
+сохранённых трансакций с каждым ключом (одинаковые трансакции в одну минуту возможны).
+
+Благодаря этому проверка "есть ли уже такая трансакция?" стоит O(новых трансакций) и не требует
+перечитывания или перезаписи уже сохранённых данных
+
+Если индекса нет (файл был создан без режима дописывания или старой версией программы), то он один раз строится
+по данным самого выходного файла. Если выходного файла нет, то оставшийся от него индекс не используется.
+При обычной (не append) записи выходного файла его индекс удаляется
+"""
+
+import os
+import json
+import hashlib
+from datetime import datetime
+from typing import Callable, Union
+
+import pandas as pd
+
+INDEX_FILE_SUFFIX = ".index.json"
+
+# version of the way the keys of transactions are built and stored. Index with another version is rebuilt from the output file
+INDEX_VERSION = 3
+
+
+def get_index_file_name(output_file_name:str)->str:
+    """
+    Returns the name of the sidecar index file for the output file (with extension) output_file_name
+    """
+    return output_file_name + INDEX_FILE_SUFFIX
+
+
+def remove_index(output_file_name:str)->None:
+    """
+    Removes the index of the output file output_file_name (with extension), which is overwritten
+    """
+    index_file_name = get_index_file_name(output_file_name)
+    if os.path.exists(index_file_name):
+        os.remove(index_file_name)
+
+
+def _get_row_key(row:tuple)->str:
+    """
+    Returns short stable key of one transaction, built from all its field values.
+    Missing values (None, NaN, NaT) give the same key, so that the key does not depend on how the value was read back
+    """
+    row_text = "\x1f".join("" if pd.isna(value) else str(value) for value in row)
+    return hashlib.sha1(row_text.encode("utf-8")).hexdigest()[:16]
+
+
+def _get_operation_dates(df:pd.DataFrame, date_column:str)->pd.Series:
+    """
+    Some extractors return operation date as datetime, others as a string like '26.07.2019 02:04'.
+    This function brings both to pandas datetime
+    """
+    return pd.to_datetime(df[date_column], dayfirst=True)
+
+
+class AppendIndex:
+    """
+    Sidecar index of an output file, which is used in the append mode
+    """
+
+    def __init__(self,
+                 index_file_name:str,
+                 last_operation_date:Union[datetime, None] = None,
+                 last_date_keys:Union[dict, None] = None):
+
+        self.index_file_name = index_file_name
+        self.last_operation_date = last_operation_date
+        # key of a transaction with the last operation date : amount of stored transactions with this key
+        self.last_date_keys = last_date_keys if last_date_keys is not None else {}
+
+    @classmethod
+    def load(cls, output_file_name:str, read_output:Union[Callable[[], pd.DataFrame], None] = None) -> 'AppendIndex':
+        """
+        Loads index of the output file output_file_name (with extension).
+        If the output file does not exist yet, then an empty index is returned, even if an index file is left from
+        a deleted output. If the output file exists, but has no index, then the index is built from the dataframe,
+        returned by read_output() - transactions of the output file in the same form, as they are given to update()
+        """
+        index_file_name = get_index_file_name(output_file_name)
+
+        if not os.path.exists(output_file_name):
+            return cls(index_file_name)
+
+        index_data = None
+        if os.path.exists(index_file_name):
+            with open(index_file_name, encoding="utf-8") as index_file:
+                index_data = json.load(index_file)
+
+        if index_data is None or index_data.get("version") != INDEX_VERSION:
+            index = cls(index_file_name)
+            if read_output is not None:
+                index.update(read_output())
+            return index
+
+        last_operation_date = index_data.get("last_operation_date")
+        if last_operation_date:
+            last_operation_date = datetime.fromisoformat(last_operation_date)
+
+        return cls(index_file_name,
+                   last_operation_date=last_operation_date,
+                   last_date_keys=dict(index_data.get("last_date_keys", {})))
+
+    def select_new_rows(self, df:pd.DataFrame, date_column:str = 'operation_date') -> pd.DataFrame:
+        """
+        Returns only those rows of df, which are not yet stored in the output file:
+        rows, which are newer than the last stored operation date, plus rows with exactly this date, which
+        are not yet known to the index. Identical rows are matched by occurrence: if the output file holds one
+        such row and df holds two, then the second one is new
+        """
+        if self.last_operation_date is None or len(df) == 0:
+            return df
+
+        operation_dates = _get_operation_dates(df, date_column)
+
+        newer_mask = operation_dates > self.last_operation_date
+        same_date_mask = operation_dates == self.last_operation_date
+
+        # only rows with the same date as the last stored one need to be looked up by key
+        occurrences = {}
+        for position in same_date_mask.to_numpy().nonzero()[0]:
+            key = _get_row_key(tuple(df.iloc[position]))
+            occurrences[key] = occurrences.get(key, 0) + 1
+            if occurrences[key] > self.last_date_keys.get(key, 0):
+                newer_mask.iloc[position] = True
+
+        return df[newer_mask.to_numpy()]
+
+    def update(self, df:pd.DataFrame, date_column:str = 'operation_date') -> None:
+        """
+        Registers rows of df, which were just written to the output file
+        """
+        if len(df) == 0:
+            return
+
+        operation_dates = _get_operation_dates(df, date_column)
+        max_date = operation_dates.max().to_pydatetime()
+
+        if self.last_operation_date is None or max_date > self.last_operation_date:
+            self.last_operation_date = max_date
+            self.last_date_keys = {}
+
+        for position in (operation_dates == self.last_operation_date).to_numpy().nonzero()[0]:
+            key = _get_row_key(tuple(df.iloc[position]))
+            self.last_date_keys[key] = self.last_date_keys.get(key, 0) + 1
+
+    def save(self) -> None:
+        index_data = {"version": INDEX_VERSION,
+                      "last_operation_date": self.last_operation_date.isoformat() if self.last_operation_date else None,
+                      "last_date_keys": dict(sorted(self.last_date_keys.items()))}
+
+        with open(self.index_file_name, "w", encoding="utf-8") as index_file:
+            json.dump(index_data, index_file, ensure_ascii=False, indent=1)
@@ -0,0 +1,140 @@
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from append_index import AppendIndex, get_index_file_name
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel
+
+SAMPLE_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+
+def _make_df(rows:list)->pd.DataFrame:
+    return pd.DataFrame(rows, columns=['operation_date', 'description', 'value_account_currency'])
+
+
+def test_only_new_transactions_are_selected(tmp_path):
+    output_file_name = str(tmp_path / "out.csv")
+    open(output_file_name, "w").close()
+
+    first_df = _make_df([(datetime(2021, 7, 1, 10, 0), 'A', -10.0),
+                         (datetime(2021, 7, 2, 10, 0), 'B', -20.0)])
+
+    index = AppendIndex.load(output_file_name)
+    assert len(index.select_new_rows(first_df)) == 2
+    index.update(first_df)
+    index.save()
+
+    second_df = _make_df([(datetime(2021, 7, 2, 10, 0), 'B', -20.0),    # already stored
+                          (datetime(2021, 7, 2, 10, 0), 'C', -30.0),    # same date, but new
+                          (datetime(2021, 7, 3, 10, 0), 'D', -40.0)])
+
+    index = AppendIndex.load(output_file_name)
+    new_rows = index.select_new_rows(second_df)
+
+    assert list(new_rows['description']) == ['C', 'D']
+
+
+def test_identical_transactions_are_matched_by_occurrence(tmp_path):
+    output_file_name = str(tmp_path / "out.csv")
+    open(output_file_name, "w").close()
+
+    # two identical transactions in one minute, but only the first one was in the earlier statement
+    first_df = _make_df([(datetime(2021, 7, 2, 10, 0), 'Coffee', -150.0)])
+
+    index = AppendIndex.load(output_file_name)
+    index.update(first_df)
+    index.save()
+
+    second_df = _make_df([(datetime(2021, 7, 2, 10, 0), 'Coffee', -150.0),
+                          (datetime(2021, 7, 2, 10, 0), 'Coffee', -150.0)])
+
+    index = AppendIndex.load(output_file_name)
+    assert len(index.select_new_rows(second_df)) == 1
+    index.update(index.select_new_rows(second_df))
+    index.save()
+
+    index = AppendIndex.load(output_file_name)
+    assert len(index.select_new_rows(second_df)) == 0
+
+
+def test_string_operation_dates_are_supported(tmp_path):
+    output_file_name = str(tmp_path / "out.sqlite")
+    open(output_file_name, "w").close()
+
+    df = _make_df([('26.07.2019 02:04', 'A', -750.0)])
+
+    index = AppendIndex.load(output_file_name)
+    index.update(df)
+    index.save()
+
+    index = AppendIndex.load(output_file_name)
+    assert index.last_operation_date == datetime(2019, 7, 26, 2, 4)
+    assert len(index.select_new_rows(df)) == 0
+
+
+def test_index_is_built_from_output_without_index(tmp_path):
+    output_file_name = str(tmp_path / "out.csv")
+    open(output_file_name, "w").close()
+
+    stored_df = _make_df([(datetime(2021, 7, 1, 10, 0), 'A', -10.0),
+                          (datetime(2021, 7, 1, 10, 0), None, -20.0)])
+
+    index = AppendIndex.load(output_file_name, read_output=lambda: stored_df)
+    new_df = _make_df([(datetime(2021, 7, 1, 10, 0), float('nan'), -20.0),
+                       (datetime(2021, 7, 2, 10, 0), 'B', -30.0)])
+
+    assert list(index.select_new_rows(new_df)['description']) == ['B']
+
+
+def test_index_of_missing_output_is_discarded(tmp_path):
+    output_file_name = str(tmp_path / "out.csv")
+    open(output_file_name, "w").close()
+
+    df = _make_df([(datetime(2021, 7, 1, 10, 0), 'A', -10.0)])
+    index = AppendIndex.load(output_file_name)
+    index.update(df)
+    index.save()
+
+    os.remove(output_file_name)
+
+    assert len(AppendIndex.load(output_file_name).select_new_rows(df)) == 1
+
+
+def _convert_sample(tmp_path, output_file_type:str, append:bool)->str:
+    input_file_name = str(tmp_path / 'statement.txt')
+    if not os.path.exists(input_file_name):
+        shutil.copy(SAMPLE_TXT, input_file_name)
+
+    sberbankPDFtext2Excel(input_file_name, output_file_type=output_file_type, append=append)
+    return str(tmp_path / ('statement.' + output_file_type))
+
+
+def test_append_to_output_written_without_append_mode(tmp_path):
+    for output_file_type in ('csv', 'sqlite'):
+        output_file_name = _convert_sample(tmp_path, output_file_type, append=False)
+        assert not os.path.exists(get_index_file_name(output_file_name))
+
+        _convert_sample(tmp_path, output_file_type, append=True)
+
+        if output_file_type == 'csv':
+            qnt_rows = len(pd.read_csv(output_file_name, sep=';'))
+        else:
+            import sqlite3
+            with sqlite3.connect(output_file_name) as connection:
+                qnt_rows = connection.execute('SELECT COUNT(*) FROM data').fetchone()[0]
+
+        assert qnt_rows == 4
+
+
+def test_append_after_output_is_deleted_or_overwritten(tmp_path):
+    output_file_name = _convert_sample(tmp_path, 'csv', append=True)
+    assert os.path.exists(get_index_file_name(output_file_name))
+
+    os.remove(output_file_name)
+    _convert_sample(tmp_path, 'csv', append=True)
+    assert len(pd.read_csv(output_file_name, sep=';')) == 4
+
+    _convert_sample(tmp_path, 'csv', append=False)
+    assert not os.path.exists(get_index_file_name(output_file_name))
@@ -0,0 +1,95 @@
+"""
+Бенчмарк сверки баланса: float (как было раньше) против точных вычислений в копейках (accounting.py)
+
+Для N случайных сумм в формате выписки (например '1 189,40') измеряется время:
+    - float:              разбор каждой суммы через unidecode + float, сумма float64, сравнение с допуском 0.01
+    - kopecks (scalar):   разбор каждой суммы через accounting.get_kopecks_from_money(), точная сумма
+    - kopecks (vector):   разбор всех сумм сразу через accounting.money_series_to_kopecks(), сумма int64
+и показывается, насколько сумма float отличается от точной
+
+Usage:
+    py benchmark_balance.py [-n QNT_TRANSACTIONS]
+"""
+
+import sys
+import time
+import random
+import argparse
+
+import pandas as pd
+import unidecode
+
+import accounting
+
+
+def _legacy_get_float_from_money(money_str: str, process_no_sign_as_negative=False) -> float:
+    """
+    Float based money parsing, which was used before accounting.py was introduced. Kept here as a reference
+    """
+    money_str = unidecode.unidecode(money_str)
+    money_str = money_str.replace(' ', '')
+    money_str = money_str.replace(',', '.')
+
+    leading_plus = money_str[0] == '+'
+
+    money_float = float(money_str)
+
+    if process_no_sign_as_negative and not leading_plus:
+        money_float = -1 * money_float
+
+    return money_float
+
+
+def _format_money(kopecks: int) -> str:
+    rubles, kopecks = divmod(kopecks, 100)
+    return f"{rubles:,}".replace(',', '\xa0') + f",{kopecks:02d}"
+
+
+def generate_money_strings(qnt: int, seed: int = 0) -> list:
+    rnd = random.Random(seed)
+    result = []
+    for _ in range(qnt):
+        money = _format_money(rnd.randint(1, 50_000_000))
+        result.append('+' + money if rnd.random() < 0.1 else money)
+    return result
+
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк сверки баланса float против копеек')
+    parser.add_argument('-n', '--transactions', type=int, default=1_000_000, help='Количество трансакций')
+    args = parser.parse_args()
+
+    money_strings = generate_money_strings(args.transactions)
+
+    def float_path():
+        values = pd.Series([_legacy_get_float_from_money(money, True) for money in money_strings], dtype='float64')
+        return values.sum()
+
+    def kopecks_scalar_path():
+        values = pd.Series([accounting.get_kopecks_from_money(money, True) for money in money_strings], dtype='int64')
+        return int(values.sum())
+
+    def kopecks_vector_path():
+        return int(accounting.money_series_to_kopecks(pd.Series(money_strings), True).sum())
+
+    float_sum, float_time = _timed(float_path)
+    scalar_sum, scalar_time = _timed(kopecks_scalar_path)
+    vector_sum, vector_time = _timed(kopecks_vector_path)
+
+    assert scalar_sum == vector_sum
+
+    print(f"{args.transactions} трансакций")
+    print(f"{'float':<18}{float_time:8.3f}s   сумма = {float_sum!r}")
+    print(f"{'kopecks (scalar)':<18}{scalar_time:8.3f}s   сумма = {accounting.format_kopecks(scalar_sum)}  x{float_time / scalar_time:.1f}")
+    print(f"{'kopecks (vector)':<18}{vector_time:8.3f}s   сумма = {accounting.format_kopecks(vector_sum)}  x{float_time / vector_time:.1f}")
+    print(f"ошибка суммы float: {abs(float_sum * 100 - scalar_sum):.6f} копеек")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
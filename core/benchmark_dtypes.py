@@ -0,0 +1,91 @@
+"""
+Бенчмарк памяти, занимаемой dataframe с трансакциями, до и после приведения к компактным типам данных
+(utils.compact_df_dtypes)
+
+Usage:
+    py benchmark_dtypes.py [-n QNT_ROWS] [-f FORMAT]
+
+Печатает память в байтах на 100 000 трансакций по каждой колонке и в целом
+"""
+
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import utils
+import extractors
+
+CATEGORIES = ['Супермаркеты', 'Рестораны и кафе', 'Транспорт', 'Перевод с карты', 'Перевод на карту',
+              'Выдача наличных', 'Все для дома', 'Отдых и развлечения', 'Здоровье и красота', 'Прочие операции']
+
+CURRENCIES = ['€', '$', 'KZT', 'TRY']
+
+DESCRIPTION_WORDS = ['SBOL', 'перевод', 'PYATEROCHKA', 'MOSKVA', 'RUS', 'YANDEX', 'TAXI', 'OZON', 'APTEKA',
+                     'ИВАН', 'ИВАНОВИЧ', 'И.', 'КОМИССИЯ', 'ЗА', 'ВЫДАЧУ', 'НАЛИЧНЫХ', 'MAGNIT', 'WB']
+
+
+def generate_entries(qnt_entries:int, seed:int = 0) -> list:
+    """
+    Generates transactions in the form, returned by Extractor.get_entries()
+    """
+    rnd = random.Random(seed)
+    operation_date = datetime(2021, 1, 1)
+    remainder = 100000.0
+
+    entries = []
+    for _ in range(qnt_entries):
+        operation_date += timedelta(minutes=rnd.randint(1, 300))
+        value = -round(rnd.uniform(10, 5000), 2)
+        remainder = round(remainder + value, 2)
+
+        entry = {'operation_date': operation_date,
+                 'processing_date': datetime(operation_date.year, operation_date.month, operation_date.day) + timedelta(days=1),
+                 'authorisation_code': str(rnd.randint(100000, 999999)),
+                 'description': ' '.join(rnd.choices(DESCRIPTION_WORDS, k=rnd.randint(2, 6))),
+                 'category': rnd.choice(CATEGORIES),
+                 'value_account_currency': f'{value:.2f}',
+                 'remainder_account_currency': f'{remainder:.2f}'}
+
+        if rnd.random() < 0.05:
+            entry['value_operational_currency'] = f'{value / 90:.2f}'
+            entry['operational_currency'] = rnd.choice(CURRENCIES)
+
+        entries.append(entry)
+
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк памяти dataframe до и после compact_df_dtypes')
+    parser.add_argument('-n', '--rows', type=int, default=100_000, help='Количество трансакций')
+    parser.add_argument('-f', '--format', default='SBER_DEBIT_2107', choices=extractors.get_list_extractors_in_text(),
+                        help='Экстрактор, описание колонок которого используется')
+    args = parser.parse_args()
+
+    extractor_type = extractors.get_extractor(args.format)
+    extractor = extractor_type("")
+
+    columns = list(extractor.get_columns_info().keys())
+    df = pd.DataFrame(generate_entries(args.rows), columns=columns)
+
+    scale = 100_000 / args.rows
+
+    memory_before = df.memory_usage(deep=True, index=False)
+    compact_df = utils.compact_df_dtypes(df.copy(), extractor.get_columns_types())
+    memory_after = compact_df.memory_usage(deep=True, index=False)
+
+    print(f"Память на 100 000 трансакций, байт (формат {args.format}, {args.rows} трансакций)")
+    print(f"{'колонка':<30}{'до':>14}{'после':>14}   тип после")
+    for column in columns:
+        print(f"{column:<30}{int(memory_before[column] * scale):>14}{int(memory_after[column] * scale):>14}   {compact_df[column].dtype}")
+
+    total_before = int(memory_before.sum() * scale)
+    total_after = int(memory_after.sum() * scale)
+    print(f"{'ИТОГО':<30}{total_before:>14}{total_after:>14}   ({total_after / total_before:.0%})")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
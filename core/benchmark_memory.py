@@ -0,0 +1,96 @@
+"""
+Бенчмарк памяти по этапам конвертации на синтетических выписках (statement_generator.py, statement_pdf_generator.py)
+
+Для каждого формата создаётся выписка с N трансакциями и конвертируется функцией sberbankPDF2Excel внутри
+memory_profile.collect(). Для каждого этапа выводятся пиковая и оставшаяся занятой память (всего и в байтах
+на трансакцию) и пиковый RSS процесса. Если пиковая память какого-либо этапа на трансакцию превышает бюджет
+(memory_profile.DEFAULT_BUDGETS или ключ --budget), то бенчмарк завершается с кодом 1, поэтому его можно
+запускать в CI.
+
+Usage:
+    py benchmark_memory.py [-n QNT_TRANSACTIONS] [-f FORMAT [FORMAT ...]] [-t TYPE] [--pdf] [--budget STAGE=BYTES ...]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import contextlib
+
+import utils
+import memory_profile
+import statement_generator
+import statement_pdf_generator
+from sberbankPDF2Excel import sberbankPDF2Excel, preload_heavy_modules
+
+
+def measure_format(format_name:str, qnt_transactions:int, output_file_type:str, from_pdf:bool) -> memory_profile.MemoryProfile:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if from_pdf:
+            input_file_name = os.path.join(tmp_dir, "statement.pdf")
+            statement_pdf_generator.write_statement_pdf(input_file_name, format_name, qnt_transactions)
+        else:
+            input_file_name = os.path.join(tmp_dir, "statement.txt")
+            statement_generator.write_statement(input_file_name, format_name, qnt_transactions)
+
+        # messages of the conversion are not interesting here
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull), \
+                memory_profile.collect() as profile:
+            sberbankPDF2Excel(input_file_name, output_file_type=output_file_type)
+
+    return profile
+
+
+def parse_budgets(budget_arguments:list) -> dict:
+    budgets = dict(memory_profile.DEFAULT_BUDGETS)
+    for budget_argument in budget_arguments:
+        stage_name, _, budget = budget_argument.partition("=")
+        budgets[stage_name] = int(budget)
+
+    return budgets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк памяти по этапам конвертации на синтетических выписках')
+    parser.add_argument('-n', '--transactions', type=int, default=20_000, help='Количество трансакций в выписке')
+    parser.add_argument('-f', '--formats', nargs='+', default=statement_generator.SUPPORTED_FORMATS,
+                        choices=statement_generator.SUPPORTED_FORMATS, help='Форматы выписок')
+    parser.add_argument('-t', '--type', type=str, default='csv', dest='output_file_type',
+                        choices=utils.OUTPUT_FILE_TYPES, help='Тип создаваемого файла')
+    parser.add_argument('--pdf', action='store_true', default=False, dest='from_pdf',
+                        help='Конвертировать выписку из PDF (по умолчанию - из промежуточного текстового файла)')
+    parser.add_argument('--budget', type=str, nargs='+', default=[], dest='budgets',
+                        help='Бюджет этапа в байтах на трансакцию, например writer=5000')
+    args = parser.parse_args()
+
+    budgets = parse_budgets(args.budgets)
+
+    # memory, taken by imported modules, shall not be attributed to the stages of the first converted statement
+    preload_heavy_modules()
+    all_violations = []
+
+    for format_name in args.formats:
+        profile = measure_format(format_name, args.transactions, args.output_file_type, args.from_pdf)
+        qnt_entries = profile.get_qnt_entries() or 1
+
+        print(f"{format_name}, {args.transactions} трансакций")
+        print(f"{'этап':<24}{'пик, МБ':>10}{'пик, байт/тр':>14}{'бюджет':>10}{'осталось, МБ':>14}{'макс. RSS, МБ':>15}")
+        for stage_name, stage in profile.stages.items():
+            max_rss = f"{stage['max_rss'] / 1024 / 1024:.1f}" if stage["max_rss"] is not None else "-"
+            budget = f"{budgets[stage_name]:,}" if stage_name in budgets else "-"
+            print(f"{stage_name:<24}{stage['peak'] / 1024 / 1024:>10.1f}{stage['peak'] / qnt_entries:>14,.0f}{budget:>10}"
+                  f"{stage['retained'] / 1024 / 1024:>14.1f}{max_rss:>15}")
+        print()
+
+        all_violations.extend(f"{format_name}. {violation}" for violation in memory_profile.check_budgets(profile, budgets))
+
+    if all_violations:
+        print("!!!!!!! Превышены бюджеты памяти:")
+        print("\n".join(all_violations))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+"""
+Бенчмарк скорости и качества разбора PDF (pdf2txtev.py) на синтетических PDF выписках (statement_pdf_generator.py)
+
+Создаётся PDF выписка заданного формата с заданным количеством страниц и замеряется:
+    pdf_2_text          весь разбор PDF в текст, страниц в секунду
+    layout              только получение layout страниц средствами pdfminer (интерпретация PDF и LAParams)
+    layout_to_matrix    только _list_LTTextBoxHorizontal_2_matrix на уже полученных layout
+    matrix_to_txt       только _matrix_2_txt на уже полученных матрицах
+    table_rows          только _matrix_2_table_rows (структурированный режим) на уже полученных матрицах
+    pdfminer            для сравнения - стандартный pdfminer.high_level.extract_text
+
+Качество разбора - это доля строк, совпадающих с исходным текстом, из которого создан PDF. Для pdfminer эта доля
+показывает, насколько его результат отличается от pdf2txtev (см. https://github.com/pdfminer/pdfminer.six/issues/466).
+
+Чтобы отследить изменения результата при смене версии pdfminer или параметров разбора, используется ключ --reference:
+если указанного файла нет, в него сохраняется текущий результат pdf2txtev, а если он есть, то выводятся строки,
+отличающиеся от сохранённого результата.
+
+Usage:
+    py benchmark_pdf2txtev.py [-p QNT_PAGES] [-f FORMAT] [-s SEED] [--reference FILE] [--no-pdfminer]
+"""
+
+import os
+import sys
+import time
+import difflib
+import argparse
+import tempfile
+
+from pdfminer.pdfpage import PDFPage
+from pdfminer.high_level import extract_text
+
+import pdf2txtev
+import statement_generator
+import statement_pdf_generator
+
+# average amount of transactions on a page of a synthetic PDF statement
+TRANSACTIONS_PER_PAGE = 11
+
+
+def get_lines_match_ratio(expected_text:str, text:str) -> float:
+    """
+    Share of the lines of both texts, which are the same and go in the same order (1.0 - texts are equal)
+    """
+    return difflib.SequenceMatcher(None, expected_text.splitlines(), text.splitlines(), autojunk=False).ratio()
+
+
+def measure_pdf(pdf_file_name:str, expected_text:str, compare_with_pdfminer:bool) -> dict:
+    """
+    Returns stage name : {"seconds": ..., "pages_per_second": ..., "lines_match_ratio": ... or None}
+    and the text, produced by pdf2txtev
+    """
+    results = {}
+    qnt_pages = pdf2txtev.get_qnt_pages(pdf_file_name)
+
+    def add_result(stage_name:str, seconds:float, text:str = None):
+        results[stage_name] = {"seconds": seconds,
+                               "pages_per_second": qnt_pages / seconds if seconds else float("inf"),
+                               "lines_match_ratio": get_lines_match_ratio(expected_text, text) if text is not None else None}
+
+    start = time.perf_counter()
+    text = pdf2txtev.pdf_2_text(pdf_file_name)
+    add_result("pdf_2_text", time.perf_counter() - start, text)
+
+    start = time.perf_counter()
+    with open(pdf_file_name, "rb") as pdf_file_object:
+        pages_boxes = [pdf2txtev._PDFpage2LTTextBoxHorizontal_list(page) for page in PDFPage.get_pages(pdf_file_object)]
+    add_result("layout", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    matrices = [pdf2txtev._list_LTTextBoxHorizontal_2_matrix(boxes) for boxes in pages_boxes]
+    add_result("layout_to_matrix", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for matrix in matrices:
+        pdf2txtev._matrix_2_txt(matrix)
+    add_result("matrix_to_txt", time.perf_counter() - start)
+
+    start = time.perf_counter()
+    column_boundaries = None
+    for page_number, matrix in enumerate(matrices, start=1):
+        _, column_boundaries = pdf2txtev._matrix_2_table_rows(matrix, page_number, column_boundaries)
+    add_result("table_rows", time.perf_counter() - start)
+
+    if compare_with_pdfminer:
+        start = time.perf_counter()
+        pdfminer_text = extract_text(pdf_file_name)
+        add_result("pdfminer", time.perf_counter() - start, pdfminer_text)
+
+    return {"qnt_pages": qnt_pages, "stages": results, "text": text}
+
+
+def compare_with_reference(reference_file_name:str, text:str) -> None:
+    if not os.path.exists(reference_file_name):
+        with open(reference_file_name, "w", encoding="utf-8") as reference_file:
+            reference_file.write(text)
+        print(f"Результат разбора сохранён в {reference_file_name}")
+        return
+
+    with open(reference_file_name, encoding="utf-8") as reference_file:
+        reference_text = reference_file.read()
+
+    diff = [line for line in difflib.unified_diff(reference_text.splitlines(), text.splitlines(),
+                                                  reference_file_name, "pdf_2_text", lineterm="")]
+    if diff:
+        print(f"!!!!!!! Результат разбора отличается от {reference_file_name}:")
+        print("\n".join(diff))
+    else:
+        print(f"Результат разбора совпадает с {reference_file_name}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк скорости и качества разбора PDF на синтетических выписках')
+    parser.add_argument('-p', '--pages', type=int, default=100, help='Примерное количество страниц в выписке')
+    parser.add_argument('-f', '--format', default='SBER_DEBIT_2107', dest='format_name',
+                        choices=statement_generator.SUPPORTED_FORMATS, help='Формат выписки')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--reference', type=str, default=None, dest='reference_file_name',
+                        help='Файл с эталонным результатом разбора. Если его нет, он будет создан')
+    parser.add_argument('--no-pdfminer', action='store_false', default=True, dest='compare_with_pdfminer',
+                        help='Не сравнивать с pdfminer.high_level.extract_text')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_file_name = os.path.join(tmp_dir, "statement.pdf")
+        expected_text = statement_pdf_generator.write_statement_pdf(pdf_file_name,
+                                                                    args.format_name,
+                                                                    args.pages * TRANSACTIONS_PER_PAGE,
+                                                                    args.seed)
+        results = measure_pdf(pdf_file_name, expected_text, args.compare_with_pdfminer)
+
+    print(f"{args.format_name}, {results['qnt_pages']} страниц")
+    print(f"{'этап':<20}{'сек':>10}{'страниц/сек':>14}{'совпадение строк':>20}")
+    for stage_name, result in results["stages"].items():
+        match = f"{result['lines_match_ratio']:.1%}" if result["lines_match_ratio"] is not None else "-"
+        print(f"{stage_name:<20}{result['seconds']:>10.3f}{result['pages_per_second']:>14,.1f}{match:>20}")
+
+    if args.reference_file_name:
+        compare_with_reference(args.reference_file_name, results["text"])
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,210 @@
+"""
+Стресс-тест регулярных выражений экстракторов на катастрофический возврат (catastrophic backtracking)
+
+Регулярные выражения разбиения текста на трансакции сочетают нежадные [\\s\\S]*? и .*? с lookahead. На испорченном
+или специально составленном тексте такое выражение может работать не за линейное, а за квадратичное время и
+"повесить" процесс конвертации. Бенчмарк создаёт такие тексты растущего размера и для каждого экстрактора замеряет
+время разбиения текста на трансакции (split_text_on_entries) и определения формата (check_support):
+    no_trailer              корректная выписка без 'Реквизиты для перевода' в конце
+    no_terminators          у трансакций нет второй строки с датой обработки (у SBER_DEBIT_2005 - строки 'дд.мм.гггг /')
+    entry_starts_only       строки, состоящие только из даты и времени операции
+    entry_starts_one_line   одна огромная строка, в которой много раз повторяются дата и время операции
+    long_description        корректная выписка, в одной из трансакций которой огромное описание операции
+    fuzz                    корректная выписка со случайно удалёнными, повторёнными, обрезанными и склеенными строками
+
+Для каждого текста и экстрактора вычисляется показатель роста времени: log(t_max / t_min) / log(размер_max / размер_min),
+для линейного времени он близок к 1, для квадратичного - к 2. Проблема фиксируется, если показатель роста превышает
+MAX_GROWTH_EXPONENT (если время достаточно велико, чтобы его можно было измерить) или если время на мегабайт текста
+превышает бюджет (ключ --budget). Размер текста, на котором бюджет уже превышен, дальше не увеличивается, чтобы
+квадратичное выражение не "повесило" сам бенчмарк. Если есть проблемы, бенчмарк завершается с кодом 1.
+
+Usage:
+    py benchmark_regex.py [-n QNT_TRANSACTIONS] [-g QNT_SIZES] [-f FORMAT [FORMAT ...]] [-s SEED] [--budget SECONDS_PER_MB]
+"""
+
+import re
+import sys
+import math
+import time
+import random
+import argparse
+
+import extractors
+import statement_generator
+
+# growth exponent of the time, above which the time is considered not linear
+MAX_GROWTH_EXPONENT = 1.4
+
+# times shorter than this are too noisy to calculate the growth exponent from them
+MIN_MEASURABLE_SECONDS = 0.02
+
+# seconds per megabyte of text
+DEFAULT_BUDGET = 1.0
+
+# operation name : function, which runs it on the extractor object
+OPERATIONS = {"split": lambda extractor: extractor.split_text_on_entries(),
+              "detection": lambda extractor: extractor.check_support()}
+
+# the second line of a transaction with the processing date: '06.07.2021\t258077\t...' or '05.08.2019 / 258077\t...'
+_PROCESSING_DATE_LINE = re.compile(r'\d\d\.\d\d\.\d\d\d\d(\t| / )(\d{3,8}|-)')
+
+_ENTRY_START = '06.07.2021 15:46'
+
+
+def _generate_no_trailer(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    text = statement_generator.generate_statement_text(format_name, qnt_transactions, rnd.randint(0, 1000))
+    return text[:text.rfind(statement_generator.PAGE_CONTINUATION)]
+
+
+def _generate_no_terminators(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    text = statement_generator.generate_statement_text(format_name, qnt_transactions, rnd.randint(0, 1000))
+    return ''.join(line for line in text.splitlines(keepends=True) if not _PROCESSING_DATE_LINE.match(line))
+
+
+def _generate_entry_starts_only(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    # the text after 'Реквизиты для перевода' is not searched for transactions, so the trailer is removed
+    return _generate_no_trailer(format_name, 1, rnd) + f'{_ENTRY_START}\tПЕРЕВОД\n' * qnt_transactions
+
+
+def _generate_entry_starts_one_line(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    return _generate_no_trailer(format_name, 1, rnd) + f'{_ENTRY_START} ' * qnt_transactions + '\n'
+
+
+def _generate_long_description(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    text = statement_generator.generate_statement_text(format_name, 20, rnd.randint(0, 1000))
+    lines = text.splitlines(keepends=True)
+    # the description is put after the second line of a transaction in the middle of the statement
+    position = [i for i, line in enumerate(lines) if _PROCESSING_DATE_LINE.match(line)][10] + 1
+    # dates inside the description make regular expressions try (and fail) to start or finish a transaction there
+    lines.insert(position, 'ПЕРЕВОД 06.07.2021 ' * qnt_transactions + '\n')
+    return ''.join(lines)
+
+
+def _generate_fuzz(format_name:str, qnt_transactions:int, rnd:random.Random) -> str:
+    text = statement_generator.generate_statement_text(format_name, qnt_transactions, rnd.randint(0, 1000))
+    lines = text.splitlines(keepends=True)
+    fuzzed = []
+    for line in lines:
+        mutation = rnd.random()
+        if mutation < 0.05:
+            continue                                        # line is lost
+        elif mutation < 0.10:
+            fuzzed.extend([line, line])                     # line is duplicated
+        elif mutation < 0.15:
+            fuzzed.append(line[:rnd.randint(0, len(line))]) # line is cut and glued with the next one
+        else:
+            fuzzed.append(line)
+
+    return ''.join(fuzzed)
+
+
+# name of the text : function(format name, amount of transactions, random generator), which creates it
+GENERATORS = {"no_trailer": _generate_no_trailer,
+              "no_terminators": _generate_no_terminators,
+              "entry_starts_only": _generate_entry_starts_only,
+              "entry_starts_one_line": _generate_entry_starts_one_line,
+              "long_description": _generate_long_description,
+              "fuzz": _generate_fuzz}
+
+
+def measure_operation(extractor_type:type, operation_name:str, text:str) -> float:
+    """
+    Seconds, which the operation takes on the text. Exceptions are expected: texts are broken
+    """
+    extractor = extractor_type(text)
+    start = time.perf_counter()
+    try:
+        OPERATIONS[operation_name](extractor)
+    except Exception:
+        pass
+    return time.perf_counter() - start
+
+
+def get_growth_exponent(sizes:list, seconds:list) -> float:
+    """
+    Exponent k in time ~ size**k between the smallest and the biggest sizes. None, if times are too short to tell
+    """
+    if len(sizes) < 2 or seconds[-1] < MIN_MEASURABLE_SECONDS or seconds[0] <= 0:
+        return None
+
+    return math.log(seconds[-1] / seconds[0]) / math.log(sizes[-1] / sizes[0])
+
+
+def stress_extractor(extractor_type:type, operation_name:str, texts:list, budget:float) -> dict:
+    """
+    texts - list of texts of growing sizes. Returns {"sizes": [...], "seconds": [...], "growth_exponent": ...,
+    "violations": [...]}. Texts after the first one, which exceeded the budget, are not measured
+    """
+    sizes, seconds, violations = [], [], []
+
+    for text in texts:
+        size = len(text.encode('utf-8'))
+        operation_seconds = measure_operation(extractor_type, operation_name, text)
+        sizes.append(size)
+        seconds.append(operation_seconds)
+
+        seconds_per_mb = operation_seconds / (size / 1024 / 1024)
+        if operation_seconds >= MIN_MEASURABLE_SECONDS and seconds_per_mb > budget:
+            violations.append(f"{seconds_per_mb:.2f} сек/МБ на {size / 1024 / 1024:.2f} МБ при бюджете {budget:.2f} сек/МБ")
+            break
+
+    growth_exponent = get_growth_exponent(sizes, seconds)
+    if growth_exponent is not None and growth_exponent > MAX_GROWTH_EXPONENT:
+        violations.append(f"время растёт как размер^{growth_exponent:.2f}")
+
+    return {"sizes": sizes, "seconds": seconds, "growth_exponent": growth_exponent, "violations": violations}
+
+
+def run_stress(format_names:list, qnt_transactions:int, qnt_sizes:int, seed:int, budget:float) -> list:
+    """
+    Returns list of (text name, format name, extractor name, operation name, result of stress_extractor)
+    """
+    results = []
+    extractor_types = extractors.get_extractors_list()
+
+    for generator_name, generator in GENERATORS.items():
+        for format_name in format_names:
+            # the same random generator seed for all sizes, so that bigger texts are broken the same way
+            texts = [generator(format_name, qnt_transactions * 2 ** i, random.Random(seed)) for i in range(qnt_sizes)]
+
+            for extractor_type in extractor_types:
+                for operation_name in OPERATIONS:
+                    result = stress_extractor(extractor_type, operation_name, texts, budget)
+                    results.append((generator_name, format_name, extractor_type.__name__, operation_name, result))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Стресс-тест регулярных выражений экстракторов на катастрофический возврат')
+    parser.add_argument('-n', '--transactions', type=int, default=2000, help='Количество трансакций в самом маленьком тексте')
+    parser.add_argument('-g', '--sizes', type=int, default=4, dest='qnt_sizes',
+                        help='Количество размеров текста, каждый следующий в 2 раза больше предыдущего')
+    parser.add_argument('-f', '--formats', nargs='+', default=statement_generator.SUPPORTED_FORMATS,
+                        choices=statement_generator.SUPPORTED_FORMATS, help='Форматы, на основе которых создаются тексты')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET, help='Бюджет времени, сек на МБ текста')
+    args = parser.parse_args()
+
+    all_violations = []
+
+    print(f"{'текст':<24}{'формат':<20}{'экстрактор':<20}{'операция':<12}{'МБ':>8}{'сек':>10}{'рост':>8}")
+    for generator_name, format_name, extractor_name, operation_name, result in \
+            run_stress(args.formats, args.transactions, args.qnt_sizes, args.seed, args.budget):
+        growth = f"{result['growth_exponent']:.2f}" if result["growth_exponent"] is not None else "-"
+        print(f"{generator_name:<24}{format_name:<20}{extractor_name:<20}{operation_name:<12}"
+              f"{result['sizes'][-1] / 1024 / 1024:>8.2f}{result['seconds'][-1]:>10.3f}{growth:>8}")
+
+        all_violations.extend(f"{generator_name}, {format_name}, {extractor_name}, {operation_name}: {violation}"
+                              for violation in result["violations"])
+
+    if all_violations:
+        print("!!!!!!! Время работы регулярных выражений растёт быстрее, чем линейно, или превышает бюджет:")
+        print("\n".join(all_violations))
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,22 @@
+import random
+
+import extractors
+import benchmark_regex
+
+
+def test_generators_create_texts_of_growing_size():
+    for generator in benchmark_regex.GENERATORS.values():
+        small = generator("SBER_DEBIT_2005", 50, random.Random(0))
+        big = generator("SBER_DEBIT_2005", 100, random.Random(0))
+        assert len(big) > len(small)
+
+
+def test_split_does_not_backtrack_on_broken_texts():
+    # before entries were anchored to the beginning of a line, these texts took seconds instead of milliseconds
+    for generator_name in ("no_terminators", "entry_starts_only", "entry_starts_one_line"):
+        for format_name in ("SBER_DEBIT_2005", "SBER_DEBIT_2107"):
+            texts = [benchmark_regex.GENERATORS[generator_name](format_name, qnt, random.Random(0)) for qnt in (500, 1000)]
+
+            for extractor_type in extractors.get_extractors_list():
+                result = benchmark_regex.stress_extractor(extractor_type, "split", texts, benchmark_regex.DEFAULT_BUDGET)
+                assert result["violations"] == [], (generator_name, format_name, extractor_type.__name__)
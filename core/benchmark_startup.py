@@ -0,0 +1,98 @@
+"""
+Бенчмарк времени запуска утилиты командной строки
+
+Измеряет (медиану по нескольким запускам) время работы отдельного процесса для:
+    - sberbankPDF2Excel.py --help
+    - конвертации промежуточного текстового файла в csv (sberbankPDF2Excel.py <файл.txt> -t csv)
+и сравнивает его с целевыми значениями. Дополнительно проверяет, что при --help не импортируются тяжёлые
+зависимости (pandas, pdfminer)
+
+Usage:
+    py benchmark_startup.py [-n REPEATS] [--help-target SECONDS] [--csv-target SECONDS] [txt_file_name]
+
+Возвращает код 1, если хотя бы одна цель не достигнута
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_TXT_FILE = os.path.join(HERE, os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+# target median wall time, seconds
+HELP_TARGET = 0.25
+TXT_2_CSV_TARGET = 1.0
+
+HEAVY_MODULES = ['pandas', 'pdfminer']
+
+# snippet, which runs the CLI with --help in the same interpreter and reports, which heavy modules got imported
+_HELP_IMPORTS_SNIPPET = f"""
+import sys, runpy
+sys.path.insert(0, {HERE!r})
+sys.argv = ['sberbankPDF2Excel.py', '--help']
+try:
+    runpy.run_path({os.path.join(HERE, 'sberbankPDF2Excel.py')!r}, run_name='__main__')
+except SystemExit:
+    pass
+print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules), file=sys.stderr)
+"""
+
+
+def _median_run_time(command:list, repeats:int, cwd:str) -> float:
+    run_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=cwd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        run_times.append(time.perf_counter() - start)
+
+    return statistics.median(run_times)
+
+
+def _heavy_modules_imported_by_help() -> list:
+    completed = subprocess.run([sys.executable, '-c', _HELP_IMPORTS_SNIPPET],
+                               check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    last_line = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else ''
+    return [module for module in last_line.split(',') if module]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description='Бенчмарк времени запуска sberbankPDF2Excel.py')
+    parser.add_argument('txt_file_name', nargs='?', default=DEFAULT_TXT_FILE, help='Промежуточный текстовый файл для конвертации в csv')
+    parser.add_argument('-n', '--repeats', type=int, default=5, help='Количество запусков для каждого измерения')
+    parser.add_argument('--help-target', type=float, default=HELP_TARGET, help='Целевое время запуска с --help, сек')
+    parser.add_argument('--csv-target', type=float, default=TXT_2_CSV_TARGET, help='Целевое время конвертации txt -> csv, сек')
+    args = parser.parse_args()
+
+    cli = os.path.join(HERE, 'sberbankPDF2Excel.py')
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        txt_file_name = os.path.join(tmp_dir, 'statement.txt')
+        shutil.copyfile(args.txt_file_name, txt_file_name)
+
+        results = [
+            ('--help', _median_run_time([sys.executable, cli, '--help'], args.repeats, tmp_dir), args.help_target),
+            ('txt -> csv', _median_run_time([sys.executable, cli, txt_file_name, '-t', 'csv', '-b'], args.repeats, tmp_dir), args.csv_target),
+        ]
+
+    all_ok = True
+    for name, median_time, target in results:
+        ok = median_time <= target
+        all_ok = all_ok and ok
+        print(f"{name:<12} median={median_time:.3f}s target={target:.3f}s {'OK' if ok else 'FAIL'}")
+
+    heavy_modules = _heavy_modules_imported_by_help()
+    print(f"heavy modules imported by --help: {heavy_modules if heavy_modules else 'none'}")
+    all_ok = all_ok and not heavy_modules
+
+    return 0 if all_ok else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
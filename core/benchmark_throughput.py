@@ -0,0 +1,141 @@
+"""
+Бенчмарк скорости разбора выписок на синтетических данных (statement_generator.py)
+
+Для каждого формата создаётся выписка с N трансакциями и для каждого этапа измеряется количество трансакций
+в секунду и пиковая память, выделенная Python (tracemalloc):
+    detection       определение формата выписки (determine_extractor_auto)
+    splitting       разбиение текста на трансакции (split_text_on_entries)
+    decomposition   разбор всех трансакций (decompose_entry_to_dict)
+    dataframe       создание dataframe и приведение к компактным типам
+    sink_<тип>      запись результата в каждый из поддерживаемых типов файлов
+
+Время и память замеряются в разных проходах, так как tracemalloc сам по себе замедляет выполнение.
+
+Usage:
+    py benchmark_throughput.py [-n QNT_TRANSACTIONS] [-f FORMAT [FORMAT ...]] [-t TYPE [TYPE ...]] [--no-memory]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+import utils
+import extractors_generic
+import statement_generator
+
+
+def _run_stages(format_name:str, text:str, output_file_types:list, output_dir:str, stage_hook) -> None:
+    """
+    Runs all stages of the conversion one after another. stage_hook(stage name, function) runs and measures one stage
+    and returns the result of the function
+    """
+    extractor_type = stage_hook("detection", lambda: extractors_generic.determine_extractor_auto(text))
+    extractor = extractor_type(text)
+
+    entries_texts = stage_hook("splitting", extractor.split_text_on_entries)
+    entries = stage_hook("decomposition", lambda: [extractor.decompose_entry_to_dict(entry) for entry in entries_texts])
+
+    columns_info = extractor.get_columns_info()
+    columns_types = extractor.get_columns_types()
+
+    def build_dataframe():
+        df = pd.DataFrame(entries, columns=columns_info.keys())
+        return utils.compact_df_dtypes(df, columns_types)
+
+    df = stage_hook("dataframe", build_dataframe)
+    df = utils.rename_sort_df(df, columns_info)
+    money_columns = [columns_info[column] for column, column_type in columns_types.items()
+                     if column_type == utils.COLUMN_TYPE_MONEY and column in columns_info]
+
+    for output_file_type in output_file_types:
+        output_file_name = os.path.join(output_dir, f"{format_name}_{output_file_type}")
+        stage_hook("sink_" + output_file_type,
+                   lambda: utils.write_df_to_file(df, output_file_name, extractor_type.__name__,
+                                                  output_file_format=output_file_type,
+                                                  money_columns=money_columns))
+
+
+def measure_format(format_name:str, qnt_transactions:int, output_file_types:list, measure_memory:bool) -> dict:
+    """
+    Returns stage name : {"seconds": ..., "entries_per_second": ..., "peak_memory": ... or None, "error": ... or None}
+    """
+    text = statement_generator.generate_statement_text(format_name, qnt_transactions)
+    results = {}
+
+    def timed_stage(stage_name, function):
+        start = time.perf_counter()
+        try:
+            result = function()
+            error = None
+        except Exception as e:
+            result, error = None, f"{type(e).__name__}: {e}"
+        seconds = time.perf_counter() - start
+
+        results[stage_name] = {"seconds": seconds,
+                               "entries_per_second": qnt_transactions / seconds if seconds else float("inf"),
+                               "peak_memory": None,
+                               "error": error}
+        return result
+
+    def memory_stage(stage_name, function):
+        tracemalloc.reset_peak()
+        start_memory = tracemalloc.get_traced_memory()[0]
+        try:
+            result = function()
+        except Exception:
+            result = None
+        results[stage_name]["peak_memory"] = tracemalloc.get_traced_memory()[1] - start_memory
+        return result
+
+    # messages of write_df_to_file are not interesting here
+    with tempfile.TemporaryDirectory() as output_dir, open(os.devnull, "w") as devnull:
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            _run_stages(format_name, text, output_file_types, output_dir, timed_stage)
+
+            if measure_memory:
+                tracemalloc.start()
+                try:
+                    _run_stages(format_name, text, output_file_types, output_dir, memory_stage)
+                finally:
+                    tracemalloc.stop()
+        finally:
+            sys.stdout = stdout
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Бенчмарк скорости разбора выписок на синтетических данных')
+    parser.add_argument('-n', '--transactions', type=int, default=100_000, help='Количество трансакций в выписке')
+    parser.add_argument('-f', '--formats', nargs='+', default=statement_generator.SUPPORTED_FORMATS,
+                        choices=statement_generator.SUPPORTED_FORMATS, help='Форматы выписок')
+    parser.add_argument('-t', '--types', nargs='+', default=utils.OUTPUT_FILE_TYPES, choices=utils.OUTPUT_FILE_TYPES,
+                        help='Типы создаваемых файлов')
+    parser.add_argument('--no-memory', action='store_false', default=True, dest='measure_memory',
+                        help='Не замерять пиковую память (замер памяти требует второго прохода)')
+    args = parser.parse_args()
+
+    for format_name in args.formats:
+        results = measure_format(format_name, args.transactions, args.types, args.measure_memory)
+
+        print(f"{format_name}, {args.transactions} трансакций")
+        print(f"{'этап':<16}{'сек':>10}{'трансакций/сек':>18}{'пик памяти, МБ':>18}")
+        for stage_name, result in results.items():
+            if result["error"]:
+                print(f"{stage_name:<16}ошибка: {result['error']}")
+                continue
+
+            peak_memory = f"{result['peak_memory'] / 1024 / 1024:.1f}" if result["peak_memory"] is not None else "-"
+            print(f"{stage_name:<16}{result['seconds']:>10.3f}{result['entries_per_second']:>18,.0f}{peak_memory:>18}")
+        print()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -13,4 +13,19 @@ class UserInputError(SberbankPDF2ExcelError):
     pass
 
 class TestingError(SberbankPDF2ExcelError):
-    pass
\ No newline at end of file
+    pass
+
+class WorkerError(SberbankPDF2ExcelError):
+    """
+    Conversion in a sandboxed worker process (see worker_sandbox.py) was stopped, the worker process is replaced
+    """
+    pass
+
+class WorkerTimeoutError(WorkerError):
+    pass
+
+class WorkerMemoryLimitError(WorkerError):
+    pass
+
+class WorkerCrashError(WorkerError):
+    pass
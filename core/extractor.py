@@ -1,22 +1,101 @@
 """
 Abstract Extractor class
 All real extractors need to inherit from it and overwrite overwrite all @abstractmethod
+
+Money fields of the entries (decompose_entry_to_dict(), get_entries()) are strings with the actual sign, as returned by
+utils.get_signed_money() (e.g. '-1189,40'), not numbers. They are parsed to integer kopecks for the whole column at once
+by utils.compact_df_dtypes() and converted to rubles only when written to a file
 """
 
+import re
 from abc import ABC, abstractmethod
+from typing import Iterator, Union
 
 import exceptions
+import utils
+import progress_events
+import timings
+
+# kinds of lines of the statement text (see Extractor.get_lines_text())
+LINE_HEADER = 'header'                  # beginning of the statement before the first transaction
+LINE_BALANCE = 'balance'                # lines of the header with the balance of the period
+LINE_TRANSACTION = 'transaction'        # lines of transactions
+LINE_PAGE_FURNITURE = 'page_furniture'  # 'Продолжение на следующей странице' and the header of the next page
+LINE_TRAILER = 'trailer'                # end of the statement after the last transaction
+
+PAGE_CONTINUATION = 'Продолжение на следующей странице'
+TRAILER_START = 'Реквизиты для перевода'
+EOF_MARKER = '___EOF'
+
+def _find_pages_structure(text:str, entry_start_pattern:re.Pattern) -> tuple:
+    """
+    Finds the end of the header, the start of the trailer and the blocks of transactions and page furniture between them.
+    Returns (end of the header, start of the trailer or len(text), tuple of (kind of lines, start, end)).
+    Only the beginnings of pages and of the first transactions on them are searched for, so that the amount of work
+    in Python depends on the amount of pages, not on the amount of lines. The result is kept by the extractor
+    (see Extractor._get_line_blocks()), so that the text is not retained after the extractor is released
+    """
+    blocks = []
+
+    def add_block(line_kind:str, start:int, end:int) -> None:
+        if start < end:
+            blocks.append((line_kind, start, end))
+
+    # the trailer starts with 'Реквизиты для перевода'. Lines are searched with str.find(), which is much faster
+    # than a regular expression on a big text
+    trailer_start = text.find('\n' + TRAILER_START) + 1 or len(text)
+
+    first_entry = entry_start_pattern.search(text, 0, trailer_start)
+    header_end = first_entry.start() if first_entry else trailer_start
+
+    position = header_end
+    while position < trailer_start:
+        page_continuation = text.find('\n' + PAGE_CONTINUATION, max(position - 1, 0), trailer_start) + 1
+        if not page_continuation:
+            add_block(LINE_TRANSACTION, position, trailer_start)
+            break
+
+        add_block(LINE_TRANSACTION, position, page_continuation)
+
+        # everything from 'Продолжение на следующей странице' till the next transaction is the header of the next page
+        next_entry = entry_start_pattern.search(text, page_continuation, trailer_start)
+        position = next_entry.start() if next_entry else trailer_start
+        add_block(LINE_PAGE_FURNITURE, page_continuation, position)
+
+    return header_end, trailer_start, tuple(blocks)
 
 class Extractor(ABC):
+    # the first line of a transaction starts with the date and time of the operation like '06.07.2021 15:46'
+    entry_start_pattern = re.compile(r'^\d\d\.\d\d\.\d\d\d\d\s\d\d:\d\d', re.MULTILINE)
+
+    # line of the header, which starts the block with the balance of the period, and amount of lines in this block
+    balance_block_pattern = None
+    balance_block_size = 1
+
+    # keyword arguments of pdfminer.layout.LAParams, with which PDF statements of this format are converted to text.
+    # They override pdf2txtev.DEFAULT_LAYOUT_PARAMS. A dict, not LAParams, so that pdfminer is not imported here.
+    # None - the default parameters. The fastest parameters, which do not change the result, are found by tune_layout_params.py
+    layout_params = None
+
     def __init__(self, pdf_text: str):
-        self.pdf_text = pdf_text + '\n___EOF'
+        self._source_text = pdf_text
+        self.pdf_text = pdf_text + '\n' + EOF_MARKER
+
+        # list of (kind of lines, start, end): positions in self.pdf_text of consecutive lines of the same kind
+        self._line_blocks = None
+        self._qnt_header_blocks = 0
+        self._entries_text = None
 
     @abstractmethod
     def check_specific_signatures(self):
         pass
 
     @abstractmethod
-    def get_period_balance(self) -> str:
+    def get_period_balance(self) -> int:
+        """
+        Returns balance of the period from the header of the statement as an integer amount of kopecks
+        (see utils.get_kopecks_from_money())
+        """
         pass
 
     @abstractmethod
@@ -25,19 +104,164 @@ class Extractor(ABC):
 
     @abstractmethod
     def decompose_entry_to_dict(self, entry:str)->dict:
+        """
+        Returns the fields of one entry. Fields of the kind utils.COLUMN_TYPE_MONEY (see get_columns_types()) are
+        signed money strings, returned by utils.get_signed_money(), e.g. '-1189,40'
+        """
         pass
 
     @abstractmethod
     def get_column_name_for_balance_calculation(self) -> str:
         pass
 
+    def get_column_name_for_running_balance(self) -> Union[str, None]:
+        """
+        Returns the field with the remainder of the account after every transaction, if the format has it.
+        It is used to find the first transaction, at which the running balance diverges, when the balance check fails
+        (see accounting.find_running_balance_mismatch()). None - the format does not have such field
+        """
+        return None
+
+    def find_entry_in_text(self, entries:list, entry_index:int) -> int:
+        """
+        Returns the position of the first line of entries[entry_index] (entries - result of split_text_on_entries())
+        in the text of the statement or -1. Entries are split on get_entries_text(), not on the text itself, therefore
+        the position is searched for. Every entry is searched for after the previous one, so that an entry, which
+        repeats an earlier one, is found at its own position
+        """
+        position = 0
+        for entry in entries[:entry_index + 1]:
+            first_line = entry.strip('\n').split('\n', 1)[0]
+            found = self._source_text.find(first_line, position) if first_line else -1
+            if found == -1:
+                return -1
+
+            position = found + len(first_line)
+
+        return found
+
+    def get_columns_types(self)->dict:
+        """
+        Returns kind of data (utils.COLUMN_TYPE_*) for the keys of the result of the function self.decompose_entry_to_dict().
+        It is used to store transactions in the dataframe with compact data types (see utils.compact_df_dtypes()).
+        Default implementation describes the fields, common for Sberbank statements. Keys, not mentioned here, are
+        treated as text. Override this function, if an extractor returns other fields
+        """
+        return {'operation_date': utils.COLUMN_TYPE_DATETIME,
+                'processing_date': utils.COLUMN_TYPE_DATETIME,
+                'authorisation_code': utils.COLUMN_TYPE_TEXT,
+                'description': utils.COLUMN_TYPE_TEXT,
+                'category': utils.COLUMN_TYPE_CATEGORY,
+                'value_account_currency': utils.COLUMN_TYPE_MONEY,
+                'value_operational_currency': utils.COLUMN_TYPE_MONEY,
+                'operational_currency': utils.COLUMN_TYPE_CATEGORY,
+                'remainder_account_currency': utils.COLUMN_TYPE_MONEY}
+
+    def _classify_lines(self) -> list:
+        """
+        Classifies all lines of the text once and returns blocks of consecutive lines of the same kind
+        as a list of (kind of lines, start, end), where start and end are positions in self.pdf_text
+        """
+        header_end, trailer_start, blocks = _find_pages_structure(self._source_text, self.entry_start_pattern)
+
+        header_blocks = self._classify_header_lines(header_end)
+        self._qnt_header_blocks = len(header_blocks)
+        blocks = header_blocks + list(blocks)
+
+        if trailer_start == len(self._source_text):
+            # there is no 'Реквизиты для перевода': the trailer is only the EOF marker and the line break before it
+            # belongs to the last line of the text
+            trailer_start += 1
+            if blocks:
+                blocks[-1] = (blocks[-1][0], blocks[-1][1], trailer_start)
+            else:
+                blocks.append((LINE_HEADER, 0, trailer_start))
+
+        blocks.append((LINE_TRAILER, trailer_start, len(self.pdf_text)))
+
+        return blocks
+
+    def _classify_header_lines(self, header_end:int) -> list:
+        """
+        Splits the header (it is small) on lines and finds the block with the balance of the period in it
+        """
+        blocks = []
+        balance_lines_left = 0
+        start = 0
+        for line in self.pdf_text[:header_end].splitlines(keepends=True):
+            if self.balance_block_pattern is not None and self.balance_block_pattern.search(line):
+                balance_lines_left = self.balance_block_size
+
+            line_kind = LINE_BALANCE if balance_lines_left > 0 else LINE_HEADER
+            balance_lines_left = max(balance_lines_left - 1, 0)
+
+            if blocks and blocks[-1][0] == line_kind:
+                blocks[-1] = (line_kind, blocks[-1][1], start + len(line))
+            else:
+                blocks.append((line_kind, start, start + len(line)))
+            start += len(line)
+
+        return blocks
+
+    def _get_line_blocks(self) -> list:
+        if self._line_blocks is None:
+            with timings.measure("classify_lines"):
+                self._line_blocks = self._classify_lines()
+
+        return self._line_blocks
+
+    def get_lines_text(self, *line_kinds:str) -> str:
+        """
+        Returns all lines of the given kinds (LINE_*) in the order of the text
+        """
+        return ''.join(self.pdf_text[start:end] for line_kind, start, end in self._get_line_blocks() if line_kind in line_kinds)
+
+    def get_balance_text(self) -> str:
+        """
+        Lines of the header with the balance of the period (see balance_block_pattern).
+        Extractors search for the balance only in them instead of the whole text
+        """
+        header_blocks = self._get_line_blocks()[:self._qnt_header_blocks]
+        return ''.join(self.pdf_text[start:end] for line_kind, start, end in header_blocks if line_kind == LINE_BALANCE)
+
+    def get_furniture_text(self) -> str:
+        """
+        All lines except transactions: header, balance, page furniture and trailer.
+        Signatures of the format are searched in them, not in the descriptions of transactions
+        """
+        return self.get_lines_text(LINE_HEADER, LINE_BALANCE, LINE_PAGE_FURNITURE, LINE_TRAILER)
+
+    def get_entries_text(self) -> str:
+        """
+        Lines of transactions without page furniture between them, so that entries are split on a much smaller text.
+        The line after the last transaction (normally 'Реквизиты для перевода') is kept, so that regular expressions
+        of extractors find the end of the last transaction the same way as in the whole text
+        """
+        if self._entries_text is not None:
+            return self._entries_text
+
+        blocks = self._get_line_blocks()
+        transaction_blocks = [block_number for block_number, (line_kind, _, _) in enumerate(blocks) if line_kind == LINE_TRANSACTION]
+        if not transaction_blocks:
+            return ''
+
+        text = self.get_lines_text(LINE_TRANSACTION)
+
+        if transaction_blocks[-1] + 1 < len(blocks):
+            _, start, end = blocks[transaction_blocks[-1] + 1]
+            line_end = self.pdf_text.find('\n', start, end)
+            text += self.pdf_text[start:end if line_end == -1 else line_end + 1]
+
+        self._entries_text = text
+        return text
+
     def check_support(self)->bool:
         """
         Function checks whether this extractor support the  text format from self.pdf_text
         """
         try:
             result = True
-            result = result and isinstance(self.get_period_balance(),float)
+            result = result and isinstance(self.get_period_balance(),int)
             result = result and len(self.split_text_on_entries()) > 0
 
             self.check_specific_signatures()
@@ -47,6 +271,30 @@ class Extractor(ABC):
         except exceptions.InputFileStructureError:
             return False
 
-    def get_entries(self)->list[dict]:
-        entries_list_of_dicts = [self.decompose_entry_to_dict(entry) for entry in self.split_text_on_entries()]
+    def iter_entries(self, progress_callback:progress_events.ProgressCallback=None)->Iterator[dict]:
+        """
+        Decomposes entries one by one, so that each of them can be processed (e.g. written out) as soon as it is ready
+        progress_callback - function, which receives progress events (see progress_events.py)
+        """
+        with timings.measure("split_text_on_entries"):
+            entries = self.split_text_on_entries()
+        qnt_entries = len(entries)
+        timings.add_counts("split_text_on_entries", entries=qnt_entries)
+
+        for entry_number, entry in enumerate(entries, start=1):
+            with timings.measure("decompose_entry_to_dict", entries=1):
+                decomposed_entry = self.decompose_entry_to_dict(entry)
+
+            if entry_number % progress_events.ENTRIES_EVENT_STEP == 0 or entry_number == qnt_entries:
+                progress_events.emit(progress_callback, progress_events.EVENT_ENTRIES_DECOMPOSED,
+                                     decomposed=entry_number, total=qnt_entries)
+
+            yield decomposed_entry
+
+    def get_entries(self, progress_callback:progress_events.ProgressCallback=None)->list[dict]:
+        """
+        Returns all entries, decomposed by decompose_entry_to_dict(). Money fields are signed strings, not numbers
+        (see the module docstring)
+        """
+        entries_list_of_dicts = list(self.iter_entries(progress_callback))
         return entries_list_of_dicts
@@ -21,7 +21,8 @@ import re
 from datetime import datetime
 import sys
 
-from utils import get_float_from_money
+from utils import get_signed_money
+from utils import get_kopecks_from_money
 from utils import split_Sberbank_line
 
 from extractor import Extractor
@@ -29,6 +30,9 @@ from extractor import Extractor
 import extractors_generic
 
 class SBER_CREDIT_2107(Extractor):
+    # block with the balance of the period in the header (see Extractor.get_balance_text())
+    balance_block_pattern = re.compile(r'СУММА\sПОПОЛНЕНИЙ\tСУММА\sСПИСАНИЙ\tСУММА\sСПИСАНИЙ БАНКА')
+    balance_block_size = 2
 
     def check_specific_signatures(self):
         """
@@ -36,19 +40,19 @@ class SBER_CREDIT_2107(Extractor):
         If these signatures are not found, then exceptions.InputFileStructureError() is raised
         """
 
-        test1 = re.search(r'сбербанк', self.pdf_text, re.IGNORECASE)
+        test1 = re.search(r'сбербанк', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test1=}")
 
-        test2 = re.search(r'Выписка по счёту кредитной карты', self.pdf_text, re.IGNORECASE)
+        test2 = re.search(r'Выписка по счёту кредитной карты', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test2=}")
 
         if not test1  or not test2:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-    def get_period_balance(self)->str:
+    def get_period_balance(self)->int:
         """
         Function gets information about transaction balance from the header of the banl extract
-        This balance is then returned as a float
+        This balance is then returned as an integer amount of kopecks
 
 
         ---------------------------------------------------
@@ -59,16 +63,16 @@ class SBER_CREDIT_2107(Extractor):
         :return:
         """
 
-        res = re.search(r'СУММА\sПОПОЛНЕНИЙ\tСУММА\sСПИСАНИЙ\tСУММА\sСПИСАНИЙ БАНКА\n(.*?)\n', self.pdf_text, re.MULTILINE)
+        res = re.search(r'СУММА\sПОПОЛНЕНИЙ\tСУММА\sСПИСАНИЙ\tСУММА\sСПИСАНИЙ БАНКА\n(.*?)\n', self.get_balance_text(), re.MULTILINE)
         if not res:
             pass
             raise exceptions.InputFileStructureError('Не найдена структура с пополнениями и списаниями')
 
         line_parts = res.group(1).split('\t')
 
-        summa_popolneniy = get_float_from_money(line_parts[0])
-        summa_spisaniy = get_float_from_money(line_parts[1])
-        summa_spisaniy_banka = get_float_from_money(line_parts[2])
+        summa_popolneniy = get_kopecks_from_money(line_parts[0])
+        summa_spisaniy = get_kopecks_from_money(line_parts[1])
+        summa_spisaniy_banka = get_kopecks_from_money(line_parts[2])
 
 
         return summa_popolneniy - summa_spisaniy -summa_spisaniy_banka
@@ -110,7 +114,7 @@ class SBER_CREDIT_2107(Extractor):
         """
         # extracting entries (operations) from text file on
         individual_entries = re.findall(r"""
-            \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                             # Date and time like '06.07.2021 15:46'                                        
+            ^\d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                            # Date and time like '06.07.2021 15:46' at the beginning of a line
             .*?\n                                                          # Anything till end of the line including a line break
             \d\d\.\d\d\.\d\d\d\d\s{1}                                      # дата обработки и 1 пробел 
             (?=\d{3,8}|-)                                                  # код авторизации либо "-". Код авторизациии который я видел всегда состоит и 6 цифр, но на всякий случай укажим с 3 до 8
@@ -119,7 +123,7 @@ class SBER_CREDIT_2107(Extractor):
              \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d|                           # Либо до начала новой страницы
               Реквизиты\sдля\sперевода)                                    # Либо да конца выписки
             """,
-                                        self.pdf_text, re.VERBOSE)
+                                        self.get_entries_text(), re.VERBOSE | re.MULTILINE)
 
         if len(individual_entries) == 0:
             raise exceptions.InputFileStructureError(
@@ -136,7 +140,7 @@ class SBER_CREDIT_2107(Extractor):
         If something unexpected is found, exception exceptions.InputFileStructureError() is raised
         Naming of the dictionary keys is not hard fixed, but shall correspond to what is returned by the function get_columns_info(self)
 
-        All numerical fields shall be returned as float
+        All money fields shall be returned as strings with the actual sign (see utils.get_signed_money())
 
         All dates / dates and times shall be returned as python datetime.datetime
 
@@ -194,8 +198,8 @@ class SBER_CREDIT_2107(Extractor):
         result['operation_date'] = datetime.strptime(result['operation_date'], '%d.%m.%Y %H:%M')
 
         result['category'] = line_parts[2]
-        result['value_account_currency'] = get_float_from_money(line_parts[3], True)
-        # result['remainder_account_currency'] = get_float_from_money(line_parts[4])
+        result['value_account_currency'] = get_signed_money(line_parts[3], True)
+        # result['remainder_account_currency'] = get_signed_money(line_parts[4])
 
         # ************** looking at the 2nd line
         line_parts = split_Sberbank_line(lines[1])
@@ -219,7 +223,7 @@ class SBER_CREDIT_2107(Extractor):
             found = re.search(r'(.*?)\s(\S*)',
                               line_parts[3])  # processing string like '6,79 €'
             if found:
-                result['value_operational_currency'] = get_float_from_money(
+                result['value_operational_currency'] = get_signed_money(
                     found.group(1), True)
                 result['operational_currency'] = found.group(2)
             else:
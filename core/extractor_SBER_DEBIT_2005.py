@@ -4,43 +4,45 @@ from datetime import datetime
 import sys
 
 
-from utils import get_float_from_money
+from utils import get_signed_money
+from utils import get_kopecks_from_money
 from utils import split_Sberbank_line
 import extractors_generic
 
 from extractor import Extractor
 
 class SBER_DEBIT_2005(Extractor):
-
+    # block with the balance of the period in the header (see Extractor.get_balance_text())
+    balance_block_pattern = re.compile(r'СУММА (ПОПОЛНЕНИЙ|СПИСАНИЙ)\t')
 
     def check_specific_signatures(self):
 
-        test1 = re.search(r'сбербанк', self.pdf_text, re.IGNORECASE)
+        test1 = re.search(r'сбербанк', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test1=}")
 
-        test2 = re.search(r'Выписка по счёту дебетовой карты', self.pdf_text, re.IGNORECASE)
+        test2 = re.search(r'Выписка по счёту дебетовой карты', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test2=}")
 
         if not test1  or not test2:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-    def get_period_balance(self)->str:
+    def get_period_balance(self)->int:
         """
-        функция ищет в тексте значения "СУММА ПОПОЛНЕНИЙ" и "СУММА СПИСАНИЙ" и возвращает раницу
+        функция ищет в тексте значения "СУММА ПОПОЛНЕНИЙ" и "СУММА СПИСАНИЙ" и возвращает раницу в копейках
         используется для контрольной проверки вычислений
 
         :param PDF_text:
         :return:
         """
 
-        if (res := re.search(r'СУММА ПОПОЛНЕНИЙ\t(\d[\d\s]*\,\d\d)', self.pdf_text,
+        if (res := re.search(r'СУММА ПОПОЛНЕНИЙ\t(\d[\d\s]*\,\d\d)', self.get_balance_text(),
                              re.MULTILINE)):
             summa_popolneniy = res.group(1)
         else:
             raise exceptions.InputFileStructureError(
                 'Не найдено значение "СУММА ПОПОЛНЕНИЙ"')
 
-        if (res := re.search(r'СУММА СПИСАНИЙ\t(\d[\d\s]*\,\d\d)', self.pdf_text,
+        if (res := re.search(r'СУММА СПИСАНИЙ\t(\d[\d\s]*\,\d\d)', self.get_balance_text(),
                              re.MULTILINE)):
             summa_spisaniy = res.group(1)
         else:
@@ -49,8 +51,8 @@ class SBER_DEBIT_2005(Extractor):
 
         # print(f"{summa_popolneniy=}")
         # print(f"{summa_spisaniy=}")
-        summa_popolneniy = get_float_from_money(summa_popolneniy)
-        summa_spisaniy = get_float_from_money(summa_spisaniy)
+        summa_popolneniy = get_kopecks_from_money(summa_popolneniy)
+        summa_spisaniy = get_kopecks_from_money(summa_spisaniy)
 
         return summa_popolneniy - summa_spisaniy
 
@@ -74,12 +76,15 @@ class SBER_DEBIT_2005(Extractor):
         """
         # extracting entries (operations) from text file on
         individual_entries = re.findall(r"""
-        \d\d\.\d\d\.\d\d\d\d\s\d\d:\d\d               # Date and time like 25.04.1991 18:31                                        
-        [\s\S]*?                                      # any character, including new line. !!None-greedy!! See URL why [\s\S] is used https://stackoverflow.com/a/33312193
+        ^\d\d\.\d\d\.\d\d\d\d\s\d\d:\d\d              # Date and time like 25.04.1991 18:31 at the beginning of a line
+        .*\n                                          # everything till end of the line
+        (?:(?!\d\d\.\d\d\.\d\d\d\d\s\d\d:\d\d).*\n)*?        # lines, which do not start the next transaction. !!None-greedy!!
+                                                      # Without this restriction a transaction without the line with the date with forward slash
+                                                      # made the search scan the whole rest of the text from every transaction after it
         \d\d\.\d\d\.\d\d\d\d\s/                       # date with forward stash like '25.12.2019 /' 
         .*?\n                                         # everything till end of the line
         """,
-                                        self.pdf_text, re.VERBOSE)
+                                        self.get_entries_text(), re.VERBOSE | re.MULTILINE)
 
         if len(individual_entries) == 0:
             raise exceptions.InputFileStructureError(
@@ -105,11 +110,11 @@ class SBER_DEBIT_2005(Extractor):
         ---------------------------------------------------------------------------------------------------------
         В этом примере:
 
-        result['operation_date'] = '26.07.2019 02:04'
+        result['operation_date'] = datetime.datetime(2019,7,26,2,4)
         result['description'] = 'ПЛАТА ЗА ОБСЛУЖИВАНИЕ БАНКОВСКОЙ КАРТЫ  (ЗА ПЕРВЫЙ ГОД)'
         result['value_account_currency'] = -750.00
         result['remainder_account_currency'] = - 750.00
-        result['processing_date'] = '05.08.2019'
+        result['processing_date'] = datetime.datetime(2019,8,5,0,0)
         result['authorisation_code'] = '-'
         """
         lines = entry.split('\n')
@@ -120,11 +125,12 @@ class SBER_DEBIT_2005(Extractor):
 
         line_parts = split_Sberbank_line(lines[0])
 
-        result['operation_date'] = line_parts[0]
+        # https://docs.python.org/3/library/datetime.html#strftime-and-strptime-behavior
+        result['operation_date'] = datetime.strptime(line_parts[0], '%d.%m.%Y %H:%M')
         result['description'] = line_parts[1]
-        result['value_account_currency'] = get_float_from_money(line_parts[2],
-                                                                True)
-        result['remainder_account_currency'] = get_float_from_money(
+        result['value_account_currency'] = get_signed_money(line_parts[2],
+                                                            True)
+        result['remainder_account_currency'] = get_signed_money(
             line_parts[3])
 
         # ************* looking at lines between 1st and the last
@@ -143,7 +149,7 @@ class SBER_DEBIT_2005(Extractor):
             raise exceptions.SberbankPDF2ExcelError(
                 "Line is expected to 2 or parts :" + line)
 
-        result['processing_date'] = line_parts[0][0:10]
+        result['processing_date'] = datetime.strptime(line_parts[0][0:10], '%d.%m.%Y')
         result['authorisation_code'] = line_parts[0][13:]
         result['category'] = line_parts[1]
 
@@ -151,7 +157,7 @@ class SBER_DEBIT_2005(Extractor):
             found = re.search(r'[(](.*?)(\w\w\w)[)]', line_parts[
                 2])  # processing string like (33,31 EUR)
             if found:
-                result['value_operational_currency'] = get_float_from_money(
+                result['value_operational_currency'] = get_signed_money(
                     found.group(1), True)
                 result['operational_currency'] = found.group(2)
             else:
@@ -163,6 +169,9 @@ class SBER_DEBIT_2005(Extractor):
     def get_column_name_for_balance_calculation(self)->str:
         return 'value_account_currency'
 
+    def get_column_name_for_running_balance(self)->str:
+        return 'remainder_account_currency'
+
     def get_columns_info(self)->dict:
         """
         Returns full column names in the order they shall appear in Excel
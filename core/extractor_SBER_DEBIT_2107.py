@@ -3,28 +3,32 @@ import re
 from datetime import datetime
 import sys
 
-from utils import get_float_from_money
+from utils import get_signed_money
+from utils import get_kopecks_from_money
 from utils import split_Sberbank_line
 
 from extractor import Extractor
 import extractors_generic
 
 class SBER_DEBIT_2107(Extractor):
+    # block with the balance of the period in the header (see Extractor.get_balance_text())
+    balance_block_pattern = re.compile(r'ОСТАТОК НА.*?ОСТАТОК НА.*?ВСЕГО СПИСАНИЙ.*?ВСЕГО ПОПОЛНЕНИЙ')
+    balance_block_size = 2
 
     def check_specific_signatures(self):
 
-        test1 = re.search(r'сбербанк', self.pdf_text, re.IGNORECASE)
+        test1 = re.search(r'сбербанк', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test1=}")
 
-        test2 = re.search(r'Выписка по счёту дебетовой карты', self.pdf_text, re.IGNORECASE)
+        test2 = re.search(r'Выписка по счёту дебетовой карты', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test2=}")
 
         if not test1  or not test2:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-    def get_period_balance(self)->str:
+    def get_period_balance(self)->int:
         """
-        функция ищет в тексте значения "ВСЕГО СПИСАНИЙ" и "ВСЕГО ПОПОЛНЕНИЙ" и возвращает разницу
+        функция ищет в тексте значения "ВСЕГО СПИСАНИЙ" и "ВСЕГО ПОПОЛНЕНИЙ" и возвращает разницу в копейках
         используется для контрольной проверки вычислений
 
         Пример текста
@@ -37,7 +41,7 @@ class SBER_DEBIT_2107(Extractor):
         :return:
         """
 
-        res = re.search(r'ОСТАТОК НА.*?ОСТАТОК НА.*?ВСЕГО СПИСАНИЙ.*?ВСЕГО ПОПОЛНЕНИЙ.*?\n(.*?)\n', self.pdf_text, re.MULTILINE)
+        res = re.search(r'ОСТАТОК НА.*?ОСТАТОК НА.*?ВСЕГО СПИСАНИЙ.*?ВСЕГО ПОПОЛНЕНИЙ.*?\n(.*?)\n', self.get_balance_text(), re.MULTILINE)
         if not res:
             raise exceptions.InputFileStructureError(
                 'Не найдена структура с остатками и пополнениями')
@@ -50,8 +54,8 @@ class SBER_DEBIT_2107(Extractor):
         # print('summa_spisaniy ='+summa_spisaniy)
         # print('summa_popolneniy =' + summa_popolneniy)
 
-        summa_popolneniy = get_float_from_money(summa_popolneniy)
-        summa_spisaniy = get_float_from_money(summa_spisaniy)
+        summa_popolneniy = get_kopecks_from_money(summa_popolneniy)
+        summa_spisaniy = get_kopecks_from_money(summa_spisaniy)
 
         return summa_popolneniy - summa_spisaniy
 
@@ -87,7 +91,7 @@ class SBER_DEBIT_2107(Extractor):
         """
         # extracting entries (operations) from text file on
         individual_entries = re.findall(r"""
-            \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                             # Date and time like '06.07.2021 15:46'                                        
+            ^\d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                            # Date and time like '06.07.2021 15:46' at the beginning of a line
             .*?\n                                                          # Anything till end of the line including a line break
             \d\d\.\d\d\.\d\d\d\d\s{1}                                      # дата обработки и 1 пробел 
             (?=\d{3,8}|-)                                                  # код авторизации либо "-". Код авторизациии который я видел всегда состоит и 6 цифр, но на всякий случай укажим с 3 до 8
@@ -96,7 +100,7 @@ class SBER_DEBIT_2107(Extractor):
              \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d|                           # Либо до начала новой страницы
               Реквизиты\sдля\sперевода)                                    # Либо да конца выписки
             """,
-                                        self.pdf_text, re.VERBOSE)
+                                        self.get_entries_text(), re.VERBOSE | re.MULTILINE)
 
         if len(individual_entries) == 0:
             raise exceptions.InputFileStructureError(
@@ -165,9 +169,9 @@ class SBER_DEBIT_2107(Extractor):
         result['operation_date'] = datetime.strptime(result['operation_date'], '%d.%m.%Y %H:%M')
 
         result['category'] = line_parts[2]
-        result['value_account_currency'] = get_float_from_money(line_parts[3],
-                                                                True)
-        result['remainder_account_currency'] = get_float_from_money(
+        result['value_account_currency'] = get_signed_money(line_parts[3],
+                                                            True)
+        result['remainder_account_currency'] = get_signed_money(
             line_parts[4])
 
         # ************** looking at the 2nd line
@@ -192,7 +196,7 @@ class SBER_DEBIT_2107(Extractor):
             found = re.search(r'(.*?)\s(\S*)',
                               line_parts[3])  # processing string like '6,79 €'
             if found:
-                result['value_operational_currency'] = get_float_from_money(
+                result['value_operational_currency'] = get_signed_money(
                     found.group(1), True)
                 result['operational_currency'] = found.group(2)
             else:
@@ -212,6 +216,9 @@ class SBER_DEBIT_2107(Extractor):
     def get_column_name_for_balance_calculation(self)->str:
         return 'value_account_currency'
 
+    def get_column_name_for_running_balance(self)->str:
+        return 'remainder_account_currency'
+
     def get_columns_info(self)->dict:
         """
         Returns full column names in the order they shall appear in Excel
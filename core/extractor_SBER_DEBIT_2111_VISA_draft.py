@@ -9,7 +9,7 @@ import re
 from datetime import datetime
 import sys
 
-from utils import get_float_from_money
+from utils import get_signed_money
 from utils import split_Sberbank_line
 
 from extractor import Extractor
@@ -30,14 +30,14 @@ class SBER_DEBIT_2111_VISA(Extractor):
         if not test1:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-    def get_period_balance(self)->str:
+    def get_period_balance(self)->int:
         test1 = re.search(r'www.sberbank.ru', self.pdf_text, re.IGNORECASE)
         # print(f"{test1=}")
 
         if not test1:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-        return 0.0
+        return 0
 
     def split_text_on_entries(self)->list[str]:
         """
@@ -72,7 +72,7 @@ class SBER_DEBIT_2111_VISA(Extractor):
         If something unexpected is found, exception exceptions.InputFileStructureError() is raised
         Naming of the dictionary keys is not hard fixed, but shall correspond to what is returned by the function get_columns_info(self)
 
-        All numerical fields shall be returned as float
+        All money fields shall be returned as strings with the actual sign (see utils.get_signed_money())
 
         All dates / dates and times shall be returned as python datetime.datetime
 
@@ -139,7 +139,7 @@ class SBER_DEBIT_2111_VISA(Extractor):
 
             result['description'] = line_parts[2]
 
-        result['value_account_currency'] = get_float_from_money(line_parts[-1], True)
+        result['value_account_currency'] = get_signed_money(line_parts[-1], True)
 
         #TODO: Add support for transaction in different currency
 
@@ -17,11 +17,13 @@
 
 
 import exceptions
+import accounting
 import re
 from datetime import datetime
 import sys
 
-from utils import get_float_from_money
+from utils import get_signed_money
+from utils import get_kopecks_from_money
 from utils import split_Sberbank_line
 
 from extractor import Extractor
@@ -29,6 +31,9 @@ from extractor import Extractor
 import extractors_generic
 
 class SBER_PAYMENT_2208(Extractor):
+    # block with the balance of the period in the header (see Extractor.get_balance_text())
+    balance_block_pattern = re.compile(r'ОСТАТОК\sНА.*ВСЕГО\sСПИСАНИЙ\tВСЕГО\sПОПОЛНЕНИЙ')
+    balance_block_size = 2
 
     def check_specific_signatures(self):
         """
@@ -36,19 +41,19 @@ class SBER_PAYMENT_2208(Extractor):
         If these signatures are not found, then exceptions.InputFileStructureError() is raised
         """
 
-        test1 = re.search(r'сбербанк', self.pdf_text, re.IGNORECASE)
+        test1 = re.search(r'сбербанк', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test1=}")
 
-        test2 = re.search(r'Выписка по платёжному счёту', self.pdf_text, re.IGNORECASE)
+        test2 = re.search(r'Выписка по платёжному счёту', self.get_furniture_text(), re.IGNORECASE)
         # print(f"{test2=}")
 
         if not test1  or not test2:
             raise exceptions.InputFileStructureError("Не найдены паттерны, соответствующие выписке")
 
-    def get_period_balance(self)->str:
+    def get_period_balance(self)->int:
         """
         Function gets information about transaction balance from the header of the banl extract
-        This balance is then returned as a float
+        This balance is then returned as an integer amount of kopecks
 
 
         ---------------------------------------------------
@@ -59,23 +64,23 @@ class SBER_PAYMENT_2208(Extractor):
         :return:
         """
 
-        res = re.search(r'ОСТАТОК\sНА.*ВСЕГО\sСПИСАНИЙ\tВСЕГО\sПОПОЛНЕНИЙ.*\n(.*?)\n', self.pdf_text, re.MULTILINE)
+        res = re.search(r'ОСТАТОК\sНА.*ВСЕГО\sСПИСАНИЙ\tВСЕГО\sПОПОЛНЕНИЙ.*\n(.*?)\n', self.get_balance_text(), re.MULTILINE)
         if not res:
             pass
             raise exceptions.InputFileStructureError('Не найдена структура с пополнениями и списаниями')
 
         line_parts = res.group(1).split('\t')
 
-        summa_popolneniy = get_float_from_money(line_parts[3])
-        summa_spisaniy = get_float_from_money(line_parts[2])
+        summa_popolneniy = get_kopecks_from_money(line_parts[3])
+        summa_spisaniy = get_kopecks_from_money(line_parts[2])
 
         balance = summa_popolneniy - summa_spisaniy
 
-        ostatok_start_of_period = get_float_from_money(line_parts[0])
-        ostatok_end_of_period = get_float_from_money(line_parts[1])
+        ostatok_start_of_period = get_kopecks_from_money(line_parts[0])
+        ostatok_end_of_period = get_kopecks_from_money(line_parts[1])
 
-        if not abs(balance - (ostatok_end_of_period - ostatok_start_of_period))<0.01:
-            raise exceptions.InputFileStructureError(f'Что-то пошло не так:\n[ ВСЕГО ПОПОЛНЕНИЙ ({summa_popolneniy}) - ВСЕГО СПИСАНИЙ ({summa_spisaniy}) ] != [ОСТАТОК В КОНЦЕ ({ostatok_end_of_period}) - ОСТАТОК В НАЧАЛЕ ({ostatok_start_of_period})]  ')
+        if not balance == (ostatok_end_of_period - ostatok_start_of_period):
+            raise exceptions.InputFileStructureError(f'Что-то пошло не так:\n[ ВСЕГО ПОПОЛНЕНИЙ ({accounting.format_kopecks(summa_popolneniy)}) - ВСЕГО СПИСАНИЙ ({accounting.format_kopecks(summa_spisaniy)}) ] != [ОСТАТОК В КОНЦЕ ({accounting.format_kopecks(ostatok_end_of_period)}) - ОСТАТОК В НАЧАЛЕ ({accounting.format_kopecks(ostatok_start_of_period)})]  ')
 
         return balance
 
@@ -116,7 +121,7 @@ class SBER_PAYMENT_2208(Extractor):
         """
         # extracting entries (operations) from text file on
         individual_entries = re.findall(r"""
-            \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                             # Date and time like '06.07.2021 15:46'                                        
+            ^\d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d                            # Date and time like '06.07.2021 15:46' at the beginning of a line
             .*?\n                                                          # Anything till end of the line including a line break
             \d\d\.\d\d\.\d\d\d\d\s{1}                                      # дата обработки и 1 пробел 
             (?=\d{3,8}|-)                                                  # код авторизации либо "-". Код авторизациии который я видел всегда состоит и 6 цифр, но на всякий случай укажим с 3 до 8
@@ -125,7 +130,7 @@ class SBER_PAYMENT_2208(Extractor):
              \d\d\.\d\d\.\d\d\d\d\s{1}\d\d:\d\d|                           # Либо до начала новой страницы
               Реквизиты\sдля\sперевода)                                    # Либо да конца выписки
             """,
-                                        self.pdf_text, re.VERBOSE)
+                                        self.get_entries_text(), re.VERBOSE | re.MULTILINE)
 
         if len(individual_entries) == 0:
             raise exceptions.InputFileStructureError(
@@ -142,7 +147,7 @@ class SBER_PAYMENT_2208(Extractor):
         If something unexpected is found, exception exceptions.InputFileStructureError() is raised
         Naming of the dictionary keys is not hard fixed, but shall correspond to what is returned by the function get_columns_info(self)
 
-        All numerical fields shall be returned as float
+        All money fields shall be returned as strings with the actual sign (see utils.get_signed_money())
 
         All dates / dates and times shall be returned as python datetime.datetime
 
@@ -200,8 +205,8 @@ class SBER_PAYMENT_2208(Extractor):
         result['operation_date'] = datetime.strptime(result['operation_date'], '%d.%m.%Y %H:%M')
 
         result['description'] = line_parts[2]
-        result['value_account_currency'] = get_float_from_money(line_parts[3])
-        result['remainder_account_currency'] = get_float_from_money(line_parts[4])
+        result['value_account_currency'] = get_signed_money(line_parts[3])
+        result['remainder_account_currency'] = get_signed_money(line_parts[4])
 
         # ************** looking at the 2nd line
         line_parts = split_Sberbank_line(lines[1])
@@ -225,7 +230,7 @@ class SBER_PAYMENT_2208(Extractor):
             found = re.search(r'(.*?)\s(\S*)',
                               line_parts[3])  # processing string like '6,79 €'
             if found:
-                result['value_operational_currency'] = get_float_from_money(found.group(1))
+                result['value_operational_currency'] = get_signed_money(found.group(1))
                 result['operational_currency'] = found.group(2)
             else:
                 raise exceptions.InputFileStructureError(
@@ -248,6 +253,9 @@ class SBER_PAYMENT_2208(Extractor):
         """
         return 'value_account_currency'
 
+    def get_column_name_for_running_balance(self)->str:
+        return 'remainder_account_currency'
+
     def get_columns_info(self)->dict:
         """
         Returns full column names in the order and in the form they shall appear in Excel
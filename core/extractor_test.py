@@ -0,0 +1,70 @@
+import extractor
+import extractors
+import statement_generator
+
+
+def test_lines_are_classified_once_into_blocks():
+    text = statement_generator.generate_statement_text("SBER_DEBIT_2107", 100, seed=4)
+    statement_extractor = extractors.get_extractor("SBER_DEBIT_2107")(text)
+
+    balance_text = statement_extractor.get_balance_text()
+    assert balance_text.startswith("ОСТАТОК НА") and balance_text.count("\n") == 2
+
+    furniture_text = statement_extractor.get_furniture_text()
+    assert "Выписка по счёту дебетовой карты" in furniture_text
+    assert "Страница 1" in furniture_text
+    assert extractor.TRAILER_START in furniture_text
+
+    entries_text = statement_extractor.get_entries_text()
+    assert "Страница" not in entries_text
+    # only the line after the last transaction is kept, so that the last transaction ends as in the whole text
+    assert entries_text.count(extractor.PAGE_CONTINUATION) == 1
+    assert entries_text.endswith(extractor.PAGE_CONTINUATION + "\n")
+    assert len(entries_text) < len(text)
+
+    # every line of the text is in exactly one of the kinds
+    all_kinds = (extractor.LINE_HEADER, extractor.LINE_BALANCE, extractor.LINE_TRANSACTION,
+                 extractor.LINE_PAGE_FURNITURE, extractor.LINE_TRAILER)
+    assert statement_extractor.get_lines_text(*all_kinds) == statement_extractor.pdf_text
+
+
+def test_signatures_are_not_searched_in_transactions():
+    text = ("Выписка по счёту дебетовой карты\n"
+            "СУММА ПОПОЛНЕНИЙ\t0,00\n"
+            "СУММА СПИСАНИЙ\t100,00\n"
+            "\n"
+            "26.07.2019 02:04\tПЕРЕВОД В СБЕРБАНК\t100,00\t-100,00\n"
+            "05.08.2019 / -\tПрочие операции\n"
+            "Продолжение на следующей странице\n"
+            "Страница 2\n"
+            "26.07.2019 03:04\tПЕРЕВОД\t100,00\t-200,00\n"
+            "05.08.2019 / -\tПрочие операции\n"
+            "Реквизиты для перевода\n")
+
+    statement_extractor = extractors.get_extractor("SBER_DEBIT_2005")(text)
+
+    assert statement_extractor.get_period_balance() == -10000
+    assert len(statement_extractor.split_text_on_entries()) == 2
+    assert not statement_extractor.check_support()
+
+    statement_extractor = extractors.get_extractor("SBER_DEBIT_2005")(text.replace("Страница 2", "ПАО Сбербанк. Страница 2"))
+    assert statement_extractor.check_support()
+
+
+def test_repeated_entry_is_found_at_its_own_position():
+    text = statement_generator.generate_statement_text("SBER_DEBIT_2107", 30, seed=2)
+    statement_extractor = extractors.get_extractor("SBER_DEBIT_2107")(text)
+    entries = statement_extractor.split_text_on_entries()
+
+    # the same transaction twice in a row
+    first_line = entries[10].strip('\n').split('\n', 1)[0]
+    text = text.replace(entries[10], entries[10] + entries[10], 1)
+    statement_extractor = extractors.get_extractor("SBER_DEBIT_2107")(text)
+    entries = statement_extractor.split_text_on_entries()
+
+    first_position = statement_extractor.find_entry_in_text(entries, 10)
+    second_position = statement_extractor.find_entry_in_text(entries, 11)
+
+    assert text[first_position:].startswith(first_line)
+    assert second_position == text.find(first_line, first_position + 1)
+    assert statement_extractor.find_entry_in_text(entries, 12) > second_position
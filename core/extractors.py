@@ -1,26 +1,50 @@
 """
 This module lists all extractor calsses available
 It shall be edited with every new extractor class created
+
+Extractor modules are imported only when an extractor class is actually needed,
+so that e.g. the list of format names for the command line does not cost any imports
 """
 
-extractors_list = []
+import importlib
+
+# name of the extractor class : name of the module, where it is defined
+extractors_modules = {}
 
-from extractor_SBER_DEBIT_2107 import SBER_DEBIT_2107
-extractors_list.append(SBER_DEBIT_2107)
+extractors_modules['SBER_DEBIT_2107'] = 'extractor_SBER_DEBIT_2107'
 
-from extractor_SBER_DEBIT_2005 import SBER_DEBIT_2005
-extractors_list.append(SBER_DEBIT_2005)
+extractors_modules['SBER_DEBIT_2005'] = 'extractor_SBER_DEBIT_2005'
 
-from extractor_SBER_CREDIT_2110 import SBER_CREDIT_2107
-extractors_list.append(SBER_CREDIT_2107)
+extractors_modules['SBER_CREDIT_2107'] = 'extractor_SBER_CREDIT_2110'
 
-# from core.extractor_SBER_DEBIT_2111_VISA_draft import  SBER_DEBIT_2111_VISA
-# extractors_list.append(SBER_DEBIT_2111_VISA)
+# extractors_modules['SBER_DEBIT_2111_VISA'] = 'extractor_SBER_DEBIT_2111_VISA_draft'
 
-from extractor_SBER_PAYMENT_2208 import SBER_PAYMENT_2208
-extractors_list.append(SBER_PAYMENT_2208)
+extractors_modules['SBER_PAYMENT_2208'] = 'extractor_SBER_PAYMENT_2208'
 
 
 def get_list_extractors_in_text():
-    return [extractor.__name__ for extractor in extractors_list]
+    return list(extractors_modules.keys())
+
+
+def get_extractor(extractor_name:str) -> type:
+    """
+    Imports the module of the extractor and returns the extractor class with the name extractor_name
+    """
+    module = importlib.import_module(extractors_modules[extractor_name])
+    return getattr(module, extractor_name)
+
+
+def get_extractors_list() -> list:
+    """
+    Returns all extractor classes. Imports all extractor modules
+    """
+    return [get_extractor(extractor_name) for extractor_name in extractors_modules]
+
+
+def __getattr__(name):
+    # extractors_list used to be a module level list of all extractor classes. It is still available, but is built
+    # only when it is actually accessed
+    if name == 'extractors_list':
+        return get_extractors_list()
 
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
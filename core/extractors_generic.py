@@ -4,11 +4,17 @@ Code, generic for extractors functionality
 import logging
 from pprint import pprint
 
-from extractors import extractors_list
+import extractors
 import exceptions
 
 from extractor import Extractor
 
+def get_supported_extractors(pdf_text:str) -> list:
+    """
+    Returns classes of all extractors, which support the text (see Extractor.check_support())
+    """
+    return [extractor for extractor in extractors.get_extractors_list() if extractor(pdf_text).check_support()]
+
 def determine_extractor_auto(pdf_text:str) -> type:
     """
     Function determines which extractor to use with this particular text representation of PDF extract
@@ -18,9 +24,7 @@ def determine_extractor_auto(pdf_text:str) -> type:
     returns:
         reference to a calss of a supported extractor
     """
-    global extractors_list # type list[Extractor]
-
-    supported_extractors = [extractor for extractor in extractors_list if extractor(pdf_text).check_support()]
+    supported_extractors = get_supported_extractors(pdf_text)
 
     if len(supported_extractors) == 0:
         raise exceptions.InputFileStructureError("Неизвecтный формат выписки, ни один из экстракторов не подходят")
@@ -36,15 +40,10 @@ def determine_extractor_by_name(extractor_name:str) -> type:
     Checks if the is an Extractor class available, which has a name, iqual to the 'extractor_name' string
     If such extractor is available, then this class is returned, otherwise an exception is raised
     """
-    extractor_names_set = set()
-
-    global extractors_list # type list[Extractor]
-
-    for extractor in extractors_list:
-        if extractor.__name__ == extractor_name:
-            return extractor
+    if extractor_name in extractors.extractors_modules:
+        return extractors.get_extractor(extractor_name)
 
-        extractor_names_set.add(extractor.__name__ )
+    extractor_names_set = set(extractors.get_list_extractors_in_text())
 
     raise exceptions.UserInputError(f'Указанный формат файла "{extractor_name}" Неизвестен.\n См. смписок известных форматов \n {extractor_names_set}')
 
@@ -103,7 +102,7 @@ Some wrong text, which cannot be correct
     print("Testing 'get_period_balance()'")
     print("Cheking on file, which shall work. If code continues, everything is OK")
     print(f"period_balance = {extractor.get_period_balance()}")
-    assert isinstance(extractor.get_period_balance(), float)
+    assert isinstance(extractor.get_period_balance(), int)
 
     print("Cheking on file, which shall NOT work. If code continues, everything is OK")
     try:
@@ -0,0 +1,21 @@
+import os
+import sys
+import subprocess
+
+import extractors
+
+
+def test_extractor_names_are_available_without_importing_extractors():
+    snippet = ("import sys, extractors; "
+               "extractors.get_list_extractors_in_text(); "
+               "print(any(name.startswith('extractor_') for name in sys.modules))")
+
+    completed = subprocess.run([sys.executable, '-c', snippet], cwd=os.path.dirname(os.path.abspath(extractors.__file__)),
+                               check=True, capture_output=True, text=True)
+
+    assert completed.stdout.strip() == 'False'
+
+
+def test_get_extractor_returns_class_with_the_requested_name():
+    for extractor_name in extractors.get_list_extractors_in_text():
+        assert extractors.get_extractor(extractor_name).__name__ == extractor_name
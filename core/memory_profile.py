@@ -0,0 +1,156 @@
+"""
+Замер памяти по этапам конвертации (ключ --memory-profile, бенчмарк benchmark_memory.py)
+
+Внутри блока memory_profile.collect() для всех этапов, обёрнутых в memory_profile.measure(), записывается:
+    peak        пиковая память, выделенная Python во время этапа, сверх памяти, занятой до его начала (tracemalloc)
+    retained    память, которая осталась занятой после окончания этапа (например созданный dataframe)
+    max_rss     пиковый размер процесса в памяти (RSS) на момент окончания этапа. Только там, где есть модуль
+                resource (Linux, macOS), на Windows - None
+
+Если этап выполняется несколько раз, то берётся максимальный peak и сумма retained.
+Вне блока memory_profile.collect() memory_profile.measure() ничего не делает. tracemalloc заметно замедляет
+конвертацию, поэтому память замеряется только по запросу.
+
+Этапы:
+    text_extraction         конвертация PDF в текст и чтение текстового файла
+    extractor_construction  определение формата выписки, создание экстрактора, чтение баланса из шапки
+    entry_list              разбор текста в список трансакций (entries)
+    dataframe               создание dataframe и приведение к компактным типам
+    writer                  запись результата. Для jsonl включает в себя и разбор трансакций (entries)
+    total                   вся конвертация
+
+Бюджеты памяти (байт на трансакцию) для этапов задаются в DEFAULT_BUDGETS и проверяются функцией check_budgets()
+Общая с timings.py часть (collect, measure, add_counts) находится в stage_collector.py
+"""
+
+import sys
+import contextlib
+import tracemalloc
+from typing import Union, List
+
+import stage_collector
+
+try:
+    import resource
+except ImportError:
+    # there is no resource module on Windows
+    resource = None
+
+
+# stage name : maximum peak memory in bytes per transaction. They are meant for big statements (tens of thousands
+# of transactions), on small ones memory, which does not depend on the amount of transactions, prevails
+DEFAULT_BUDGETS = {"text_extraction": 4_000,
+                   "extractor_construction": 1_500,
+                   "entry_list": 3_000,
+                   "dataframe": 1_000,
+                   "writer": 4_000,
+                   "total": 8_000}
+
+
+def _get_max_rss() -> Union[int, None]:
+    """
+    Peak resident set size of the process in bytes or None, if it can not be determined
+    """
+    if resource is None:
+        return None
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # on macOS ru_maxrss is in bytes, on Linux in kilobytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+class MemoryProfile(stage_collector.StageCollection):
+    """
+    Peak and retained memory, peak RSS, amount of calls and item counts per stage
+    """
+
+    def __init__(self):
+        super().__init__()
+        # stages, which are measured right now: [{"start": int, "peak": int}, ...], the innermost is the last one
+        self._open_stages = []
+
+    def _new_stage(self) -> dict:
+        return {"peak": 0, "retained": 0, "max_rss": None}
+
+    def _update_open_stages_peak(self) -> None:
+        """
+        tracemalloc has only one peak for the whole process, which is reset at the start of every stage.
+        Before the reset the peak is saved to all stages, which are measured right now, so that nested stages
+        do not hide the peak from the outer ones
+        """
+        traced_peak = tracemalloc.get_traced_memory()[1]
+        for open_stage in self._open_stages:
+            open_stage["peak"] = max(open_stage["peak"], traced_peak)
+
+    def start_stage(self) -> dict:
+        self._update_open_stages_peak()
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        self._open_stages.append({"start": current, "peak": current})
+        return self._open_stages[-1]
+
+    def finish_stage(self, stage_name:str, state:dict, **counts) -> None:
+        self._update_open_stages_peak()
+        self._open_stages.pop()
+
+        stage = self._get_stage(stage_name)
+        stage["peak"] = max(stage["peak"], state["peak"] - state["start"])
+        stage["retained"] += tracemalloc.get_traced_memory()[0] - state["start"]
+        stage["max_rss"] = _get_max_rss()
+        super().finish_stage(stage_name, state, **counts)
+
+    def get_qnt_entries(self) -> int:
+        """
+        Amount of converted transactions: they are counted either in the stage entry_list or in the stage writer (jsonl)
+        """
+        return max(self.stages.get(stage_name, {}).get("counts", {}).get("entries", 0)
+                   for stage_name in ("entry_list", "writer"))
+
+
+_collector = stage_collector.StageCollector("active_memory_profile", MemoryProfile)
+
+measure = _collector.measure
+add_counts = _collector.add_counts
+print_json = stage_collector.print_json
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Collects memory usage of all stages, measured within this block. The whole block is recorded as stage 'total'.
+    tracemalloc is started, if it is not started yet, and stopped at the end
+    """
+    started_here = not tracemalloc.is_tracing()
+    if started_here:
+        tracemalloc.start()
+
+    try:
+        with _collector.collect() as profile:
+            yield profile
+    finally:
+        if started_here:
+            tracemalloc.stop()
+
+
+def check_budgets(profile:MemoryProfile, budgets:Union[dict, None] = None) -> List[str]:
+    """
+    Compares peak memory of every stage per transaction with budgets (stage name : bytes per transaction).
+    Returns descriptions of the stages, which exceeded their budgets
+    """
+    if budgets is None:
+        budgets = DEFAULT_BUDGETS
+
+    qnt_entries = profile.get_qnt_entries()
+    if not qnt_entries:
+        return []
+
+    violations = []
+    for stage_name, budget in budgets.items():
+        if stage_name not in profile.stages:
+            continue
+
+        bytes_per_entry = profile.stages[stage_name]["peak"] / qnt_entries
+        if bytes_per_entry > budget:
+            violations.append(f"Этап {stage_name}: {bytes_per_entry:,.0f} байт на трансакцию при бюджете {budget:,}")
+
+    return violations
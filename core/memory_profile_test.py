@@ -0,0 +1,35 @@
+import memory_profile
+import statement_generator
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel
+
+
+def test_nested_stage_peak_is_included_in_the_outer_stage():
+    with memory_profile.measure("outside"):
+        pass
+
+    with memory_profile.collect() as profile:
+        with memory_profile.measure("outer"):
+            with memory_profile.measure("inner"):
+                data = bytearray(10 * 1024 * 1024)
+                del data
+            retained = bytearray(1024 * 1024)
+
+    assert set(profile.stages) == {"outer", "inner", "total"}
+    assert profile.stages["inner"]["peak"] >= 10 * 1024 * 1024
+    assert profile.stages["inner"]["retained"] < 1024 * 1024
+    assert profile.stages["outer"]["peak"] >= 10 * 1024 * 1024
+    assert profile.stages["outer"]["retained"] >= 1024 * 1024
+
+
+def test_stages_of_conversion_and_budgets(tmp_path):
+    input_file_name = str(tmp_path / "statement.txt")
+    statement_generator.write_statement(input_file_name, "SBER_DEBIT_2107", 200)
+
+    with memory_profile.collect() as profile:
+        sberbankPDFtext2Excel(input_file_name, output_file_type="csv")
+
+    assert {"text_extraction", "extractor_construction", "entry_list", "dataframe", "writer", "total"} <= set(profile.stages)
+    assert profile.get_qnt_entries() == 200
+
+    assert memory_profile.check_budgets(profile, {"entry_list": 10 ** 9}) == []
+    assert len(memory_profile.check_budgets(profile, {"entry_list": 1, "writer": 1})) == 2
@@ -7,21 +7,60 @@ The issue it works around is described here: https://github.com/pdfminer/pdfmine
 Usage:
 ======
 
-from command line: py pdf2txtev.py <pdf_file_name> [<Excel_file_name>]
+from command line: py pdf2txtev.py <pdf_file_name> [<Excel_file_name>] [--rows] [--geometry]
     where:
         pdf_file_name - file name of the PDF file to be converted
         Excel_file_name - optional name of the resulting Excel file
+        --rows - create a JSONL file with table rows (see below) instead of a text file
+        --geometry - save layout geometry (see below) next to the text file
+    or: py pdf2txtev.py --replay <geometry_file_name> [<txt_file_name>] - rebuild the text file from the layout geometry
 
 as a module programmaticatty:
       pdf_2_text - to get text as an output
       pdf_2_txt_file - to convert pdf to text
+      iter_pages_text - to get text page by page
+      pdf_2_table_rows - to get table rows as an output
+      pdf_2_table_rows_file - to convert pdf to a JSONL file with table rows
+      replay_geometry - to get text from the saved layout geometry
+
+Table rows (structured mode)
+============================
+Instead of flattening text boxes of a line to a tab separated string, every line of the page can be returned as
+a TableRow record with the page number, y position and texts, assigned to the columns of the table of transactions.
+The x boundaries of the columns are detected from the header row of the table (the row, which starts with
+TABLE_HEADER_START) and are the middles of the gaps between the header cells. A text box belongs to the column,
+in which its horizontal middle is, so that both left and right aligned cells are assigned correctly. Rows after
+the header row are rows of the table till the row, which starts with one of TABLE_END_STARTS. The second line of
+the header (TABLE_HEADER_CONTINUATION_START) is not a row of the table. Rows above the header are not rows of the table.
+The header is repeated on every page of the statement, if a page does not have it, the columns of the previous page are
+used from the top of the page.
+
+Layout parameters
+=================
+Text boxes are produced by pdfminer with LAParams. By default small char_margin and line_margin are used, so that
+every cell of the table is a separate box, and boxes_flow=None turns off the advanced layout analysis, which is not
+needed, as lines are built from coordinates of boxes. Extractors may declare other parameters (Extractor.layout_params),
+which are merged with DEFAULT_LAYOUT_PARAMS by get_laparams(). They are found by tune_layout_params.py
+
+Layout geometry
+===============
+pdf_2_text and pdf_2_txt_file can save the geometry of all text boxes (page, bbox and text) to a compact columnar
+file (numpy .npz, GEOMETRY_FILE_EXTENSION) next to the text file. replay_geometry() rebuilds the text from this file
+with the same row assembly as pdf_2_text, but without pdfminer, in milliseconds. Therefore changes of the row
+assembly or of separators can be checked on the whole corpus of statements without parsing PDFs again
+(see replay_layout_geometry.py). The file does not depend on the row assembly, but depends on LAParams,
+which are saved in it too.
 """
 
 
 import os
 import sys
+import json
+import bisect
+import itertools
+import argparse
 
-from typing import List, Union
+from typing import Iterator, List, Union
 
 from pdfminer.converter import PDFPageAggregator
 from pdfminer.layout import LAParams
@@ -29,6 +68,71 @@ from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
 from pdfminer.pdfpage import PDFPage
 from pdfminer.utils import open_filename
 from pdfminer.layout import LTTextBoxHorizontal
+from pdfminer.pdfparser import PDFParser
+from pdfminer.pdfdocument import PDFDocument
+from pdfminer.pdftypes import resolve1
+
+import progress_events
+import timings
+
+# keyword arguments of LAParams, with which statements are converted, if an extractor does not declare its own ones
+DEFAULT_LAYOUT_PARAMS = {"char_margin": 0.001, "line_margin": 0.001, "boxes_flow": None}
+
+# extension of the file with the layout geometry, which replaces .pdf
+GEOMETRY_FILE_EXTENSION = ".geometry.npz"
+GEOMETRY_FORMAT_VERSION = 1
+
+# the first cell of the header row of the table of transactions
+TABLE_HEADER_START = 'ДАТА ОПЕРАЦИИ'
+
+# the first cell of the second line of the header of the table
+TABLE_HEADER_CONTINUATION_START = 'Дата обработки и код авторизации'
+
+# rows, which start with these texts, end the table of transactions on the page
+TABLE_END_STARTS = ('Продолжение на следующей странице', 'Реквизиты для перевода')
+
+
+class TableRow:
+    """
+    Line of a page as a structured record (see "Table rows" in the module description)
+
+    page - number of the page, starting from 1
+    y - top of the line in points from the bottom of the page
+    cells - for rows of the table: text of every column of the table ('' if the column is empty in this row),
+            several text boxes in one column are joined with a space.
+            For other rows (headers, page furniture): texts of all text boxes of the line from left to right
+    in_table - True for rows of the table of transactions
+    """
+
+    def __init__(self, page:int, y:float, cells:List[str], in_table:bool):
+        self.page = page
+        self.y = y
+        self.cells = cells
+        self.in_table = in_table
+
+    def to_dict(self) -> dict:
+        return {"page": self.page, "y": round(self.y, 2), "cells": self.cells, "in_table": self.in_table}
+
+    def __repr__(self) -> str:
+        return f"TableRow({self.page}, {self.y:.2f}, {self.cells!r}, {self.in_table})"
+
+
+class GeometryBox:
+    """
+    Text box, restored from the layout geometry. It has the same attributes, which are taken from LTTextBoxHorizontal
+    to assemble rows, so it can be used instead of it
+    """
+    __slots__ = ("x0", "y0", "x1", "y1", "text")
+
+    def __init__(self, x0:float, y0:float, x1:float, y1:float, text:str):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.text = text
+
+    def get_text(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"GeometryBox({self.x0}, {self.y0}, {self.x1}, {self.y1}, {self.text!r})"
 
 
 def _list_LTTextBoxHorizontal_2_matrix(list_LTTextBoxHorizontal:List[LTTextBoxHorizontal])\
@@ -95,27 +199,150 @@ def _matrix_2_txt(matrix:List[List[LTTextBoxHorizontal]], separator = "\t")->str
     return result
 
 
-def _PDFpage2txt(page:PDFPage, laparams = None) -> str:
+def _get_column_boundaries(header_row:List[LTTextBoxHorizontal]) -> List[float]:
     """
-    Converting PDFPage to text
+    Returns x coordinates of the left boundaries of all columns except the first one:
+    the middles of the gaps between the cells of the header row
+    """
+    return [(previous_box.x1 + box.x0) / 2 for previous_box, box in zip(header_row, header_row[1:])]
+
+
+def _row_2_cells(row:List[LTTextBoxHorizontal], column_boundaries:List[float]) -> List[str]:
+    """
+    Assigns text boxes of the row (sorted by x) to the columns by the horizontal middle of every box
+    """
+    cells = [[] for _ in range(len(column_boundaries) + 1)]
+    for box in row:
+        cells[bisect.bisect_right(column_boundaries, (box.x0 + box.x1) / 2)].append(box.get_text().strip())
+
+    return [' '.join(cell) for cell in cells]
+
+
+def _matrix_2_table_rows(matrix:List[List[LTTextBoxHorizontal]],
+                         page_number:int,
+                         column_boundaries:Union[List[float], None]) -> tuple:
+    """
+    Converts a matrix of elements LTTextBoxHorizontal of a page to TableRow records.
+    column_boundaries - boundaries of the columns, found on the previous pages (None if not found yet)
+    Returns (list of TableRow, boundaries of the columns to be used on the next page)
+    """
+    rows = []
+
+    # without a header on the page the table continues from the top of the page with the columns of the previous page
+    has_header = any(row[0].get_text().strip().startswith(TABLE_HEADER_START) for row in matrix)
+    in_table = not has_header and column_boundaries is not None
+    previous_row_is_header = False
+
+    for row in matrix:
+        first_text = row[0].get_text().strip()
+        is_header = False
+
+        if first_text.startswith(TABLE_HEADER_START):
+            column_boundaries = _get_column_boundaries(row)
+            in_table = is_header = True
+
+        elif first_text.startswith(TABLE_END_STARTS):
+            in_table = False
+
+        elif previous_row_is_header and first_text.startswith(TABLE_HEADER_CONTINUATION_START):
+            is_header = True
+
+        is_table_row = in_table and not is_header
+        previous_row_is_header = is_header
+
+        cells = _row_2_cells(row, column_boundaries) if is_table_row else [box.get_text().strip() for box in row]
+        rows.append(TableRow(page_number, max(box.y1 for box in row), cells, is_table_row))
+
+    return rows, column_boundaries
+
+
+def get_laparams(layout_params:Union[dict, None] = None) -> LAParams:
+    """
+    LAParams with DEFAULT_LAYOUT_PARAMS, overridden by layout_params (keyword arguments of LAParams,
+    e.g. Extractor.layout_params)
+    """
+    return LAParams(**{**DEFAULT_LAYOUT_PARAMS, **(layout_params or {})})
+
+
+def _PDFpage2LTTextBoxHorizontal_list(page:PDFPage, laparams = None) -> List[LTTextBoxHorizontal]:
+    """
+    Getting layout of the PDFPage and returning LTTextBoxHorizontal elements of it
     """
     if laparams is None:
-        laparams = LAParams(char_margin=0.001, line_margin=0.001, boxes_flow=None)
+        laparams = get_laparams()
 
     # Some preparations to get layout
     resource_manager = PDFResourceManager()
     device = PDFPageAggregator(resource_manager, laparams=laparams)
     interpreter = PDFPageInterpreter(resource_manager, device)
-    interpreter.process_page(page)
-    layout = device.get_result()
+    with timings.measure("pdf_interpretation", pages=1):
+        interpreter.process_page(page)
+        layout = device.get_result()
 
     # Creating a list of LTTextBoxHorizontal elements of the page, filtering all other elements out
-    list_LTTextBoxHorizontal = [element for element in layout if isinstance(element, LTTextBoxHorizontal)]
+    return [element for element in layout if isinstance(element, LTTextBoxHorizontal)]
+
+
+def _PDFpage2txt(page:PDFPage, laparams = None) -> str:
+    """
+    Converting PDFPage to text
+    """
+    return _LTTextBoxHorizontal_list_2_txt(_PDFpage2LTTextBoxHorizontal_list(page, laparams))
+
+
+def _LTTextBoxHorizontal_list_2_txt(list_LTTextBoxHorizontal:List[LTTextBoxHorizontal]) -> str:
+    """
+    Converting text boxes of a page (LTTextBoxHorizontal or GeometryBox) to text
+    """
+    with timings.measure("layout_to_matrix", boxes=len(list_LTTextBoxHorizontal)):
+        # converting list of LTTextBoxHorizontal to a 2-dimentional matrix
+        matrix_of_LTTextBoxHorizontal = _list_LTTextBoxHorizontal_2_matrix(list_LTTextBoxHorizontal)
+
+        return(_matrix_2_txt(matrix_of_LTTextBoxHorizontal))
+
+
+def _iter_pages_LTTextBoxHorizontal(pdf_file_name:str,
+                                    password='',
+                                    page_numbers=None,
+                                    maxpages=0,
+                                    caching=True,
+                                    laparams=None,
+                                    progress_callback:progress_events.ProgressCallback=None) -> Iterator[List[LTTextBoxHorizontal]]:
+    """
+    Yields a list of LTTextBoxHorizontal elements for every page and emits progress events after every page
+    """
+    total_pages = None
+    if progress_callback is not None:
+        total_pages = get_qnt_pages(pdf_file_name, password, page_numbers, maxpages)
+
+    with open_filename(pdf_file_name, "rb") as pdf_file_object:
+        for page_index, page in enumerate(PDFPage.get_pages(pdf_file_object,
+                                                            page_numbers,
+                                                            maxpages=maxpages,
+                                                            password=password,
+                                                            caching=caching,
+        )):
+            yield _PDFpage2LTTextBoxHorizontal_list(page, laparams)
+
+            progress_events.emit(progress_callback, progress_events.EVENT_PAGE_LAID_OUT,
+                                 page=page_index + 1, total_pages=total_pages)
+
+
+def get_qnt_pages(pdf_file_name:str, password='', page_numbers=None, maxpages=0)->int:
+    """
+    Returns amount of pages, which will be converted with the given page_numbers and maxpages
+    """
+    with open_filename(pdf_file_name, "rb") as pdf_file_object:
+        document = PDFDocument(PDFParser(pdf_file_object), password=password)
+        qnt_pages = resolve1(document.catalog['Pages'])['Count']
 
-    # converting list of LTTextBoxHorizontal to a 2-dimentional matrix
-    matrix_of_LTTextBoxHorizontal = _list_LTTextBoxHorizontal_2_matrix(list_LTTextBoxHorizontal)
+    if page_numbers is not None:
+        qnt_pages = len([page_number for page_number in page_numbers if page_number < qnt_pages])
 
-    return(_matrix_2_txt(matrix_of_LTTextBoxHorizontal))
+    if maxpages:
+        qnt_pages = min(qnt_pages, maxpages)
+
+    return qnt_pages
 
 
 def pdf_2_text(pdf_file_name:str,
@@ -123,7 +350,9 @@ def pdf_2_text(pdf_file_name:str,
                page_numbers=None,
                maxpages=0,
                caching=True,
-               laparams=None)->str:
+               laparams=None,
+               progress_callback:progress_events.ProgressCallback=None,
+               geometry_file_name:Union[str, None]=None)->str:
     """
     This is a re-write of the function pdfminer.high_level.extract_text
     https://github.com/pdfminer/pdfminer.six/blob/0b44f7771462363528c109f263276eb254c4fcd0/pdfminer/high_level.py#L90
@@ -133,28 +362,197 @@ def pdf_2_text(pdf_file_name:str,
     : password: For encrypted PDFs, the password to decrypt.
     : page_numbers: zero-indexed page numbers to operate on
     : maxpages: How many pages to stop parsing after
-    :
+    : laparams: pdfminer.layout.LAParams. If None - get_laparams() with DEFAULT_LAYOUT_PARAMS
+    : progress_callback: function, which receives progress events (see progress_events.py) after every page
+    : geometry_file_name: if given, the layout geometry of all pages is saved to this file (see write_geometry())
     """
-    result = ""
-    with open_filename(pdf_file_name, "rb") as pdf_file_object:
-        for page in PDFPage.get_pages(pdf_file_object,
-                                      page_numbers,
-                                      maxpages=maxpages,
-                                      password=password,
-                                      caching=caching,
-        ):
-            result = result + _PDFpage2txt(page, laparams)
+    if laparams is None:
+        laparams = get_laparams()
+
+    # boxes of all pages as GeometryBox, only if the geometry is saved
+    pages_geometry = [] if geometry_file_name else None
+
+    result = "".join(iter_pages_text(pdf_file_name, password, page_numbers, maxpages, caching, laparams,
+                                     progress_callback, pages_geometry))
+
+    if pages_geometry is not None:
+        write_geometry(geometry_file_name, pages_geometry, laparams)
 
     return result
 
 
+def iter_pages_text(pdf_file_name:str,
+                    password='',
+                    page_numbers=None,
+                    maxpages=0,
+                    caching=True,
+                    laparams=None,
+                    progress_callback:progress_events.ProgressCallback=None,
+                    pages_geometry:Union[list, None]=None) -> Iterator[str]:
+    """
+    Yields the text of every page, as soon as the page is laid out, so that the caller can look at the first pages
+    (e.g. to determine the format of the statement) before the other pages are laid out, and continue without
+    laying them out again. Arguments are the same as in pdf_2_text
+    : pages_geometry: if it is a list, list of GeometryBox of every page is appended to it
+    """
+    if laparams is None:
+        laparams = get_laparams()
+
+    total_pages = None
+    if progress_callback is not None:
+        total_pages = get_qnt_pages(pdf_file_name, password, page_numbers, maxpages)
+
+    with open_filename(pdf_file_name, "rb") as pdf_file_object:
+        for page_index, page in enumerate(PDFPage.get_pages(pdf_file_object,
+                                                            page_numbers,
+                                                            maxpages=maxpages,
+                                                            password=password,
+                                                            caching=caching,
+        )):
+            list_LTTextBoxHorizontal = _PDFpage2LTTextBoxHorizontal_list(page, laparams)
+            if pages_geometry is not None:
+                pages_geometry.append([GeometryBox(box.x0, box.y0, box.x1, box.y1, box.get_text())
+                                       for box in list_LTTextBoxHorizontal])
+
+            page_text = _LTTextBoxHorizontal_list_2_txt(list_LTTextBoxHorizontal)
+
+            progress_events.emit(progress_callback, progress_events.EVENT_PAGE_LAID_OUT,
+                                 page=page_index + 1, total_pages=total_pages)
+
+            yield page_text
+
+
+def write_geometry(geometry_file_name:str, pages_geometry:List[List[GeometryBox]], laparams:LAParams = None) -> None:
+    """
+    Saves text boxes of all pages to a compressed numpy .npz file column by column:
+        page_starts     index of the first box of every page and the amount of all boxes at the end
+        bbox            x0, y0, x1, y1 of every box
+        text_starts     offset of the text of every box in text and the length of text at the end
+        text            texts of all boxes in UTF-8 one after another
+        metadata        JSON with the format version and LAParams, with which the boxes were produced
+    """
+    # numpy is installed together with pandas, but is not needed for normal conversion
+    import numpy as np
+
+    boxes = [box for page_boxes in pages_geometry for box in page_boxes]
+    encoded_texts = [box.get_text().encode("utf-8") for box in boxes]
+    metadata = {"version": GEOMETRY_FORMAT_VERSION, "laparams": vars(laparams) if laparams is not None else None}
+
+    np.savez_compressed(geometry_file_name,
+                        page_starts=np.cumsum([0] + [len(page_boxes) for page_boxes in pages_geometry], dtype=np.int64),
+                        bbox=np.array([(box.x0, box.y0, box.x1, box.y1) for box in boxes], dtype=np.float64).reshape(-1, 4),
+                        text_starts=np.cumsum([0] + [len(text) for text in encoded_texts], dtype=np.int64),
+                        text=np.frombuffer(b"".join(encoded_texts), dtype=np.uint8),
+                        metadata=np.frombuffer(json.dumps(metadata).encode("utf-8"), dtype=np.uint8))
+
+
+def read_geometry(geometry_file_name:str) -> tuple:
+    """
+    Reads the file, created by write_geometry(). Returns (list of GeometryBox for every page, metadata)
+    """
+    import numpy as np
+
+    with np.load(geometry_file_name) as geometry:
+        metadata = json.loads(geometry["metadata"].tobytes().decode("utf-8"))
+        if metadata["version"] != GEOMETRY_FORMAT_VERSION:
+            raise ValueError(f"Unsupported version {metadata['version']} of the layout geometry file {geometry_file_name}")
+
+        page_starts = geometry["page_starts"].tolist()
+        bboxes = geometry["bbox"].tolist()
+        text_starts = geometry["text_starts"].tolist()
+        text = geometry["text"].tobytes()
+
+    boxes = [GeometryBox(*bbox, text[text_start:text_end].decode("utf-8"))
+             for bbox, text_start, text_end in zip(bboxes, text_starts, text_starts[1:])]
+
+    return [boxes[page_start:page_end] for page_start, page_end in zip(page_starts, page_starts[1:])], metadata
+
+
+def replay_geometry(geometry_file_name:str) -> str:
+    """
+    Rebuilds the text of the PDF from the layout geometry, saved by pdf_2_text, without pdfminer.
+    The result is the same as of pdf_2_text, as long as the row assembly is not changed
+    """
+    pages_geometry, _ = read_geometry(geometry_file_name)
+    return "".join(_LTTextBoxHorizontal_list_2_txt(page_boxes) for page_boxes in pages_geometry)
+
+
+def get_geometry_file_name(file_name:str) -> str:
+    """
+    Name of the layout geometry file next to the PDF or text file
+    """
+    return os.path.splitext(file_name)[0] + GEOMETRY_FILE_EXTENSION
+
+
+def pdf_2_table_rows(pdf_file_name:str,
+                     password='',
+                     page_numbers=None,
+                     maxpages=0,
+                     caching=True,
+                     laparams=None,
+                     progress_callback:progress_events.ProgressCallback=None) -> List[TableRow]:
+    """
+    Structured mode: returns all lines of all pages as TableRow records (see "Table rows" in the module description)
+    Arguments are the same as in pdf_2_text
+    """
+    rows = []
+    column_boundaries = None
+
+    # pages are returned in the order of the document, page numbers in TableRow start from 1
+    page_indexes = sorted(page_numbers) if page_numbers else itertools.count()
+
+    for page_index, list_LTTextBoxHorizontal in zip(page_indexes, _iter_pages_LTTextBoxHorizontal(pdf_file_name,
+                                                                                                  password,
+                                                                                                  page_numbers,
+                                                                                                  maxpages,
+                                                                                                  caching,
+                                                                                                  laparams,
+                                                                                                  progress_callback)):
+        page_number = page_index + 1
+        if not list_LTTextBoxHorizontal:
+            continue
+
+        with timings.measure("layout_to_table_rows", boxes=len(list_LTTextBoxHorizontal)):
+            matrix_of_LTTextBoxHorizontal = _list_LTTextBoxHorizontal_2_matrix(list_LTTextBoxHorizontal)
+            page_rows, column_boundaries = _matrix_2_table_rows(matrix_of_LTTextBoxHorizontal, page_number, column_boundaries)
+            rows.extend(page_rows)
+
+    return rows
+
+
+def pdf_2_table_rows_file(pdf_file_name:str,
+                          jsonl_output_file_name: Union[None, str] = None,
+                          password='',
+                          page_numbers=None,
+                          maxpages=0,
+                          caching=True,
+                          laparams=None,
+                          progress_callback:progress_events.ProgressCallback=None):
+    """
+    Converts pdf file to table rows and creates a JSONL file with one row per line
+    : jsonl_output_file_name - output file name. If not provided file name will be constructed by ramaning
+        *.pdf file to *.jsonl file
+    Other arguments are the same as in pdf_2_txt_file
+    """
+    if not jsonl_output_file_name:
+        jsonl_output_file_name = os.path.splitext(pdf_file_name)[0]+".jsonl"
+
+    rows = pdf_2_table_rows(pdf_file_name, password, page_numbers, maxpages, caching, laparams, progress_callback)
+
+    with open(jsonl_output_file_name, "w", encoding="utf-8") as jsonl_output_file_object:
+        for row in rows:
+            jsonl_output_file_object.write(json.dumps(row.to_dict(), ensure_ascii=False) + "\n")
+
+
 def pdf_2_txt_file(pdf_file_name:str,
                    txt_output_file_name: Union[None, str] = None,
                    password='',
                    page_numbers=None,
                    maxpages=0,
                    caching=True,
-                   laparams=None):
+                   laparams=None,
+                   progress_callback:progress_events.ProgressCallback=None,
+                   geometry_file_name:Union[str, None]=None):
     """
     Converts pdf file to text and creates a text file with this text
     : pdf_file_name - name of the input PDF file
@@ -163,6 +561,9 @@ def pdf_2_txt_file(pdf_file_name:str,
     : password: For encrypted PDFs, the password to decrypt.
     : page_numbers: zero-indexed page numbers to operate on
     : maxpages: How many pages to stop parsing after
+    : laparams: pdfminer.layout.LAParams. If None - get_laparams() with DEFAULT_LAYOUT_PARAMS
+    : progress_callback: function, which receives progress events (see progress_events.py)
+    : geometry_file_name: if given, the layout geometry is saved to this file (see get_geometry_file_name())
     """
     if not txt_output_file_name:
         txt_output_file_name = os.path.splitext(pdf_file_name)[0]+".txt"
@@ -172,24 +573,35 @@ def pdf_2_txt_file(pdf_file_name:str,
                          page_numbers,
                          maxpages,
                          caching,
-                         laparams)
+                         laparams,
+                         progress_callback,
+                         geometry_file_name)
 
     with open(txt_output_file_name,"w",encoding="utf-8") as txt_output_file_object:
         txt_output_file_object.write(pdf_text)
 
 
 def main():
-    if len(sys.argv) < 2:
-        print('Недостаточно аргументов')
-        return None
-
-    elif len(sys.argv) == 2:
-        outputFileName = None
-
-    elif len(sys.argv) == 3:
-        outputFileName = sys.argv[2]
-
-    pdf_2_txt_file(sys.argv[1], outputFileName)
+    parser = argparse.ArgumentParser(description='Конвертация PDF выписки в промежуточный текстовый файл')
+    parser.add_argument('pdf_file_name', type=str, help='PDF файл для конвертации (файл геометрии для --replay)')
+    parser.add_argument('output_file_name', type=str, nargs='?', default=None, help='Имя создаваемого файла. По умолчанию - имя PDF файла с расширением .txt (.jsonl для --rows)')
+    parser.add_argument('--rows', action='store_true', default=False, help='Создать JSONL файл со строками таблицы, разбитыми по колонкам, вместо текстового файла')
+    parser.add_argument('--geometry', action='store_true', default=False, help=f'Сохранить геометрию текстовых блоков в файл {GEOMETRY_FILE_EXTENSION} рядом с текстовым файлом')
+    parser.add_argument('--replay', action='store_true', default=False, help='Создать текстовый файл из сохранённой геометрии текстовых блоков, без разбора PDF')
+    args = parser.parse_args()
+
+    if args.replay:
+        base_name = args.pdf_file_name[:-len(GEOMETRY_FILE_EXTENSION)] if args.pdf_file_name.endswith(GEOMETRY_FILE_EXTENSION) \
+            else os.path.splitext(args.pdf_file_name)[0]
+        output_file_name = args.output_file_name or base_name + ".txt"
+        with open(output_file_name, "w", encoding="utf-8") as txt_output_file_object:
+            txt_output_file_object.write(replay_geometry(args.pdf_file_name))
+    elif args.rows:
+        pdf_2_table_rows_file(args.pdf_file_name, args.output_file_name)
+    else:
+        output_file_name = args.output_file_name or os.path.splitext(args.pdf_file_name)[0] + ".txt"
+        pdf_2_txt_file(args.pdf_file_name, output_file_name,
+                       geometry_file_name=get_geometry_file_name(output_file_name) if args.geometry else None)
 
 
 if __name__ == '__main__':
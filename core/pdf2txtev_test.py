@@ -0,0 +1,86 @@
+import re
+
+import pdf2txtev
+import statement_pdf_generator
+
+
+class _Box:
+    """
+    Text box with the same attributes, which pdf2txtev takes from LTTextBoxHorizontal
+    """
+
+    def __init__(self, text:str, x0:float, x1:float, y0:float):
+        self.text = text
+        self.x0, self.x1 = x0, x1
+        self.y0, self.y1 = y0, y0 + 8
+
+    def get_text(self) -> str:
+        return self.text + "\n"
+
+
+def test_boxes_are_assigned_to_columns_of_the_header():
+    header = [_Box("ДАТА ОПЕРАЦИИ (МСК)", 40, 120, 700), _Box("КАТЕГОРИЯ", 200, 250, 700),
+              _Box("СУММА В ВАЛЮТЕ СЧЁТА", 380, 470, 700), _Box("ОСТАТОК СРЕДСТВ", 490, 560, 700)]
+    # the amount is right aligned and starts to the left of its header, the remainder is empty
+    entry = [_Box("06.07.2021", 40, 80, 680), _Box("15:46", 85, 105, 680), _Box("Перевод с карты", 200, 270, 680),
+             _Box("1 000 000,00", 350, 470, 680)]
+    page_continuation = [_Box(pdf2txtev.TABLE_END_STARTS[0], 40, 200, 660)]
+    page_footer = [_Box("Страница 1", 40, 90, 640)]
+
+    rows, column_boundaries = pdf2txtev._matrix_2_table_rows([header, entry, page_continuation, page_footer], 1, None)
+
+    assert [row.in_table for row in rows] == [False, True, False, False]
+    assert rows[1].cells == ["06.07.2021 15:46", "Перевод с карты", "1 000 000,00", ""]
+    assert rows[1].page == 1 and rows[1].y == 688
+    assert rows[3].cells == ["Страница 1"]
+    assert len(column_boundaries) == 3
+
+
+def test_table_rows_of_a_pdf_statement(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    text = statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_DEBIT_2107", 40)
+
+    rows = pdf2txtev.pdf_2_table_rows(pdf_file_name)
+
+    # every line of the text, which the PDF was created from, is a row
+    lines = text.splitlines()
+    assert len(rows) == len(lines)
+    assert rows[0].page == 1 and rows[-1].page > 1
+    assert all(row.y > next_row.y for row, next_row in zip(rows, rows[1:]) if row.page == next_row.page)
+
+    # transactions are rows of the table on all pages, the first one included
+    table_lines = [(row, line) for row, line in zip(rows, lines) if row.in_table]
+    assert all(row.in_table for row, line in zip(rows, lines) if re.match(r'\d\d\.\d\d\.\d\d\d\d\t', line))
+    assert table_lines[0][0].page == 1
+
+    for row, line in table_lines:
+        parts = line.split('\t')
+        if len(parts) == 1:
+            # the wrapped part of the description is in the column of the description
+            expected_cells = ['', parts[0], '', '']
+        else:
+            # the date and the time (or the code of authorisation) are under 'ДАТА ОПЕРАЦИИ (МСК)'
+            expected_cells = [parts[0] + ' ' + parts[1]] + parts[2:]
+            expected_cells += [''] * (4 - len(expected_cells))
+        assert row.cells == expected_cells, line
+
+    # header, page furniture and the trailer are not rows of the table
+    assert not any(row.in_table for row, line in zip(rows, lines)
+                   if line.startswith(('ДАТА ОПЕРАЦИИ', 'Дата обработки', 'Продолжение', 'Страница', 'Реквизиты')))
+
+    # page numbers of the selected pages are the numbers of the pages in the document
+    assert {row.page for row in pdf2txtev.pdf_2_table_rows(pdf_file_name, page_numbers=[1, 2])} == {2, 3}
+
+
+def test_text_is_replayed_from_layout_geometry(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    geometry_file_name = pdf2txtev.get_geometry_file_name(pdf_file_name)
+    statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_DEBIT_2005", 40)
+
+    text = pdf2txtev.pdf_2_text(pdf_file_name, geometry_file_name=geometry_file_name)
+    pages_geometry, metadata = pdf2txtev.read_geometry(geometry_file_name)
+
+    assert geometry_file_name.endswith(pdf2txtev.GEOMETRY_FILE_EXTENSION)
+    assert len(pages_geometry) == pdf2txtev.get_qnt_pages(pdf_file_name)
+    assert metadata["laparams"]["char_margin"] == pdf2txtev.DEFAULT_LAYOUT_PARAMS["char_margin"]
+    assert pdf2txtev.replay_geometry(geometry_file_name) == text
@@ -0,0 +1,114 @@
+"""
+Профилирование конвертации (ключ --profile-out или переменная окружения SBERBANK2EXCEL_PROFILE_OUT)
+
+Конвертация каждого файла выполняется под двумя профайлерами одновременно:
+    cProfile            детерминированный профайлер. Результат записывается в <директория>/<имя файла>.pstats
+                        и просматривается модулем pstats, snakeviz и т.п.
+    сэмплирующий        поток, который каждые SAMPLING_INTERVAL секунд записывает стек вызовов конвертации.
+                        Результат записывается в <директория>/<имя файла>.collapsed в формате collapsed stacks
+                        ("функция;функция;функция количество"), который понимают flamegraph.pl, speedscope и т.п.
+
+Ключ --profile-out есть у sberbankPDF2Excel.py, sberbankPDFtext2Excel.py и sberbankPDF2ExcelBatch.py (в пакетном
+режиме профиль пишется для каждого входного файла). Для GUI, сервиса и режима наблюдения за директорией, у которых
+нет такого ключа, директория задаётся переменной окружения SBERBANK2EXCEL_PROFILE_OUT. Если не задано ни то, ни другое,
+профилирование не выполняется.
+"""
+
+import os
+import sys
+import time
+import cProfile
+import threading
+import contextlib
+import collections
+from typing import Union
+
+PROFILE_OUT_ENV_VAR = "SBERBANK2EXCEL_PROFILE_OUT"
+
+SAMPLING_INTERVAL = 0.001
+
+
+def get_profile_out(profile_out:Union[str, None] = None) -> Union[str, None]:
+    """
+    Directory for profiles: the given one or the one from the environment variable SBERBANK2EXCEL_PROFILE_OUT
+    """
+    return profile_out or os.environ.get(PROFILE_OUT_ENV_VAR) or None
+
+
+def _get_frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(";", ":").replace(" ", "_")
+
+
+class StackSampler:
+    """
+    Samples the call stack of the given thread in a background thread and counts identical stacks
+    """
+
+    def __init__(self, thread_id:int, interval:float = SAMPLING_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        # collapsed stack (names of functions from the outermost to the innermost, separated by ';') : amount of samples
+        self.stacks = collections.Counter()
+        self._stop_event = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                names.append(_get_frame_name(frame))
+                frame = frame.f_back
+
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._thread.join()
+
+    def write_collapsed(self, file_name:str) -> None:
+        with open(file_name, "w", encoding="utf-8") as collapsed_file:
+            for stack, qnt_samples in self.stacks.most_common():
+                collapsed_file.write(f"{stack} {qnt_samples}\n")
+
+
+@contextlib.contextmanager
+def profile(input_file_name:str, profile_out:Union[str, None] = None):
+    """
+    Profiles the block, if the directory for profiles is given (profile_out or SBERBANK2EXCEL_PROFILE_OUT).
+    Profiles are written to <profile_out>/<base name of input_file_name>.pstats and .collapsed
+    """
+    profile_out = get_profile_out(profile_out)
+    if profile_out is None:
+        yield
+        return
+
+    os.makedirs(profile_out, exist_ok=True)
+    output_base_name = os.path.join(profile_out, os.path.basename(input_file_name))
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+
+        profiler.dump_stats(output_base_name + ".pstats")
+        sampler.write_collapsed(output_base_name + ".collapsed")
+        print(f"Профиль конвертации записан в {output_base_name}.pstats и {output_base_name}.collapsed")
+
+
+def get_unique_name(prefix:str) -> str:
+    """
+    Name for profiles of conversions, which do not have a meaningful input file name (e.g. uploads to the service)
+    """
+    return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}_{time.perf_counter_ns()}"
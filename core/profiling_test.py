@@ -0,0 +1,39 @@
+import os
+import pstats
+
+import profiling
+import statement_generator
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel
+
+
+def test_profile_is_written_only_when_requested(tmp_path, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_OUT_ENV_VAR, raising=False)
+    input_file_name = str(tmp_path / "statement.txt")
+    statement_generator.write_statement(input_file_name, "SBER_DEBIT_2107", 2000)
+
+    with profiling.profile(input_file_name):
+        pass
+    assert sorted(os.listdir(tmp_path)) == ["statement.txt"]
+
+    profile_out = str(tmp_path / "profiles")
+    with profiling.profile(input_file_name, profile_out):
+        sberbankPDFtext2Excel(input_file_name, output_file_type="csv")
+
+    stats = pstats.Stats(os.path.join(profile_out, "statement.txt.pstats"))
+    assert any(function_name == "sberbankPDFtext2Excel" for _, _, function_name in stats.stats)
+
+    with open(os.path.join(profile_out, "statement.txt.collapsed"), encoding="utf-8") as collapsed_file:
+        lines = collapsed_file.read().splitlines()
+
+    stacks = [line.rsplit(" ", 1) for line in lines]
+    assert all(int(qnt_samples) > 0 for _, qnt_samples in stacks)
+    assert any("sberbankPDFtext2Excel.py:sberbankPDFtext2Excel;" in stack for stack, _ in stacks)
+
+
+def test_profile_out_from_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_OUT_ENV_VAR, str(tmp_path))
+
+    with profiling.profile("some/dir/request.pdf"):
+        sum(range(100000))
+
+    assert sorted(os.listdir(tmp_path)) == ["request.pdf.collapsed", "request.pdf.pstats"]
@@ -0,0 +1,68 @@
+"""
+События о ходе конвертации
+
+Функции конвертации (sberbankPDF2Excel, sberbankPDFtext2Excel, pdf2txtev.pdf_2_text) принимают необязательный
+параметр progress_callback. Это функция с одним аргументом, которая вызывается для каждого события.
+Событие - это словарь, который всегда содержит ключи "event" (тип события, см. константы ниже) и "time"
+(time.time() в момент события), а также дополнительные ключи, зависящие от типа события:
+
+    stage_started       stage
+    stage_finished      stage, duration (сек), ok (False, если этап завершился с ошибкой)
+    page_laid_out       page (номер страницы, начиная с 1), total_pages
+    extractor_detected  extractor
+    entries_decomposed  decomposed, total
+    bytes_written       file (имя файла или None для потока), bytes (None, если количество неизвестно)
+
+События содержат только простые типы, поэтому их можно передавать между процессами и сериализовать в JSON.
+Информация о том, к какому файлу относится событие, не передаётся: если нужно, её добавляет сама функция
+progress_callback (например через functools.partial)
+"""
+
+import time
+import contextlib
+from typing import Callable, Union
+
+EVENT_STAGE_STARTED = "stage_started"
+EVENT_STAGE_FINISHED = "stage_finished"
+EVENT_PAGE_LAID_OUT = "page_laid_out"
+EVENT_EXTRACTOR_DETECTED = "extractor_detected"
+EVENT_ENTRIES_DECOMPOSED = "entries_decomposed"
+EVENT_BYTES_WRITTEN = "bytes_written"
+
+STAGE_PDF_TO_TEXT = "pdf_to_text"
+STAGE_EXTRACTION = "extraction"
+STAGE_BALANCE_CHECK = "balance_check"
+STAGE_WRITING = "writing"
+
+# entries_decomposed is reported after every ENTRIES_EVENT_STEP entries (and after the last one)
+ENTRIES_EVENT_STEP = 100
+
+ProgressCallback = Union[Callable[[dict], None], None]
+
+
+def emit(progress_callback:ProgressCallback, event_type:str, **data) -> None:
+    """
+    Calls progress_callback with the event of the given type. Does nothing, if progress_callback is None
+    """
+    if progress_callback is None:
+        return
+
+    event = {"event": event_type, "time": time.time()}
+    event.update(data)
+    progress_callback(event)
+
+
+@contextlib.contextmanager
+def stage(progress_callback:ProgressCallback, stage_name:str):
+    """
+    Context manager, which reports beginning and end of the pipeline stage
+    """
+    start = time.perf_counter()
+    emit(progress_callback, EVENT_STAGE_STARTED, stage=stage_name)
+
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        emit(progress_callback, EVENT_STAGE_FINISHED, stage=stage_name, duration=time.perf_counter() - start, ok=ok)
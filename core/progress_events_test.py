@@ -0,0 +1,41 @@
+import os
+import shutil
+
+import progress_events
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel
+
+SAMPLE_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+
+def test_conversion_reports_stages_and_progress(tmp_path):
+    input_file_name = str(tmp_path / 'statement.txt')
+    shutil.copy(SAMPLE_TXT, input_file_name)
+
+    events = []
+    sberbankPDFtext2Excel(input_file_name, output_file_type='csv', progress_callback=events.append)
+
+    event_types = [event['event'] for event in events]
+    stages = [event['stage'] for event in events if event['event'] == progress_events.EVENT_STAGE_FINISHED]
+
+    assert event_types[0] == progress_events.EVENT_EXTRACTOR_DETECTED
+    assert events[0]['extractor'] == 'SBER_DEBIT_2107'
+    assert stages == [progress_events.STAGE_EXTRACTION, progress_events.STAGE_BALANCE_CHECK, progress_events.STAGE_WRITING]
+    assert all(event['ok'] for event in events if event['event'] == progress_events.EVENT_STAGE_FINISHED)
+
+    decomposed = [event for event in events if event['event'] == progress_events.EVENT_ENTRIES_DECOMPOSED]
+    assert decomposed[-1]['decomposed'] == decomposed[-1]['total'] == 4
+
+    bytes_written = [event for event in events if event['event'] == progress_events.EVENT_BYTES_WRITTEN]
+    assert bytes_written[0]['bytes'] == os.path.getsize(str(tmp_path / 'statement.csv'))
+
+
+def test_failed_stage_is_reported():
+    events = []
+    try:
+        with progress_events.stage(events.append, progress_events.STAGE_WRITING):
+            raise ValueError()
+    except ValueError:
+        pass
+
+    assert events[-1]['event'] == progress_events.EVENT_STAGE_FINISHED
+    assert events[-1]['ok'] is False
@@ -0,0 +1,105 @@
+"""
+Проверка изменений сборки строк (pdf2txtev.py) на корпусе выписок без повторного разбора PDF
+
+Геометрия текстовых блоков сохраняется один раз при конвертации корпуса:
+    py sberbankPDF2Excel.py <выписка>.pdf -i -g       (или py pdf2txtev.py <выписка>.pdf --geometry)
+рядом с промежуточным текстовым файлом <выписка>.txt появляется <выписка>.geometry.npz.
+
+После изменения сборки строк (_list_LTTextBoxHorizontal_2_matrix, _matrix_2_txt, разделителей) этот модуль
+восстанавливает текст каждой выписки из геометрии (pdf2txtev.replay_geometry) и сравнивает его с текстовым файлом
+рядом с ней, то есть с результатом до изменения. С ключом --parse восстановленный текст ещё и разбирается: определяется
+формат, выделяются трансакции и сверяется баланс. Если есть отличия или ошибки, модуль завершается с кодом 1.
+
+Usage:
+    py replay_layout_geometry.py <файлы .geometry.npz или директории> [--parse] [--diff]
+"""
+
+import os
+import sys
+import time
+import difflib
+import argparse
+from typing import List
+
+import pdf2txtev
+from sberbankPDF2ExcelBatch import get_input_files
+from extractors_generic import determine_extractor_auto
+from tune_layout_params import parse_statement
+
+# amount of lines of the diff, which are printed for every file with --diff
+MAX_DIFF_LINES = 40
+
+
+def replay_file(geometry_file_name:str, parse:bool = False) -> dict:
+    """
+    Returns {"file": ..., "seconds": time of rebuilding the text, "text": rebuilt text,
+             "reference_text": text of the text file next to the geometry file or None, "error": parsing error or None}
+    """
+    start = time.perf_counter()
+    text = pdf2txtev.replay_geometry(geometry_file_name)
+    seconds = time.perf_counter() - start
+
+    txt_file_name = geometry_file_name[:-len(pdf2txtev.GEOMETRY_FILE_EXTENSION)] + ".txt"
+    reference_text = None
+    if os.path.exists(txt_file_name):
+        with open(txt_file_name, encoding="utf-8") as txt_file:
+            reference_text = txt_file.read()
+
+    error = None
+    if parse:
+        try:
+            parse_statement(text, determine_extractor_auto(text))
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+
+    return {"file": geometry_file_name, "seconds": seconds, "text": text, "reference_text": reference_text, "error": error}
+
+
+def replay_corpus(inputs:List[str], parse:bool = False, show_diff:bool = False) -> int:
+    """
+    Replays all geometry files and prints the differences. Returns the amount of files with differences or errors
+    """
+    geometry_file_names = get_input_files(inputs, extensions=(pdf2txtev.GEOMETRY_FILE_EXTENSION,))
+    qnt_problems = 0
+    total_seconds = 0.0
+
+    for geometry_file_name in geometry_file_names:
+        result = replay_file(geometry_file_name, parse)
+        total_seconds += result["seconds"]
+
+        differs = result["reference_text"] is not None and result["reference_text"] != result["text"]
+        if differs or result["error"]:
+            qnt_problems += 1
+
+        if result["reference_text"] is None:
+            status = "нет текстового файла для сравнения"
+        else:
+            status = "ОТЛИЧАЕТСЯ" if differs else "совпадает"
+
+        if result["error"]:
+            status += f", ОШИБКА РАЗБОРА: {result['error']}"
+
+        print(f"{result['seconds'] * 1000:>8.1f} мс  {geometry_file_name}: {status}")
+
+        if show_diff and differs:
+            diff = list(difflib.unified_diff(result["reference_text"].splitlines(), result["text"].splitlines(),
+                                             "до изменения", "после изменения", lineterm=""))
+            print("\n".join(diff[:MAX_DIFF_LINES]))
+
+    print(f"Файлов: {len(geometry_file_names)}, с отличиями или ошибками: {qnt_problems}, время восстановления текста: {total_seconds:.3f} сек")
+
+    return qnt_problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка изменений сборки строк на корпусе выписок по сохранённой геометрии текстовых блоков')
+    parser.add_argument('inputs', type=str, nargs='+', help=f'Файлы {pdf2txtev.GEOMETRY_FILE_EXTENSION} или директории с ними')
+    parser.add_argument('--parse', action='store_true', default=False, help='Разобрать восстановленный текст и сверить баланс')
+    parser.add_argument('--diff', action='store_true', default=False, dest='show_diff', help='Вывести отличающиеся строки')
+    args = parser.parse_args()
+
+    return 1 if replay_corpus(args.inputs, args.parse, args.show_diff) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
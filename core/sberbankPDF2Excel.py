@@ -1,29 +1,112 @@
 import sys
 import os
-from typing import Union
+from typing import Union, TextIO
 import argparse
+import itertools
 
+import utils
 import exceptions
 import extractors
-from pdf2txtev import pdf_2_txt_file
-from sberbankPDFtext2Excel import sberbankPDFtext2Excel, genarate_PDFtext2Excel_argparser
+import progress_events
+import timings
+import memory_profile
+import profiling
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel, genarate_PDFtext2Excel_argparser, get_output_and_messages_redirection, \
+    get_timings_collection, get_memory_profile_collection
+from extractors_generic import get_supported_extractors, determine_extractor_by_name
+
+# amount of the first pages of a PDF statement, on which the format is determined before other pages are laid out
+PROBE_QNT_PAGES = 2
+
+
+def convert_pdf_to_text(input_file_name:str,
+                        txt_file_name:str,
+                        format:str = 'auto',
+                        progress_callback:progress_events.ProgressCallback = None,
+                        geometry_file_name:Union[str, None] = None) -> str:
+    """
+    Converts the PDF statement to the text file. Returns the format of the statement: the given one, the one
+    determined on the first pages or 'auto', if the first pages are supported by more than one extractor.
+
+    If the format is 'auto', the first PROBE_QNT_PAGES pages are laid out with the default layout parameters and
+    the format is determined on them. If no extractor supports them, exceptions.InputFileStructureError is raised
+    without laying out other pages. Otherwise the conversion continues from the next page: the first pages are laid
+    out again only if the extractor declares its own layout parameters (Extractor.layout_params)
+    geometry_file_name - if given, the layout geometry is saved to this file (see "Layout geometry" in pdf2txtev.py)
+    """
+    # pdfminer is imported only when a PDF file is really converted
+    from pdf2txtev import iter_pages_text, get_laparams, write_geometry
+
+    extractor_type = None if format == 'auto' else determine_extractor_by_name(format)
+
+    def start_conversion(layout_params):
+        laparams = get_laparams(layout_params)
+        pages_geometry = [] if geometry_file_name else None
+        return iter_pages_text(input_file_name, laparams=laparams, progress_callback=progress_callback,
+                               pages_geometry=pages_geometry), laparams, pages_geometry
+
+    pages_text, laparams, pages_geometry = start_conversion(extractor_type.layout_params if extractor_type else None)
+    probe_text = ""
+
+    if extractor_type is None:
+        with timings.measure("format_probe"):
+            probe_text = "".join(itertools.islice(pages_text, PROBE_QNT_PAGES))
+            supported_extractors = get_supported_extractors(probe_text)
+
+        if not supported_extractors:
+            pages_text.close()
+            # the text of the first pages is left for diagnostics, the whole text is created by pdf2txtev.py
+            with open(txt_file_name, "w", encoding="utf-8") as txt_file:
+                txt_file.write(probe_text)
+
+            raise exceptions.InputFileStructureError(f"Неизвестный формат выписки, ни один из экстракторов не подходит "
+                                                     f"к первым страницам файла ({PROBE_QNT_PAGES}). Их текст записан в {txt_file_name}, "
+                                                     f"текст всего файла можно получить командой: py pdf2txtev.py {input_file_name}")
 
+        if len(supported_extractors) == 1:
+            extractor_type = supported_extractors[0]
+            format = extractor_type.__name__
+            print(r"Формат файла определён по первым страницам как " + format)
 
+            if extractor_type.layout_params:
+                # the first pages were laid out with the default parameters, which are not used for this format
+                pages_text.close()
+                pages_text, laparams, pages_geometry = start_conversion(extractor_type.layout_params)
+                probe_text = ""
 
+    with open(txt_file_name, "w", encoding="utf-8") as txt_file:
+        txt_file.write(probe_text)
+        for page_text in pages_text:
+            txt_file.write(page_text)
+
+    if pages_geometry is not None:
+        write_geometry(geometry_file_name, pages_geometry, laparams)
+
+    return format
 
 
 def sberbankPDF2Excel(input_file_name:str,
-                      output_file_name:Union[str, None] =None,
+                      output_file_name:Union[str, TextIO, None] =None,
                       format:str= 'auto',
                       leave_intermediate_txt_file:str = False,
                       perform_balance_check = True,
-                      output_file_type:str="xlsx") ->str:
+                      output_file_type:str="xlsx",
+                      append:bool = False,
+                      progress_callback:progress_events.ProgressCallback = None,
+                      save_layout_geometry:bool = False,
+                      xlsx_partition:str = utils.XLSX_PARTITION_ROWS,
+                      xlsx_max_rows:int = utils.XLSX_MAX_ROWS - 1) ->str:
     """
     function converts pdf or text file with Sperbank extract to Excel or CSV format
     input_file_name:
-    output_excel_file_name:
+    output_excel_file_name: file name without extension or an opened text stream (e.g. sys.stdout) for csv and jsonl
     format: str - format of the Sberbank extract. If "auto" then tool tryes to work out the format itself
     leave_intermediate_txt_file: if True, does not delete intermediate txt file
+    append: if True, only new transactions are added to the already existing output file (csv, parquet, sqlite)
+    progress_callback: function, which receives progress events of all stages (see progress_events.py)
+    save_layout_geometry: if True, the layout geometry of the PDF is saved next to the intermediate txt file
+        (see "Layout geometry" in pdf2txtev.py), so that the text can be rebuilt later without parsing the PDF
+    xlsx_partition, xlsx_max_rows: how transactions, which do not fit into one sheet of Excel, are split (see utils.XlsxPartitionedWriter)
     """
 
     print(f"{format=}")
@@ -50,13 +133,23 @@ def sberbankPDF2Excel(input_file_name:str,
 
     try:
         if extension == ".pdf":
-            pdf_2_txt_file(input_file_name, tmp_txt_file_name)
+            from pdf2txtev import get_geometry_file_name
+
+            with progress_events.stage(progress_callback, progress_events.STAGE_PDF_TO_TEXT), \
+                    memory_profile.measure("text_extraction"):
+                # the format, determined on the first pages, is not determined again on the whole text
+                format = convert_pdf_to_text(input_file_name, tmp_txt_file_name, format, progress_callback,
+                                             get_geometry_file_name(tmp_txt_file_name) if save_layout_geometry else None)
 
         result = sberbankPDFtext2Excel(tmp_txt_file_name,
                                        output_file_name,
                                        format=format,
                                        perform_balance_check = perform_balance_check,
-                                       output_file_type=output_file_type)
+                                       output_file_type=output_file_type,
+                                       append=append,
+                                       progress_callback=progress_callback,
+                                       xlsx_partition=xlsx_partition,
+                                       xlsx_max_rows=xlsx_max_rows)
 
         if (not leave_intermediate_txt_file) and (not extension == ".txt"):
             os.remove(tmp_txt_file_name)
@@ -68,23 +161,49 @@ def sberbankPDF2Excel(input_file_name:str,
     return result
 
 
+def preload_heavy_modules() -> None:
+    """
+    Imports pandas, pdfminer and all extractors. Normally they are imported only when needed (to start quickly),
+    but long running worker processes call this once at start, so that every converted file does not pay for it
+    """
+    import pandas
+    import pdf2txtev
+
+    extractors.get_extractors_list()
+
 def main():
 
     parser = argparse.ArgumentParser(description='Конвертация выписки банка из формата PDF или из промежуточного текстового файла в формат Excel или CSV.',
                                         parents=[genarate_PDFtext2Excel_argparser()])
    
     parser.add_argument('-i','--interm', action='store_true', default=False, dest='leave_intermediate_txt_file', help='Не удалять промежуточный текстовый файт')
+    parser.add_argument('-g','--geometry', action='store_true', default=False, dest='save_layout_geometry', help='Сохранить геометрию текстовых блоков PDF рядом с промежуточным текстовым файлом (см. replay_layout_geometry.py)')
 
     args = parser.parse_args()
 
-    print(args)
-
-    sberbankPDF2Excel(input_file_name = args.input_file_name,
-                      output_file_name = args.output_Excel_file_name,
-                      format = args.format,
-                      leave_intermediate_txt_file = args.leave_intermediate_txt_file,
-                      perform_balance_check = args.perform_balance_check,
-                      output_file_type=args.output_file_type)
+    output_file_name, messages_redirection = get_output_and_messages_redirection(args.output_Excel_file_name)
+
+    with messages_redirection, get_timings_collection(args.timings) as collected_timings, \
+            get_memory_profile_collection(args.memory_profile) as collected_memory_profile, \
+            profiling.profile(args.input_file_name, args.profile_out):
+        print(args)
+
+        sberbankPDF2Excel(input_file_name = args.input_file_name,
+                          output_file_name = output_file_name,
+                          format = args.format,
+                          leave_intermediate_txt_file = args.leave_intermediate_txt_file,
+                          perform_balance_check = args.perform_balance_check,
+                          output_file_type=args.output_file_type,
+                          append=args.append,
+                          save_layout_geometry=args.save_layout_geometry,
+                          xlsx_partition=args.xlsx_partition,
+                          xlsx_max_rows=args.xlsx_max_rows)
+
+    if args.timings:
+        timings.print_json({"file": args.input_file_name, **collected_timings.to_dict()})
+
+    if args.memory_profile:
+        memory_profile.print_json({"file": args.input_file_name, **collected_memory_profile.to_dict()})
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
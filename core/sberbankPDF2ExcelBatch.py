@@ -0,0 +1,319 @@
+"""
+Пакетная конвертация выписок с возможностью продолжения после сбоя
+
+*********************************************
+при использовании из командной строки
+*********************************************
+
+запустить утилиту с ключом -h и прочитать help
+
+*********************************************
+при использовании в качестве модуля
+*********************************************
+использовать функцию run_batch()
+
+Ход пакетной конвертации записывается в файл-манифест (JSON). Для каждого входного файла в нём хранятся хэш его
+содержимого, статус конвертации, имя созданного файла и использованный экстрактор. Манифест сохраняется после
+каждого сконвертированного файла, поэтому при повторном запуске того же пакета (например после перезагрузки)
+пропускаются файлы, которые уже успешно сконвертированы и с тех пор не изменились. Повторно конвертируются только
+файлы с ошибкой, новые и изменившиеся файлы, а также файлы, результат конвертации которых был удалён.
+
+Каждый файл конвертируется в изолированном процессе (см. worker_sandbox.py): файл, конвертация которого зависла или
+заняла слишком много памяти, записывается в манифест как файл с ошибкой, а пакет продолжает работу.
+"""
+
+import os
+import json
+import hashlib
+import argparse
+import traceback
+import concurrent.futures
+from typing import Union, List
+
+import utils
+import timings
+import exceptions
+import profiling
+import progress_events
+import worker_sandbox
+from sberbankPDF2Excel import sberbankPDF2Excel, preload_heavy_modules
+from sberbankPDFtext2Excel import get_timings_collection
+
+# file name of the manifest, which is created in the output directory, if the manifest is not given explicitly
+DEFAULT_MANIFEST_FILE_NAME = ".sberbank2excel_batch_manifest.json"
+
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def get_file_hash(file_name:str) -> str:
+    """
+    Returns sha256 of the file content
+    """
+    file_hash = hashlib.sha256()
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            file_hash.update(chunk)
+
+    return file_hash.hexdigest()
+
+
+class BatchManifest:
+    """
+    Checkpoint of the batch conversion: input file name : record with keys
+    hash, status, output, extractor, error
+    """
+
+    def __init__(self, manifest_file_name:str, records:Union[dict, None] = None):
+        self.manifest_file_name = manifest_file_name
+        self.records = records if records is not None else {}
+
+    @classmethod
+    def load(cls, manifest_file_name:str) -> 'BatchManifest':
+        if not os.path.exists(manifest_file_name):
+            return cls(manifest_file_name)
+
+        with open(manifest_file_name, encoding="utf-8") as manifest_file:
+            return cls(manifest_file_name, json.load(manifest_file)["files"])
+
+    def save(self) -> None:
+        """
+        Manifest is first written to a temporary file and then renamed, so that a crash during saving
+        does not destroy the already recorded progress
+        """
+        tmp_file_name = self.manifest_file_name + ".tmp"
+        with open(tmp_file_name, "w", encoding="utf-8") as manifest_file:
+            json.dump({"files": self.records}, manifest_file, ensure_ascii=False, indent=1)
+
+        os.replace(tmp_file_name, self.manifest_file_name)
+
+    def is_done(self, input_file_name:str, file_hash:str) -> bool:
+        """
+        True, if the file with exactly this content was already successfully converted and its output still exists
+        """
+        record = self.records.get(input_file_name)
+
+        return (record is not None
+                and record["status"] == STATUS_DONE
+                and record["hash"] == file_hash
+                and os.path.exists(record["output"]))
+
+    def record(self,
+               input_file_name:str,
+               file_hash:str,
+               status:str,
+               output:Union[str, None] = None,
+               extractor:Union[str, None] = None,
+               error:Union[str, None] = None) -> None:
+
+        self.records[input_file_name] = {"hash": file_hash,
+                                         "status": status,
+                                         "output": output,
+                                         "extractor": extractor,
+                                         "error": error}
+
+
+def _convert_file(input_file_name:str,
+                  output_file_name:str,
+                  output_file_type:str,
+                  perform_balance_check:bool,
+                  profile_out:Union[str, None] = None,
+                  collect_timings:bool = False) -> tuple:
+    """
+    Runs in a worker process. Returns (True, created file name, extractor name, timings)
+    or (False, error description, extractor name, timings). Timings are None, unless collect_timings is True
+    """
+    extractor_name = None
+
+    def remember_extractor(event:dict) -> None:
+        nonlocal extractor_name
+        if event["event"] == progress_events.EVENT_EXTRACTOR_DETECTED:
+            extractor_name = event["extractor"]
+
+    with get_timings_collection(collect_timings) as collected_timings, profiling.profile(input_file_name, profile_out):
+        try:
+            sberbankPDF2Excel(input_file_name,
+                              output_file_name,
+                              perform_balance_check=perform_balance_check,
+                              output_file_type=output_file_type,
+                              progress_callback=remember_extractor)
+
+            ok, result = True, output_file_name + "." + output_file_type
+
+        except Exception:
+            ok, result = False, traceback.format_exc()
+
+    return ok, result, extractor_name, collected_timings.to_dict() if collected_timings else None
+
+
+def get_input_files(inputs:List[str], extensions=('.pdf',)) -> List[str]:
+    """
+    Expands directories in inputs to the files with the given extensions in them. Returns absolute file names
+    """
+    input_files = []
+    for input_name in inputs:
+        if os.path.isdir(input_name):
+            input_files.extend(os.path.join(input_name, file_name) for file_name in sorted(os.listdir(input_name))
+                               if file_name.lower().endswith(tuple(extensions)))
+        else:
+            input_files.append(input_name)
+
+    # a file, given several times, is converted once
+    return list(dict.fromkeys(os.path.abspath(file_name) for file_name in input_files))
+
+
+def get_output_file_names(input_files:List[str], output_dir:Union[str, None] = None) -> dict:
+    """
+    Returns {input file name : output file name without extension}. In the output_dir the paths of the input files
+    relative to their common directory are kept, so that files with the same name from different directories
+    do not overwrite each other. Raises UserInputError, if two input files would still be converted to the same file
+    (e.g. statement.pdf and statement.txt)
+    """
+    if output_dir and input_files:
+        common_dir = os.path.commonpath([os.path.dirname(file_name) for file_name in input_files])
+
+    output_file_names = {}
+    created_by = {}
+    for input_file_name in input_files:
+        output_file_name = os.path.splitext(input_file_name)[0]
+        if output_dir:
+            output_file_name = os.path.join(output_dir, os.path.relpath(output_file_name, common_dir))
+
+        other_input_file_name = created_by.setdefault(os.path.normcase(output_file_name), input_file_name)
+        if other_input_file_name != input_file_name:
+            raise exceptions.UserInputError(f"Файлы {other_input_file_name} и {input_file_name} были бы сконвертированы в один и тот же файл {output_file_name}")
+
+        output_file_names[input_file_name] = output_file_name
+
+    return output_file_names
+
+
+def run_batch(inputs:List[str],
+              output_dir:Union[str, None] = None,
+              manifest_file_name:Union[str, None] = None,
+              output_file_type:str = "xlsx",
+              perform_balance_check:bool = True,
+              max_workers:Union[int, None] = None,
+              extensions = ('.pdf',),
+              print_timings:bool = False,
+              profile_out:Union[str, None] = None,
+              sandbox_limits:Union[dict, None] = None) -> BatchManifest:
+    """
+    Converts all files in inputs, skipping files, which are recorded in the manifest as already converted
+
+    inputs - file names and / or directories. From directories files with the given extensions are taken
+    output_dir - directory for created files. If not given, every file is created next to its input file.
+        Subdirectories of the input files are kept in it (see get_output_file_names())
+    manifest_file_name - manifest of this batch. If not given, it is created in the output_dir
+        (or in the current directory, if output_dir is not given)
+    max_workers - amount of worker processes. If not given, amount of CPUs is used
+    print_timings - if True, timings of every file and their percentiles over the batch are printed to stderr as JSON
+    profile_out - directory for profiles of conversion of every file (see profiling.py)
+    sandbox_limits - limits of worker processes: keyword arguments of worker_sandbox.SandboxedExecutor
+        (timeout, max_rss, max_address_space, max_tasks_per_worker). If not given, defaults of SandboxedExecutor are used
+
+    returns the manifest with the results of all files
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    manifest_file_name = manifest_file_name or os.path.join(output_dir or os.getcwd(), DEFAULT_MANIFEST_FILE_NAME)
+    manifest = BatchManifest.load(manifest_file_name)
+
+    input_files = get_input_files(inputs, extensions)
+    # output file names are checked for all input files, also for already converted ones, before anything is converted
+    output_file_names = get_output_file_names(input_files, output_dir)
+
+    files_to_convert = []
+    for input_file_name in input_files:
+        file_hash = get_file_hash(input_file_name)
+
+        if manifest.is_done(input_file_name, file_hash):
+            print(f"Пропускаем уже сконвертированный файл {input_file_name}")
+            continue
+
+        files_to_convert.append((input_file_name, file_hash))
+
+    print(f"Файлов для конвертации: {len(files_to_convert)}")
+
+    if not files_to_convert:
+        return manifest
+
+    files_timings = []
+    qnt_failed = 0
+
+    with worker_sandbox.SandboxedExecutor(max_workers=max_workers, initializer=preload_heavy_modules,
+                                          **(sandbox_limits or {})) as executor:
+        # future : (input file name, hash)
+        futures = {}
+        for input_file_name, file_hash in files_to_convert:
+            output_file_name = output_file_names[input_file_name]
+            os.makedirs(os.path.dirname(output_file_name), exist_ok=True)
+
+            future = executor.submit(_convert_file, input_file_name, output_file_name, output_file_type,
+                                     perform_balance_check, profile_out, print_timings)
+            futures[future] = (input_file_name, file_hash)
+
+        for future in concurrent.futures.as_completed(futures):
+            input_file_name, file_hash = futures[future]
+            try:
+                ok, result, extractor_name, file_timings = future.result()
+            except exceptions.WorkerError as e:
+                # the worker process was stopped because of the timeout or the memory limit or has crashed
+                ok, result, extractor_name, file_timings = False, f"{type(e).__name__}: {e}", None, {"stages": {}}
+
+            if print_timings:
+                timings.print_json({"file": input_file_name, **file_timings})
+                files_timings.append(file_timings)
+
+            if ok:
+                print(f"Сконвертирован файл {input_file_name}")
+                manifest.record(input_file_name, file_hash, STATUS_DONE, output=result, extractor=extractor_name)
+            else:
+                print(f"Ошибка при конвертации файла {input_file_name}\n{result}")
+                qnt_failed += 1
+                manifest.record(input_file_name, file_hash, STATUS_FAILED, extractor=extractor_name, error=result)
+
+            # progress is saved after every file, so that after a crash only unfinished files are converted again
+            manifest.save()
+
+    if print_timings:
+        timings.print_json({"aggregate": timings.aggregate(files_timings)})
+
+    if qnt_failed:
+        print(f"!!!!!!! {qnt_failed} файл(а) не были сконвертированы. Запустите пакет ещё раз, чтобы повторить их конвертацию")
+    else:
+        print("Все файлы успешно сконвертированы")
+
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Пакетная конвертация выписок. Повторный запуск пропускает уже сконвертированные файлы',
+                                     parents=[worker_sandbox.generate_sandbox_argparser()])
+    parser.add_argument('inputs', type=str, nargs='+', help='Файлы и / или директории с файлами для конвертации')
+    parser.add_argument('-o', '--output-dir', type=str, default=None, dest='output_dir', help='Директория для созданных файлов. По умолчанию - рядом с исходными файлами')
+    parser.add_argument('-m', '--manifest', type=str, default=None, dest='manifest_file_name', help=f'Файл-манифест пакета. По умолчанию - {DEFAULT_MANIFEST_FILE_NAME} в директории для созданных файлов')
+    parser.add_argument('-t', '--type', type=str, default='xlsx', dest='output_file_type', choices=utils.OUTPUT_FILE_TYPES, help='Тип создаваемого файла')
+    parser.add_argument('-b', '--balcheck', action='store_false', default=True, dest='perform_balance_check', help='Игнорировать результаты сверки баланса по транзакциям и в шапке выписки')
+    parser.add_argument('-w', '--workers', type=int, default=None, dest='max_workers', help='Количество параллельных процессов конвертации')
+    parser.add_argument('--timings', action='store_true', default=False, dest='print_timings', help='Вывести в stderr время выполнения этапов конвертации каждого файла и перцентили по всему пакету в формате JSON')
+    parser.add_argument('--profile-out', type=str, default=None, dest='profile_out', help=f'Директория, в которую записывается профиль конвертации каждого файла (.pstats и .collapsed для flamegraph). Также может быть задана переменной окружения {profiling.PROFILE_OUT_ENV_VAR}')
+    parser.add_argument('-e', '--extensions', type=str, nargs='+', default=['.pdf'], help='Расширения файлов, которые берутся из директорий')
+
+    args = parser.parse_args()
+
+    run_batch(inputs=args.inputs,
+              output_dir=args.output_dir,
+              manifest_file_name=args.manifest_file_name,
+              output_file_type=args.output_file_type,
+              perform_balance_check=args.perform_balance_check,
+              max_workers=args.max_workers,
+              extensions=args.extensions,
+              print_timings=args.print_timings,
+              profile_out=args.profile_out,
+              sandbox_limits=worker_sandbox.get_sandbox_limits(args))
+
+
+if __name__ == '__main__':
+    main()
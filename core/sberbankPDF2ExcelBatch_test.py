@@ -0,0 +1,79 @@
+import os
+import shutil
+
+import pytest
+
+import exceptions
+from sberbankPDF2ExcelBatch import run_batch, STATUS_DONE, STATUS_FAILED
+
+SAMPLE_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+
+def test_rerun_skips_converted_files_and_retries_failed_ones(tmp_path):
+    input_dir = tmp_path / "inbox"
+    output_dir = tmp_path / "out"
+    input_dir.mkdir()
+
+    shutil.copyfile(SAMPLE_TXT, input_dir / "good.txt")
+    (input_dir / "bad.txt").write_text("Some wrong text", encoding="utf-8")
+
+    def run():
+        return run_batch([str(input_dir)], str(output_dir), output_file_type="csv", max_workers=1, extensions=('.txt',))
+
+    manifest = run()
+    good = manifest.records[str(input_dir / "good.txt")]
+    bad = manifest.records[str(input_dir / "bad.txt")]
+
+    assert good["status"] == STATUS_DONE
+    assert good["extractor"] == "SBER_DEBIT_2107"
+    assert good["output"] == str(output_dir / "good.csv")
+    assert bad["status"] == STATUS_FAILED
+
+    good_mtime = os.path.getmtime(output_dir / "good.csv")
+
+    # the failed file is fixed between runs. Only it shall be converted again
+    shutil.copyfile(SAMPLE_TXT, input_dir / "bad.txt")
+    manifest = run()
+
+    assert os.path.getmtime(output_dir / "good.csv") == good_mtime
+    assert manifest.records[str(input_dir / "bad.txt")]["status"] == STATUS_DONE
+    assert (output_dir / "bad.csv").exists()
+
+
+def test_file_over_the_time_limit_is_recorded_as_failed(tmp_path):
+    input_dir = tmp_path / "inbox"
+    input_dir.mkdir()
+    shutil.copyfile(SAMPLE_TXT, input_dir / "slow.txt")
+
+    manifest = run_batch([str(input_dir)], str(tmp_path / "out"), output_file_type="csv", max_workers=1,
+                         extensions=('.txt',), sandbox_limits={"timeout": 0.01})
+
+    record = manifest.records[str(input_dir / "slow.txt")]
+    assert record["status"] == STATUS_FAILED
+    assert record["error"].startswith("WorkerTimeoutError")
+
+
+def test_files_with_the_same_name_from_different_directories(tmp_path, capsys):
+    for input_dir in ("a", "b"):
+        (tmp_path / input_dir).mkdir()
+        shutil.copyfile(SAMPLE_TXT, tmp_path / input_dir / "statement.txt")
+    (tmp_path / "b" / "bad.txt").write_text("Some wrong text", encoding="utf-8")
+
+    output_dir = tmp_path / "out"
+    manifest = run_batch([str(tmp_path / "a"), str(tmp_path / "b")], str(output_dir), output_file_type="csv", max_workers=1,
+                         extensions=('.txt',))
+
+    assert manifest.records[str(tmp_path / "a" / "statement.txt")]["output"] == str(output_dir / "a" / "statement.csv")
+    assert manifest.records[str(tmp_path / "b" / "statement.txt")]["output"] == str(output_dir / "b" / "statement.csv")
+    assert "1 файл(а) не были сконвертированы" in capsys.readouterr().out
+
+    # only the failed file of this run is reported, not the ones, which failed before
+    os.remove(tmp_path / "b" / "bad.txt")
+    shutil.copyfile(SAMPLE_TXT, tmp_path / "b" / "other.txt")
+    run_batch([str(tmp_path / "a"), str(tmp_path / "b")], str(output_dir), output_file_type="csv", max_workers=1,
+              extensions=('.txt',))
+    assert "Все файлы успешно сконвертированы" in capsys.readouterr().out
+
+    shutil.copyfile(SAMPLE_TXT, tmp_path / "a" / "statement.pdf")
+    with pytest.raises(exceptions.UserInputError):
+        run_batch([str(tmp_path / "a")], str(output_dir), output_file_type="csv", max_workers=1, extensions=('.txt', '.pdf'))
@@ -14,17 +14,81 @@ from tkinter import Menu
 from tkinter import messagebox, ttk
 import traceback
 import sys
+import os
 import logging
+import queue
+import multiprocessing
+import concurrent.futures
 
-from sberbankPDF2Excel import sberbankPDF2Excel
+from sberbankPDF2Excel import sberbankPDF2Excel, preload_heavy_modules
 import version_info
+import progress_events
+import profiling
+import exceptions
+import worker_sandbox
 
+# how often results of the background conversion are checked, milliseconds
+POLL_INTERVAL_MS = 100
 
 # defining global variable, which will hold files tuple
 files = ()
 leave_intermediate_txt_file = 0
 no_balance_check = 0
 
+# pool of worker processes. It is created at the first conversion and is kept until the window is closed,
+# so that next conversions do not pay for starting processes and importing pandas, pdfminer.
+# A conversion, which hangs, is stopped after worker_sandbox.DEFAULT_TIMEOUT seconds
+executor = None
+
+# queue, through which worker processes send progress events (file, event) to the window
+progress_queue = None
+progress_queue_manager = None
+
+# list of (file, future, progress bar, status label) for the conversion in progress
+conversion_jobs = []
+
+# futures, results of which are already shown
+shown_futures = set()
+
+
+def _convert_file(file:str, leave_intermediate_txt_file:bool, perform_balance_check:bool, progress_queue) -> tuple:
+    """
+    Runs in a worker process. Returns (True, created file name) or (False, error description)
+    Progress events are sent to progress_queue as (file, event)
+    """
+    try:
+        # profile is written only if the environment variable SBERBANK2EXCEL_PROFILE_OUT is set
+        with profiling.profile(file):
+            return True, sberbankPDF2Excel(file,
+                                           leave_intermediate_txt_file=leave_intermediate_txt_file,
+                                           perform_balance_check=perform_balance_check,
+                                           progress_callback=lambda event: progress_queue.put((file, event)))
+    except:
+        return False, 'Произошла ошибка при конвертации файла "' + file + '" ' + str(sys.exc_info()[0]) + '\n' + traceback.format_exc()
+
+
+def get_executor() -> worker_sandbox.SandboxedExecutor:
+    global executor, progress_queue, progress_queue_manager
+
+    if executor is None:
+        executor = worker_sandbox.SandboxedExecutor(max_workers=min(os.cpu_count() or 1, 4),
+                                                    initializer=preload_heavy_modules)
+        progress_queue_manager = multiprocessing.Manager()
+        progress_queue = progress_queue_manager.Queue()
+
+    return executor
+
+
+def get_conversion_result(future:concurrent.futures.Future) -> tuple:
+    """
+    Result of _convert_file(). If the worker process was stopped (timeout, crash), it is reported as an error as well
+    """
+    try:
+        return future.result()
+    except exceptions.WorkerError as e:
+        return False, f'Конвертация файла прервана: {type(e).__name__}: {e}'
+
+
 def btn_selectFiles_clicked():
     global files
 
@@ -42,40 +106,140 @@ def btn_selectFiles_clicked():
         SelectedFiles_ScrolledText.insert(INSERT, file+'\n')
 
     SelectedFiles_ScrolledText.configure(state=DISABLED)
-    
+
 
 def btn_convertFiles_clicked():
     """
-    main function, which performs functionality by calling calls ProjectExpenditure2Excel.ProjectExpenditure2Excel(file)
-     and converts file to Excel
+    Submits all selected files to the pool of worker processes and returns at once, so that the window stays responsive.
+    Results are picked up by check_conversion_jobs(), which runs in the Tk event loop
     """
-    # empty scrollText widget
+    global conversion_jobs
+
+    if not files:
+        return
+
     print("Версия "+version_info.VERSION)
+    # empty scrollText widget
     created_excel_files_scrollText.delete('1.0',END)
 
-    qntFiles=len(files)
-    qntFilesConverted=0
-    for file in files:
+    for widget in progress_frame.winfo_children():
+        widget.destroy()
+
+    conversion_jobs = []
+    shown_futures.clear()
+    for row, file in enumerate(files):
+        Label(progress_frame, text=os.path.basename(file), anchor=W, width=50).grid(column=0, row=row, sticky=W)
+        progress_bar = ttk.Progressbar(progress_frame, length=150, mode='determinate', maximum=1)
+        progress_bar.grid(column=1, row=row)
+        status_label = Label(progress_frame, text='в очереди', anchor=W, width=12)
+        status_label.grid(column=2, row=row, sticky=W)
+
+        future = get_executor().submit(_convert_file,
+                                       file,
+                                       bool(leave_intermediate_txt_file.get()),
+                                       not no_balance_check.get(),
+                                       progress_queue)
+        conversion_jobs.append((file, future, progress_bar, status_label))
+
+    total_progress_bar.configure(maximum=len(conversion_jobs), value=0)
+    btn_convert.configure(state=DISABLED)
+    btn_cancel.configure(state=NORMAL)
+
+    window.after(POLL_INTERVAL_MS, check_conversion_jobs)
+
+
+def btn_cancel_clicked():
+    """
+    Cancels files, which are still waiting in the queue. Files, which are already being converted, are finished
+    """
+    for _, future, _, status_label in conversion_jobs:
+        if future.cancel():
+            status_label.configure(text='отменено')
+
+    btn_cancel.configure(state=DISABLED)
+
+
+def show_progress_event(event:dict, progress_bar:ttk.Progressbar, status_label:Label):
+    """
+    Shows progress event, received from the worker process, in the row of the file
+    """
+    if event['event'] == progress_events.EVENT_PAGE_LAID_OUT and event['total_pages']:
+        progress_bar.stop()
+        progress_bar.configure(mode='determinate', value=event['page'] / event['total_pages'])
+        status_label.configure(text=f"стр. {event['page']}/{event['total_pages']}")
+
+    elif event['event'] == progress_events.EVENT_ENTRIES_DECOMPOSED:
+        status_label.configure(text=f"опер. {event['decomposed']}/{event['total']}")
+
+
+def check_conversion_jobs():
+    """
+    Runs in the Tk event loop: updates per-file progress from progress events and from the state of the futures
+    and reschedules itself until all files are processed
+    """
+    widgets_by_file = {file: (progress_bar, status_label) for file, _, progress_bar, status_label in conversion_jobs}
+    while True:
         try:
-            created_excel_files_scrollText.insert(INSERT,
-                                                  sberbankPDF2Excel(file,
-                                                                    leave_intermediate_txt_file = leave_intermediate_txt_file.get(),
-                                                                    perform_balance_check = not no_balance_check.get() ) + '\n')
-            qntFilesConverted=qntFilesConverted + 1
-        except:
-            print('Произошла ошибка при конвертации файла "'+'file'+'" '+ str(sys.exc_info()[0]))
-            print(traceback.format_exc())
-            print('Пропускаем конвертацию этого файла')
-
-    
+            file, event = progress_queue.get_nowait()
+        except queue.Empty:
+            break
+
+        if file in widgets_by_file:
+            show_progress_event(event, *widgets_by_file[file])
+
+    qnt_finished = 0
+    for file, future, progress_bar, status_label in conversion_jobs:
+
+        if future.cancelled():
+            qnt_finished += 1
+
+        elif future.done():
+            qnt_finished += 1
+            if future in shown_futures:
+                continue
+            shown_futures.add(future)
+
+            progress_bar.stop()
+            progress_bar.configure(mode='determinate', value=1)
+
+            ok, result = get_conversion_result(future)
+            if ok:
+                status_label.configure(text='готово')
+                created_excel_files_scrollText.insert(INSERT, result + '\n')
+            else:
+                status_label.configure(text='ошибка', fg='red')
+                print(result)
+                print('Пропускаем конвертацию этого файла')
+
+        elif future.running() and status_label.cget('text') == 'в очереди':
+            status_label.configure(text='конвертация')
+            progress_bar.configure(mode='indeterminate')
+            progress_bar.start()
+
+    total_progress_bar.configure(value=qnt_finished)
+
+    if qnt_finished < len(conversion_jobs):
+        window.after(POLL_INTERVAL_MS, check_conversion_jobs)
+        return
+
+    btn_convert.configure(state=NORMAL)
+    btn_cancel.configure(state=DISABLED)
+
+    qntFiles = len(conversion_jobs)
+    qntFilesConverted = sum(1 for _, future, _, _ in conversion_jobs if not future.cancelled() and get_conversion_result(future)[0])
+
     if qntFiles==qntFilesConverted:
         print('Все файлы успешно сконвертированы')
     else:
         print(f'!!!!!!! {qntFiles-qntFilesConverted} файл(а) из {qntFiles} не были сконвертированы')
 
-window = Tk()
-menu = Menu(window)
-help_about=Menu(menu)
+
+def window_closed():
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+        progress_queue_manager.shutdown()
+    window.destroy()
+
 
 def help_about_clicked():
 
@@ -83,41 +247,67 @@ def help_about_clicked():
     print(info_string)
     messagebox.showinfo('', info_string)
 
-help_about.add_command(label='About',command=help_about_clicked)
 
-menu.add_cascade(label='Help', menu=help_about)
-window.config(menu=menu)
- 
-window.title(f'{version_info.NAME} Версия={version_info.VERSION}')
- 
-window.geometry('720x400')
- 
-Label(window, text="""
+if __name__ == '__main__':
+    # needed for worker processes, when the GUI is frozen into an executable
+    multiprocessing.freeze_support()
+
+    window = Tk()
+    menu = Menu(window)
+    help_about=Menu(menu)
+
+    help_about.add_command(label='About',command=help_about_clicked)
+
+    menu.add_cascade(label='Help', menu=help_about)
+    window.config(menu=menu)
+
+    window.title(f'{version_info.NAME} Версия={version_info.VERSION}')
+
+    window.geometry('720x560')
+
+    Label(window, text="""
 Шаг 1: Выберите один или несколько файлов в формате PDF
 """,justify=LEFT).grid(column=0, row=0,sticky="W")
- 
-Button(window, text="Выбрать файлы", command=btn_selectFiles_clicked).grid(column=0, row=2)
- 
 
-Label(window, text='Выбранные файлы:').grid(column=0,row=3,sticky="W")
-SelectedFiles_ScrolledText = scrolledtext.ScrolledText(window,width=80,height=4,state=DISABLED)
-SelectedFiles_ScrolledText.grid(column=0,row=4)
+    Button(window, text="Выбрать файлы", command=btn_selectFiles_clicked).grid(column=0, row=2)
+
+
+    Label(window, text='Выбранные файлы:').grid(column=0,row=3,sticky="W")
+    SelectedFiles_ScrolledText = scrolledtext.ScrolledText(window,width=80,height=4,state=DISABLED)
+    SelectedFiles_ScrolledText.grid(column=0,row=4)
 
-Label(window, text="Шаг 2. Сконвертируйте файлы в формат Excel").grid(column=0,row=5,sticky="W")
+    Label(window, text="Шаг 2. Сконвертируйте файлы в формат Excel").grid(column=0,row=5,sticky="W")
 
-Button(window,text="Сконвертировать \n выбранные файлы", command=btn_convertFiles_clicked).grid(column=0,row=6)
+    conversion_buttons_frame = Frame(window)
+    conversion_buttons_frame.grid(column=0,row=6)
+    btn_convert = Button(conversion_buttons_frame,text="Сконвертировать \n выбранные файлы", command=btn_convertFiles_clicked)
+    btn_convert.grid(column=0,row=0)
+    btn_cancel = Button(conversion_buttons_frame,text="Отменить", command=btn_cancel_clicked, state=DISABLED)
+    btn_cancel.grid(column=1,row=0)
+    total_progress_bar = ttk.Progressbar(conversion_buttons_frame, length=300, mode='determinate')
+    total_progress_bar.grid(column=2,row=0,padx=10)
 
-Label(window, text='Созданные файлы в формате Excel:').grid(column=0,row=7,sticky="W")
-created_excel_files_scrollText = scrolledtext.ScrolledText(window,width=80,height=4)
-created_excel_files_scrollText.grid(column=0,row=8)
+    # per-file progress. The canvas makes the list scrollable, when many files are selected
+    progress_canvas = Canvas(window, width=640, height=100)
+    progress_scrollbar = Scrollbar(window, orient=VERTICAL, command=progress_canvas.yview)
+    progress_canvas.configure(yscrollcommand=progress_scrollbar.set)
+    progress_canvas.grid(column=0,row=7)
+    progress_scrollbar.grid(column=1,row=7,sticky="NS")
+    progress_frame = Frame(progress_canvas)
+    progress_canvas.create_window((0, 0), window=progress_frame, anchor=NW)
+    progress_frame.bind('<Configure>', lambda event: progress_canvas.configure(scrollregion=progress_canvas.bbox('all')))
 
-Label(window, text="Опции:").grid(column=0,row=9,sticky="W")
-leave_intermediate_txt_file = IntVar()
-Checkbutton(window, text="Не удалять промежуточный текстовый файл", variable=leave_intermediate_txt_file).grid(row=10, sticky=W)
+    Label(window, text='Созданные файлы в формате Excel:').grid(column=0,row=8,sticky="W")
+    created_excel_files_scrollText = scrolledtext.ScrolledText(window,width=80,height=4)
+    created_excel_files_scrollText.grid(column=0,row=9)
 
-no_balance_check = IntVar()
-Checkbutton(window, text="Игнорировать результаты сверки баланса по транзакциям и в шапке выписки", variable=no_balance_check).grid(row=11, sticky=W)
+    Label(window, text="Опции:").grid(column=0,row=10,sticky="W")
+    leave_intermediate_txt_file = IntVar()
+    Checkbutton(window, text="Не удалять промежуточный текстовый файл", variable=leave_intermediate_txt_file).grid(row=11, sticky=W)
 
+    no_balance_check = IntVar()
+    Checkbutton(window, text="Игнорировать результаты сверки баланса по транзакциям и в шапке выписки", variable=no_balance_check).grid(row=12, sticky=W)
 
-window.mainloop()
+    window.protocol('WM_DELETE_WINDOW', window_closed)
 
+    window.mainloop()
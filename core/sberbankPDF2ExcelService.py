@@ -0,0 +1,317 @@
+"""
+Локальный HTTP сервис для конвертации выписок
+
+Позволяет конвертировать выписки из других программ без запуска нового процесса Python на каждый файл.
+Сервис написан только с использованием стандартной библиотеки (asyncio). Конвертация выполняется пулом
+заранее запущенных процессов (в них заранее импортированы pandas, pdfminer и все экстракторы). Процессы изолированы
+(см. worker_sandbox.py): конвертация, которая зависла или заняла слишком много памяти, прерывается с ошибкой 500,
+а вместо процесса запускается новый.
+
+*********************************************
+при использовании из командной строки
+*********************************************
+
+запустить утилиту с ключом -h и прочитать help
+
+*********************************************
+API
+*********************************************
+
+POST /convert?type=xlsx&format=auto&balcheck=1&name=statement.pdf
+    Тело запроса - содержимое файла выписки (PDF или промежуточный текстовый файл).
+    type - тип создаваемого файла (xlsx, csv, jsonl, ...), по умолчанию xlsx
+    format - формат выписки, по умолчанию определяется автоматически
+    balcheck - 0, чтобы игнорировать результаты сверки баланса
+    name - имя исходного файла. Используется для определения его типа (.pdf или .txt). Если не задано, тип
+           определяется по содержимому
+    Ответ - содержимое созданного файла.
+    Коды ошибок: 400 - неверный запрос или неподдерживаемый формат выписки, 408 - запрос не получен за отведённое время,
+                 413 - слишком большой файл, 422 - ошибка сверки баланса, 429 - сервис перегружен (повторите позже), 500 - другие ошибки,
+                 в том числе превышение времени конвертации или ограничения памяти
+
+GET /health
+    Ответ - JSON с информацией о загрузке сервиса
+"""
+
+import os
+import json
+import asyncio
+import argparse
+import tempfile
+import traceback
+import concurrent.futures
+from typing import Union
+from urllib.parse import urlsplit, parse_qs
+
+import utils
+import exceptions
+import profiling
+import worker_sandbox
+from sberbankPDF2Excel import sberbankPDF2Excel, preload_heavy_modules
+
+CONTENT_TYPES = {"xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                 "csv": "text/csv; charset=utf-8",
+                 "jsonl": "application/x-ndjson; charset=utf-8",
+                 "parquet": "application/vnd.apache.parquet",
+                 "sqlite": "application/vnd.sqlite3"}
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 408: "Request Timeout",
+                411: "Length Required", 413: "Payload Too Large", 422: "Unprocessable Entity", 429: "Too Many Requests",
+                500: "Internal Server Error"}
+
+DEFAULT_MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+
+# seconds, during which the whole request (headers and the uploaded file) shall be received
+DEFAULT_UPLOAD_TIMEOUT = 60
+
+
+def _convert_uploaded_file(file_content:bytes,
+                           input_extension:str,
+                           output_file_type:str,
+                           format:str,
+                           perform_balance_check:bool) -> tuple:
+    """
+    Runs in a worker process. Returns (HTTP status, response body)
+    """
+    try:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            input_file_name = os.path.join(tmp_dir, "statement" + input_extension)
+            with open(input_file_name, "wb") as input_file:
+                input_file.write(file_content)
+
+            output_file_name = os.path.join(tmp_dir, "result")
+            # profile is written only if the environment variable SBERBANK2EXCEL_PROFILE_OUT is set
+            with profiling.profile(profiling.get_unique_name("request") + input_extension):
+                sberbankPDF2Excel(input_file_name,
+                                  output_file_name,
+                                  format=format,
+                                  perform_balance_check=perform_balance_check,
+                                  output_file_type=output_file_type)
+
+            with open(output_file_name + "." + output_file_type, "rb") as output_file:
+                return 200, output_file.read()
+
+    except exceptions.BalanceVerificationError as e:
+        return 422, str(e).encode("utf-8")
+
+    except (exceptions.InputFileStructureError, exceptions.UserInputError) as e:
+        return 400, str(e).encode("utf-8")
+
+    except Exception:
+        return 500, traceback.format_exc().encode("utf-8")
+
+
+def _no_operation() -> None:
+    pass
+
+
+class ConversionService:
+    """
+    HTTP service, which converts uploaded statements on a pool of pre-warmed worker processes.
+    At most concurrency + queue_size conversions are accepted at the same time. Requests above that get 429
+    """
+
+    def __init__(self,
+                 concurrency:Union[int, None] = None,
+                 queue_size:int = 8,
+                 max_upload_size:int = DEFAULT_MAX_UPLOAD_SIZE,
+                 sandbox_limits:Union[dict, None] = None,
+                 upload_timeout:float = DEFAULT_UPLOAD_TIMEOUT):
+        """
+        sandbox_limits - limits of worker processes: keyword arguments of worker_sandbox.SandboxedExecutor
+        upload_timeout - seconds to receive the whole request with the uploaded file. Slower requests get 408
+        """
+
+        self.concurrency = concurrency or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.max_upload_size = max_upload_size
+        self.sandbox_limits = sandbox_limits or {}
+        self.upload_timeout = upload_timeout
+
+        self.executor = None
+        self.in_flight = 0
+
+        # actual port, on which the service listens. Set by serve()
+        self.port = None
+
+    def start_workers(self) -> None:
+        """
+        Starts all worker processes and waits until each of them has imported heavy modules
+        """
+        self.executor = worker_sandbox.SandboxedExecutor(max_workers=self.concurrency, initializer=preload_heavy_modules,
+                                                         **self.sandbox_limits)
+        concurrent.futures.wait([self.executor.submit(_no_operation) for _ in range(self.concurrency)])
+
+    def shutdown(self) -> None:
+        if self.executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    @property
+    def capacity(self) -> int:
+        return self.concurrency + self.queue_size
+
+    async def handle_connection(self, reader:asyncio.StreamReader, writer:asyncio.StreamWriter) -> None:
+        try:
+            status, body, content_type = await self._handle_request(reader)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            status, body, content_type = 400, "Неверный HTTP запрос".encode("utf-8"), "text/plain; charset=utf-8"
+
+        headers = [f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}",
+                   f"Content-Type: {content_type}",
+                   f"Content-Length: {len(body)}",
+                   "Connection: close"]
+        if status == 429:
+            headers.append("Retry-After: 1")
+
+        try:
+            writer.write(("\r\n".join(headers) + "\r\n\r\n").encode("latin-1") + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def _handle_request(self, reader:asyncio.StreamReader) -> tuple:
+        """
+        Returns (HTTP status, body, content type)
+        """
+        # one deadline for reading the whole request: the headers and the uploaded file
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.upload_timeout
+
+        try:
+            method, target, headers = await asyncio.wait_for(_read_request_head(reader), self.upload_timeout)
+        except asyncio.TimeoutError:
+            return 408, "Запрос не получен за отведённое время".encode("utf-8"), "text/plain; charset=utf-8"
+
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+        if url.path == "/health":
+            return 200, json.dumps(self.get_health()).encode("utf-8"), "application/json"
+
+        if url.path != "/convert":
+            return 404, b"", "text/plain"
+
+        if method != "POST":
+            return 405, b"", "text/plain"
+
+        if "content-length" not in headers:
+            return 411, b"", "text/plain"
+
+        content_length = int(headers["content-length"])
+        if content_length > self.max_upload_size:
+            return 413, b"", "text/plain"
+
+        # backpressure: the request is rejected at once, if all workers are busy and the queue is full
+        if self.in_flight >= self.capacity:
+            return 429, "Сервис перегружен, повторите запрос позже".encode("utf-8"), "text/plain; charset=utf-8"
+
+        # the slot is reserved before the file is received, so that the files, which are uploaded at the same time,
+        # are bounded by the capacity as well. A slow upload releases its slot at the deadline
+        self.in_flight += 1
+        try:
+            try:
+                file_content = await asyncio.wait_for(reader.readexactly(content_length), max(deadline - loop.time(), 0))
+            except asyncio.TimeoutError:
+                return 408, "Запрос не получен за отведённое время".encode("utf-8"), "text/plain; charset=utf-8"
+
+            return await self._convert(file_content, query)
+        finally:
+            self.in_flight -= 1
+
+    async def _convert(self, file_content:bytes, query:dict) -> tuple:
+        output_file_type = query.get("type", "xlsx")
+        if output_file_type not in utils.OUTPUT_FILE_TYPES:
+            return 400, f"Неподдерживаемый тип файла '{output_file_type}'".encode("utf-8"), "text/plain; charset=utf-8"
+
+        input_extension = os.path.splitext(query.get("name", ""))[1].lower()
+        if input_extension not in (".pdf", ".txt"):
+            input_extension = ".pdf" if file_content.startswith(b"%PDF") else ".txt"
+
+        loop = asyncio.get_running_loop()
+        try:
+            status, body = await loop.run_in_executor(self.executor,
+                                                      _convert_uploaded_file,
+                                                      file_content,
+                                                      input_extension,
+                                                      output_file_type,
+                                                      query.get("format", "auto"),
+                                                      query.get("balcheck", "1") != "0")
+        except exceptions.WorkerError as e:
+            # the worker process was stopped because of the timeout or the memory limit or has crashed
+            status, body = 500, f"{type(e).__name__}: {e}".encode("utf-8")
+
+        content_type = CONTENT_TYPES[output_file_type] if status == 200 else "text/plain; charset=utf-8"
+        return status, body, content_type
+
+    def get_health(self) -> dict:
+        return {"concurrency": self.concurrency,
+                "queue_size": self.queue_size,
+                "in_flight": self.in_flight}
+
+
+async def _read_request_head(reader:asyncio.StreamReader) -> tuple:
+    """
+    Reads the request line and the headers. Returns (method, target, {lower case header name : value})
+    """
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    method, target, _ = request_line.split(" ", 2)
+
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, value = line.split(":", 1)
+        headers[name.strip().lower()] = value.strip()
+
+    return method, target, headers
+
+
+async def serve(service:ConversionService, host:str = "127.0.0.1", port:int = 8080, started:Union[asyncio.Event, None] = None):
+    """
+    Runs HTTP server until it is cancelled. If started is given, it is set when the server is listening
+    (service.port then holds the actual port, which is useful with port=0)
+    """
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    service.port = server.sockets[0].getsockname()[1]
+
+    if started:
+        started.set()
+
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Локальный HTTP сервис для конвертации выписок',
+                                     parents=[worker_sandbox.generate_sandbox_argparser()])
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Адрес, на котором слушает сервис')
+    parser.add_argument('-p', '--port', type=int, default=8080, help='Порт')
+    parser.add_argument('-w', '--workers', type=int, default=None, dest='concurrency', help='Количество параллельных процессов конвертации. По умолчанию - количество CPU')
+    parser.add_argument('-q', '--queue', type=int, default=8, dest='queue_size', help='Сколько запросов может ждать свободного процесса. Остальные получат ответ 429')
+    parser.add_argument('--max-upload', type=int, default=DEFAULT_MAX_UPLOAD_SIZE, dest='max_upload_size', help='Максимальный размер загружаемого файла, байт')
+    parser.add_argument('--upload-timeout', type=float, default=DEFAULT_UPLOAD_TIMEOUT, dest='upload_timeout', help='За сколько секунд должен быть получен весь запрос вместе с загружаемым файлом. Более медленные запросы получат ответ 408')
+
+    args = parser.parse_args()
+
+    service = ConversionService(concurrency=args.concurrency,
+                                queue_size=args.queue_size,
+                                max_upload_size=args.max_upload_size,
+                                sandbox_limits=worker_sandbox.get_sandbox_limits(args),
+                                upload_timeout=args.upload_timeout)
+
+    print(f"Запускаем {service.concurrency} процесс(а) конвертации")
+    service.start_workers()
+
+    print(f"Сервис доступен по адресу http://{args.host}:{args.port}/convert")
+    try:
+        asyncio.run(serve(service, args.host, args.port))
+    except KeyboardInterrupt:
+        print("Сервис остановлен")
+    finally:
+        service.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import os
+import asyncio
+
+from sberbankPDF2ExcelService import ConversionService, serve
+
+SAMPLE_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+
+async def _request(port:int, method:str, target:str, body:bytes = b"") -> tuple:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{method} {target} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+
+    head, _, response_body = response.partition(b"\r\n\r\n")
+    status = int(head.split(b" ")[1])
+    return status, response_body
+
+
+def _run_with_service(service:ConversionService, client):
+    async def scenario():
+        started = asyncio.Event()
+        server_task = asyncio.create_task(serve(service, port=0, started=started))
+        await started.wait()
+        try:
+            return await client(service.port)
+        finally:
+            server_task.cancel()
+
+    service.start_workers()
+    try:
+        return asyncio.run(scenario())
+    finally:
+        service.shutdown()
+
+
+def test_service_converts_uploaded_txt_to_csv():
+    with open(SAMPLE_TXT, "rb") as f:
+        file_content = f.read()
+
+    status, body = _run_with_service(ConversionService(concurrency=1),
+                                     lambda port: _request(port, "POST", "/convert?type=csv&name=statement.txt", file_content))
+
+    assert status == 200
+    assert "Bbbbbb bbbbbbb" in body.decode("utf-8")
+
+
+def test_service_returns_400_for_unknown_statement_format():
+    status, _ = _run_with_service(ConversionService(concurrency=1),
+                                  lambda port: _request(port, "POST", "/convert?type=csv&name=x.txt", "wrong text".encode("utf-8")))
+
+    assert status == 400
+
+
+def test_service_returns_429_when_saturated():
+    service = ConversionService(concurrency=1, queue_size=0)
+
+    async def client(port):
+        service.in_flight = service.capacity
+        return await _request(port, "POST", "/convert?type=csv", b"123")
+
+    status, _ = _run_with_service(service, client)
+
+    assert status == 429
+
+
+def test_slow_upload_holds_a_slot_until_408():
+    service = ConversionService(concurrency=1, queue_size=0, upload_timeout=0.3)
+
+    async def client(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        # only a part of the announced body is sent
+        writer.write(b"POST /convert?type=csv HTTP/1.1\r\nContent-Length: 100\r\n\r\n123")
+        await writer.drain()
+
+        await asyncio.sleep(0.1)
+        in_flight_during_upload = service.in_flight
+        # uploads, which are in progress, count against the capacity
+        other_status, _ = await _request(port, "POST", "/convert?type=csv", b"123")
+
+        response = await reader.read()
+        writer.close()
+        return in_flight_during_upload, other_status, int(response.split(b" ")[1])
+
+    in_flight_during_upload, other_status, status = _run_with_service(service, client)
+
+    assert in_flight_during_upload == 1
+    assert other_status == 429
+    assert status == 408
+    assert service.in_flight == 0
+
+
+def test_slow_headers_get_408():
+    service = ConversionService(concurrency=1, upload_timeout=0.2)
+
+    async def client(port):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"POST /convert?type=csv HTTP/1.1\r\nContent-")
+        await writer.drain()
+
+        response = await reader.read()
+        writer.close()
+        return int(response.split(b" ")[1])
+
+    assert _run_with_service(service, client) == 408
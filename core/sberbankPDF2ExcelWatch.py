@@ -0,0 +1,265 @@
+"""
+Режим наблюдения за директорией: выписки, которые появляются во входной директории, конвертируются автоматически
+
+*********************************************
+при использовании из командной строки
+*********************************************
+
+запустить утилиту с ключом -h и прочитать help
+
+*********************************************
+при использовании в качестве модуля
+*********************************************
+использовать функцию watch()
+
+Директория опрашивается с заданным интервалом. Файлы сравниваются по сигнатуре (размер, время изменения), поэтому
+неизменившиеся файлы не перечитываются. Новый или изменившийся файл ставится в очередь только после того, как его
+сигнатура не менялась в течение одного интервала (файл полностью записан).
+
+Конвертация выполняется пулом процессов, которые заранее импортируют pandas, pdfminer и все экстракторы, поэтому
+каждый файл не платит за эти импорты. Процессы изолированы (см. worker_sandbox.py): конвертация, которая зависла
+или заняла слишком много памяти, прерывается. Файлы, которые не удалось сконвертировать, перемещаются в директорию
+карантина вместе с описанием ошибки.
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import traceback
+import concurrent.futures
+from typing import Union
+
+import utils
+import profiling
+import exceptions
+import worker_sandbox
+from sberbankPDF2Excel import sberbankPDF2Excel, preload_heavy_modules
+from sberbankPDFtext2Excel import _output_file_types_argument
+
+# file, in which signatures of already converted files are kept between runs. It is created in the output directory
+STATE_FILE_NAME = ".sberbank2excel_watch_state.json"
+
+# suffix of the file with the error description, which is put to the quarantine directory next to the failed file
+ERROR_FILE_SUFFIX = ".error.txt"
+
+
+class DirectoryPoller:
+    """
+    Finds new or changed files in a directory by their stat signature (size, modification time).
+    File is reported as ready only if its signature did not change since the previous poll
+    """
+
+    def __init__(self, directory:str, extensions=('.pdf',), known_signatures:Union[dict, None] = None):
+        self.directory = directory
+        self.extensions = tuple(extension.lower() for extension in extensions)
+
+        # file name : signature of the file, which is already processed
+        self.known_signatures = known_signatures if known_signatures is not None else {}
+
+        # file name : signature seen at the previous poll, for files which are not processed yet
+        self._pending_signatures = {}
+
+    def poll(self) -> list:
+        """
+        Returns list of (file name, signature) for files, which are new or changed and are not being written any more
+        """
+        ready = []
+        seen = set()
+
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file() or not entry.name.lower().endswith(self.extensions):
+                    continue
+
+                stat = entry.stat()
+                signature = [stat.st_size, stat.st_mtime_ns]
+                seen.add(entry.name)
+
+                if self.known_signatures.get(entry.name) == signature:
+                    continue
+
+                if self._pending_signatures.get(entry.name) == signature:
+                    ready.append((entry.name, signature))
+                    del self._pending_signatures[entry.name]
+                else:
+                    self._pending_signatures[entry.name] = signature
+
+        # forgetting files, which disappeared before they became ready
+        for file_name in set(self._pending_signatures) - seen:
+            del self._pending_signatures[file_name]
+
+        return ready
+
+    def mark_processed(self, file_name:str, signature:list) -> None:
+        self.known_signatures[file_name] = signature
+
+    def forget(self, file_name:str) -> None:
+        self.known_signatures.pop(file_name, None)
+
+
+def _convert_file(input_file_name:str, output_file_name:str, output_file_type:str, perform_balance_check:bool) -> tuple:
+    """
+    Runs in a worker process. Returns (True, created file name) or (False, error description)
+    """
+    try:
+        # profile is written only if the environment variable SBERBANK2EXCEL_PROFILE_OUT is set
+        with profiling.profile(input_file_name):
+            return True, sberbankPDF2Excel(input_file_name,
+                                           output_file_name,
+                                           perform_balance_check=perform_balance_check,
+                                           output_file_type=output_file_type)
+    except Exception:
+        return False, traceback.format_exc()
+
+
+def _quarantine(input_file_name:str, quarantine_dir:str, error:str) -> None:
+    """
+    Moves the failed file (and its intermediate text file, if it is left) to the quarantine directory
+    and writes the error description next to it
+    """
+    os.makedirs(quarantine_dir, exist_ok=True)
+
+    base_name = os.path.basename(input_file_name)
+    shutil.move(input_file_name, os.path.join(quarantine_dir, base_name))
+
+    intermediate_txt_file_name = os.path.splitext(input_file_name)[0] + ".txt"
+    if input_file_name.lower().endswith(".pdf") and os.path.exists(intermediate_txt_file_name):
+        shutil.move(intermediate_txt_file_name, os.path.join(quarantine_dir, os.path.basename(intermediate_txt_file_name)))
+
+    with open(os.path.join(quarantine_dir, base_name + ERROR_FILE_SUFFIX), "w", encoding="utf-8") as error_file:
+        error_file.write(error)
+
+
+def _load_state(state_file_name:str) -> dict:
+    if not os.path.exists(state_file_name):
+        return {}
+
+    with open(state_file_name, encoding="utf-8") as state_file:
+        return json.load(state_file)
+
+
+def _save_state(state_file_name:str, known_signatures:dict) -> None:
+    with open(state_file_name, "w", encoding="utf-8") as state_file:
+        json.dump(known_signatures, state_file, ensure_ascii=False, indent=1)
+
+
+def watch(input_dir:str,
+          output_dir:Union[str, None] = None,
+          quarantine_dir:Union[str, None] = None,
+          output_file_type:str = "xlsx",
+          perform_balance_check:bool = True,
+          poll_interval:float = 2.0,
+          max_workers:Union[int, None] = None,
+          extensions = ('.pdf',),
+          max_polls:Union[int, None] = None,
+          sandbox_limits:Union[dict, None] = None) -> None:
+    """
+    Watches input_dir and converts new or changed statements to output_dir.
+    Files, which fail to convert, are moved to quarantine_dir
+
+    input_dir - directory, which is watched
+    output_dir - directory for created files. If not given, input_dir is used
+    quarantine_dir - directory for failed files. If not given, subdirectory 'quarantine' of input_dir is used
+    poll_interval - interval between polls, seconds
+    max_workers - amount of worker processes. If not given, amount of CPUs is used
+    extensions - extensions of files, which are converted
+    max_polls - stop after this amount of polls (and after all queued files are converted). If None - runs forever
+    sandbox_limits - limits of worker processes: keyword arguments of worker_sandbox.SandboxedExecutor
+    """
+    output_dir = output_dir or input_dir
+    quarantine_dir = quarantine_dir or os.path.join(input_dir, "quarantine")
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    state_file_name = os.path.join(output_dir, STATE_FILE_NAME)
+    poller = DirectoryPoller(input_dir, extensions, known_signatures=_load_state(state_file_name))
+
+    print(f"Наблюдаем за директорией {input_dir}. Файлы создаются в {output_dir}. Для остановки нажмите Ctrl+C")
+
+    # future : (file name, signature)
+    in_progress = {}
+    qnt_polls = 0
+
+    with worker_sandbox.SandboxedExecutor(max_workers=max_workers, initializer=preload_heavy_modules,
+                                          **(sandbox_limits or {})) as executor:
+        try:
+            while max_polls is None or qnt_polls < max_polls or in_progress:
+
+                if max_polls is None or qnt_polls < max_polls:
+                    qnt_polls += 1
+                    files_in_progress = {file_name for file_name, _ in in_progress.values()}
+
+                    for file_name, signature in poller.poll():
+                        if file_name in files_in_progress:
+                            # will be picked up again by one of the next polls, as the signature is not marked as processed
+                            continue
+
+                        input_file_name = os.path.join(input_dir, file_name)
+                        output_file_name = os.path.join(output_dir, os.path.splitext(file_name)[0])
+
+                        print(f"В очередь на конвертацию: {input_file_name}")
+                        future = executor.submit(_convert_file, input_file_name, output_file_name,
+                                                 output_file_type, perform_balance_check)
+                        in_progress[future] = (file_name, signature)
+
+                # waiting for finished conversions is also the pause between polls
+                done, _ = concurrent.futures.wait(in_progress, timeout=poll_interval,
+                                                  return_when=concurrent.futures.FIRST_COMPLETED)
+                if not in_progress:
+                    time.sleep(poll_interval)
+
+                for future in done:
+                    file_name, signature = in_progress.pop(future)
+                    try:
+                        ok, result = future.result()
+                    except exceptions.WorkerError as e:
+                        # the worker process was stopped because of the timeout or the memory limit or has crashed
+                        ok, result = False, f"{type(e).__name__}: {e}"
+
+                    if ok:
+                        print(f"Сконвертирован файл {file_name}")
+                        poller.mark_processed(file_name, signature)
+                    else:
+                        print(f"Ошибка при конвертации файла {file_name}\n{result}")
+                        # the file might have been deleted or renamed meanwhile. This shall not stop the watcher
+                        try:
+                            _quarantine(os.path.join(input_dir, file_name), quarantine_dir, result)
+                            print(f"Файл {file_name} перемещён в {quarantine_dir}")
+                        except OSError as e:
+                            print(f"Не удалось переместить файл {file_name} в {quarantine_dir}: {e}")
+                        poller.forget(file_name)
+
+                    _save_state(state_file_name, poller.known_signatures)
+
+        except KeyboardInterrupt:
+            print("Наблюдение остановлено")
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Наблюдение за директорией и автоматическая конвертация появляющихся в ней выписок',
+                                     parents=[worker_sandbox.generate_sandbox_argparser()])
+    parser.add_argument('input_dir', type=str, help='Директория, за которой нужно наблюдать')
+    parser.add_argument('-o', '--output-dir', type=str, default=None, dest='output_dir', help='Директория для созданных файлов. По умолчанию - input_dir')
+    parser.add_argument('-q', '--quarantine-dir', type=str, default=None, dest='quarantine_dir', help='Директория для файлов, которые не удалось сконвертировать. По умолчанию - input_dir/quarantine')
+    parser.add_argument('-t', '--type', type=_output_file_types_argument, default='xlsx', dest='output_file_type', help=f'Тип создаваемого файла: {", ".join(utils.OUTPUT_FILE_TYPES)}. Несколько типов через запятую (например xlsx,csv)')
+    parser.add_argument('-b', '--balcheck', action='store_false', default=True, dest='perform_balance_check', help='Игнорировать результаты сверки баланса по транзакциям и в шапке выписки')
+    parser.add_argument('-n', '--interval', type=float, default=2.0, dest='poll_interval', help='Интервал опроса директории, сек')
+    parser.add_argument('-w', '--workers', type=int, default=None, dest='max_workers', help='Количество параллельных процессов конвертации')
+
+    args = parser.parse_args()
+
+    watch(input_dir=args.input_dir,
+          output_dir=args.output_dir,
+          quarantine_dir=args.quarantine_dir,
+          output_file_type=args.output_file_type,
+          perform_balance_check=args.perform_balance_check,
+          poll_interval=args.poll_interval,
+          max_workers=args.max_workers,
+          sandbox_limits=worker_sandbox.get_sandbox_limits(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import os
+import shutil
+
+import sberbankPDF2ExcelWatch
+from sberbankPDF2ExcelWatch import DirectoryPoller, watch, ERROR_FILE_SUFFIX
+
+SAMPLE_TXT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'misc', '_SBER_DEBIT_2107_anonymized_reduced.txt')
+
+
+def test_poller_reports_only_new_or_changed_and_stable_files(tmp_path):
+    statement = tmp_path / "statement.pdf"
+    statement.write_bytes(b"123")
+    (tmp_path / "notes.doc").write_bytes(b"123")
+
+    poller = DirectoryPoller(str(tmp_path))
+
+    # 1st poll only remembers the signature, as the file may still be written
+    assert poller.poll() == []
+
+    ready = poller.poll()
+    assert [file_name for file_name, _ in ready] == ["statement.pdf"]
+
+    poller.mark_processed(*ready[0])
+    assert poller.poll() == []
+    assert poller.poll() == []
+
+    statement.write_bytes(b"12345")
+    assert poller.poll() == []
+    assert [file_name for file_name, _ in poller.poll()] == ["statement.pdf"]
+
+
+def test_watch_converts_good_files_and_quarantines_bad_ones(tmp_path):
+    input_dir = tmp_path / "inbox"
+    output_dir = tmp_path / "out"
+    quarantine_dir = tmp_path / "quarantine"
+    input_dir.mkdir()
+
+    shutil.copyfile(SAMPLE_TXT, input_dir / "good.txt")
+    (input_dir / "bad.txt").write_text("Some wrong text", encoding="utf-8")
+
+    watch(str(input_dir), str(output_dir), str(quarantine_dir),
+          output_file_type="csv",
+          poll_interval=0.05,
+          max_workers=1,
+          extensions=('.txt',),
+          max_polls=3)
+
+    assert (output_dir / "good.csv").exists()
+    assert (quarantine_dir / "bad.txt").exists()
+    assert (quarantine_dir / ("bad.txt" + ERROR_FILE_SUFFIX)).exists()
+    assert not (input_dir / "bad.txt").exists()
+
+
+def test_watch_goes_on_when_failed_file_can_not_be_quarantined(tmp_path, monkeypatch):
+    input_dir = tmp_path / "inbox"
+    output_dir = tmp_path / "out"
+    input_dir.mkdir()
+
+    (input_dir / "bad.txt").write_text("Some wrong text", encoding="utf-8")
+
+    def vanished(file_name, quarantine_dir, error):
+        raise FileNotFoundError(file_name)
+
+    monkeypatch.setattr(sberbankPDF2ExcelWatch, "_quarantine", vanished)
+
+    polls = []
+    original_poll = DirectoryPoller.poll
+
+    def poll_and_add_good_file(self):
+        polls.append(1)
+        if len(polls) == 3:
+            shutil.copyfile(SAMPLE_TXT, input_dir / "good.txt")
+        return original_poll(self)
+
+    monkeypatch.setattr(DirectoryPoller, "poll", poll_and_add_good_file)
+
+    watch(str(input_dir), str(output_dir), str(tmp_path / "quarantine"),
+          output_file_type="csv",
+          poll_interval=0.05,
+          max_workers=1,
+          extensions=('.txt',),
+          max_polls=6)
+
+    assert (output_dir / "good.csv").exists()
@@ -17,15 +17,21 @@
 import sys
 import os
 import argparse
-
-# importing own modules out of project
-import pandas as pd
+import contextlib
+import contextvars
+import concurrent.futures
+from typing import Iterator
 
 import utils
 import extractors
 import exceptions
+import accounting
+import progress_events
+import timings
+import memory_profile
+import profiling
 
-from extractors_generic import determine_extractor_auto
+from extractors_generic import determine_extractor_auto, determine_extractor_by_name
 
 
 class bcolors:
@@ -39,81 +45,412 @@ class bcolors:
     BOLD = '\033[1m'
     UNDERLINE = '\033[4m'
 
+def _verify_balance(balance:int, calculated_balance:int, perform_balance_check:bool, describe_mismatch=None) -> str:
+    """
+    Сравнивает баланс из шапки выписки с балансом, вычисленным по трансакциям (оба в копейках).
+    Если perform_balance_check == False, то ошибка не выдаётся, а возвращается её текст
+    describe_mismatch - функция без аргументов, которая при расхождении возвращает описание трансакции, на которой
+    оно началось (см. _describe_running_balance_mismatch()), или пустую строку
+    """
+    try:
+        accounting.check_balance(balance, calculated_balance)
+
+    except exceptions.BalanceVerificationError as e:
+        error = e
+        mismatch_description = describe_mismatch() if describe_mismatch is not None else ""
+        if mismatch_description:
+            error = exceptions.BalanceVerificationError(str(e) + mismatch_description)
+
+        if perform_balance_check:
+            raise error from None
+        else:
+            print(bcolors.FAIL + str(error) + bcolors.ENDC)
+            return str(error)
+
+    return ""
+
+def _describe_running_balance_mismatch(extractor, values_kopecks, remainders_kopecks) -> str:
+    """
+    Finds the first transaction, at which the remainder of the account diverges from the running balance
+    (see accounting.find_running_balance_mismatch()), and describes it with its position in the text of the statement.
+    Returns '' if the format does not have remainders or all transactions are consistent
+    """
+    entry_index = accounting.find_running_balance_mismatch(values_kopecks, remainders_kopecks)
+    if entry_index is None:
+        return ""
+
+    # entries are split again only here, when the balance check has already failed
+    entries = extractor.split_text_on_entries()
+    entry = entries[entry_index]
+    position = extractor.find_entry_in_text(entries, entry_index)
+    if position >= 0:
+        line_number = extractor.pdf_text.count('\n', 0, position) + 1
+        location = f"позиция {position}, строка {line_number}"
+    else:
+        location = "позиция не найдена"
+    first_line = entry.strip('\n').split('\n', 1)[0]
+
+    return f"""
+                Остаток по счёту расходится с суммой трансакций начиная с трансакции № {entry_index + 1} ({location} в тексте выписки):
+                {first_line}
+        """
+
+def _get_output_size(output_file_name:str) -> int:
+    """
+    Size of the output file in bytes. For a directory (parquet dataset) - total size of all files in it
+    """
+    if os.path.isdir(output_file_name):
+        return sum(entry.stat().st_size for entry in os.scandir(output_file_name) if entry.is_file())
+
+    if os.path.isfile(output_file_name):
+        return os.path.getsize(output_file_name)
+
+    return 0
+
+class _StreamedBalance:
+    """
+    Sums transactions, while they are written out one by one without building a dataframe. Values and remainders
+    in kopecks are kept to find the transaction, at which the balance diverges, if the check fails
+    """
+
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.balance_column = extractor.get_column_name_for_balance_calculation()
+        self.remainder_column = extractor.get_column_name_for_running_balance()
+        self.calculated_balance = 0
+        self.values, self.remainders = [], []
+
+    def track(self, entries:Iterator[dict]) -> Iterator[dict]:
+        for entry in entries:
+            value = accounting.get_kopecks_from_money(entry.get(self.balance_column, '0'))
+            self.calculated_balance += value
+
+            if self.remainder_column is not None:
+                if entry.get(self.remainder_column) is None:
+                    self.remainder_column = None
+                else:
+                    self.values.append(value)
+                    self.remainders.append(accounting.get_kopecks_from_money(entry[self.remainder_column]))
+
+            yield entry
+
+    def verify(self, extracted_balance:int, perform_balance_check:bool) -> str:
+        """
+        see _verify_balance()
+        """
+        return _verify_balance(extracted_balance, self.calculated_balance, perform_balance_check,
+                               lambda: _describe_running_balance_mismatch(self.extractor, self.values, self.remainders)
+                                       if self.remainder_column else "")
+
+def _money_to_rubles(entries:Iterator[dict], money_columns:list) -> Iterator[dict]:
+    """
+    Converts money strings of the transactions, which are written one by one, to rubles as they pass
+    """
+    for entry in entries:
+        for column in money_columns:
+            if entry.get(column) is not None:
+                entry[column] = accounting.get_kopecks_from_money(entry[column]) / 100
+
+        yield entry
+
+def _get_money_columns(extractor) -> list:
+    columns_types = extractor.get_columns_types()
+    return [column for column in extractor.get_columns_info() if columns_types.get(column) == utils.COLUMN_TYPE_MONEY]
+
+def _convert_to_jsonl_stream(extractor, output_file_name, extracted_balance:int, perform_balance_check:bool,
+                             progress_callback:progress_events.ProgressCallback=None):
+    """
+    Writes transactions to JSON Lines one by one, as soon as they are decomposed, without building a dataframe.
+    Therefore the balance can only be verified after all transactions are already written. If the check fails,
+    the created file is deleted (data, already written to a stream, can not be taken back)
+    """
+    streamed_balance = _StreamedBalance(extractor)
+
+    output = output_file_name + ".jsonl" if isinstance(output_file_name, str) else output_file_name
+
+    try:
+        with progress_events.stage(progress_callback, progress_events.STAGE_WRITING), timings.measure("write_jsonl"), \
+                memory_profile.measure("writer"):
+            entries = _money_to_rubles(streamed_balance.track(extractor.iter_entries(progress_callback)),
+                                       _get_money_columns(extractor))
+            qnt_entries = utils.write_entries_to_jsonl(entries,
+                                                       output,
+                                                       columns=list(extractor.get_columns_info().keys()))
+        timings.add_counts("write_jsonl", rows=qnt_entries)
+        memory_profile.add_counts("writer", entries=qnt_entries)
+
+        with progress_events.stage(progress_callback, progress_events.STAGE_BALANCE_CHECK), timings.measure("balance_check"):
+            streamed_balance.verify(extracted_balance, perform_balance_check)
+
+    except:
+        if isinstance(output, str) and os.path.exists(output):
+            os.remove(output)
+        raise
+
+    if isinstance(output, str):
+        print(f"Создан файл {output}")
+        progress_events.emit(progress_callback, progress_events.EVENT_BYTES_WRITTEN, file=output, bytes=_get_output_size(output))
+    else:
+        progress_events.emit(progress_callback, progress_events.EVENT_BYTES_WRITTEN, file=None, bytes=None)
+
+    return output_file_name
+
+def _convert_to_xlsx_stream(extractor, output_file_name, extracted_balance:int, perform_balance_check:bool,
+                            progress_callback:progress_events.ProgressCallback=None,
+                            xlsx_partition:str=utils.XLSX_PARTITION_ROWS,
+                            xlsx_max_rows:int=utils.XLSX_MAX_ROWS - 1):
+    """
+    Writes transactions to xlsx one by one, as soon as they are decomposed, without building a dataframe.
+    Transactions, which do not fit into one sheet, are split into partitions (see utils.XlsxPartitionedWriter).
+    The balance is verified after all transactions are written, but before the Info sheet, which contains
+    its result, is written. If the check fails, the created files are deleted
+    """
+    if not isinstance(output_file_name, str):
+        raise exceptions.UserInputError("Вывод в поток не поддерживается для формата 'xlsx'")
+
+    columns_info = extractor.get_columns_info()
+    columns_types = extractor.get_columns_types()
+    keys = list(columns_info.keys())
+    datetime_columns = [column_number for column_number, key in enumerate(keys) if columns_types.get(key) == utils.COLUMN_TYPE_DATETIME]
+
+    xlsx_writer = utils.XlsxPartitionedWriter(output_file_name,
+                                              list(columns_info.values()),
+                                              partition=xlsx_partition,
+                                              max_rows=xlsx_max_rows,
+                                              period_column=datetime_columns[0] if datetime_columns else None)
+    streamed_balance = _StreamedBalance(extractor)
+
+    try:
+        with progress_events.stage(progress_callback, progress_events.STAGE_WRITING), timings.measure("write_xlsx"), \
+                memory_profile.measure("writer"):
+            entries = _money_to_rubles(streamed_balance.track(extractor.iter_entries(progress_callback)),
+                                       _get_money_columns(extractor))
+            qnt_entries = xlsx_writer.write_rows([entry.get(key) for key in keys] for entry in entries)
+        timings.add_counts("write_xlsx", rows=qnt_entries)
+        memory_profile.add_counts("writer", entries=qnt_entries)
+
+        with progress_events.stage(progress_callback, progress_events.STAGE_BALANCE_CHECK), timings.measure("balance_check"):
+            error = streamed_balance.verify(extracted_balance, perform_balance_check)
+
+    except:
+        xlsx_writer.discard()
+        raise
+
+    with timings.measure("write_xlsx"):
+        file_names = xlsx_writer.close(extractor.__class__.__name__, error)
+
+    for file_name in file_names:
+        print(f"Создан файл {file_name}")
+        progress_events.emit(progress_callback, progress_events.EVENT_BYTES_WRITTEN, file=file_name, bytes=_get_output_size(file_name))
+
+    return output_file_name
+
+def _read_output_df(output_file_name:str, output_file_type:str, columns_info:dict, columns_types:dict):
+    """
+    Reads the transactions of the existing output file back with the same keys and data types, as the dataframe given
+    to _write_df_to_output(), so that the append index can be built from them
+    """
+    money_columns = [columns_info[column] for column, column_type in columns_types.items()
+                     if column_type == utils.COLUMN_TYPE_MONEY and column in columns_info]
+    datetime_columns = [columns_info[column] for column, column_type in columns_types.items()
+                        if column_type == utils.COLUMN_TYPE_DATETIME and column in columns_info]
+
+    df = utils.read_df_from_file(output_file_name, output_file_type,
+                                 money_columns=money_columns,
+                                 datetime_columns=datetime_columns)
+
+    return df.rename(columns={name: column for column, name in columns_info.items()})
+
+def _write_df_to_output(df, extractor, output_file_name, output_file_type:str, error:str, append:bool,
+                        progress_callback:progress_events.ProgressCallback=None,
+                        xlsx_partition:str=utils.XLSX_PARTITION_ROWS,
+                        xlsx_max_rows:int=utils.XLSX_MAX_ROWS - 1) -> None:
+    """
+    Writes the dataframe with all transactions to one output file type. In append mode only the rows, which are not
+    yet in this file, are written (every output file has its own index, see append_index.py)
+    """
+    columns_info = extractor.get_columns_info()
+    columns_types = extractor.get_columns_types()
+
+    # only the columns, which are written, are used to tell the transactions apart in the append index
+    df = df[list(columns_info.keys())]
+
+    append_index = None
+    if append:
+        from append_index import AppendIndex
+
+        append_index = AppendIndex.load(output_file_name + "." + output_file_type,
+                                        read_output=lambda: _read_output_df(output_file_name, output_file_type,
+                                                                            columns_info, columns_types))
+        qnt_entries = len(df)
+        df = append_index.select_new_rows(df)
+        print(f"Новых трансакций в {output_file_type}: {len(df)} из {qnt_entries}")
+
+        if len(df) == 0:
+            return
+
+    elif isinstance(output_file_name, str):
+        from append_index import remove_index
+
+        # the file is overwritten, so its old index describes transactions, which are not there anymore
+        remove_index(output_file_name + "." + output_file_type)
+
+    new_entries_df = df
+
+    if output_file_type == "jsonl":
+        # keys of JSON objects are the same, as when jsonl is written without a dataframe (see _convert_to_jsonl_stream())
+        df = df[list(columns_info.keys())]
+        money_columns = [column for column, column_type in columns_types.items()
+                         if column_type == utils.COLUMN_TYPE_MONEY and column in columns_info]
+    else:
+        df = utils.rename_sort_df(df = df,
+                                  columns_info=columns_info)
+        money_columns = [columns_info[column] for column, column_type in columns_types.items()
+                         if column_type == utils.COLUMN_TYPE_MONEY and column in columns_info]
+
+    output_path = output_file_name + "." + output_file_type if isinstance(output_file_name, str) else None
+    output_size_before = _get_output_size(output_path) if append else 0
+
+    with timings.measure("write_" + output_file_type, rows=len(df)):
+        utils.write_df_to_file(df, output_file_name,
+                                extractor_name = extractor.__class__.__name__,
+                                errors=error,
+                                output_file_format=output_file_type,
+                                append=append,
+                                money_columns=money_columns,
+                                xlsx_partition=xlsx_partition,
+                                xlsx_max_rows=xlsx_max_rows)
+
+    progress_events.emit(progress_callback, progress_events.EVENT_BYTES_WRITTEN,
+                         file=output_path,
+                         bytes=_get_output_size(output_path) - output_size_before if output_path else None)
+
+    # index is updated only after the data is successfully written
+    if append:
+        append_index.update(new_entries_df)
+        append_index.save()
+
 def sberbankPDFtext2Excel(input_txt_file_name:str,
                           output_file_name:str = None,
                           format = 'auto',
                           perform_balance_check = True,
-                          output_file_type='xlsx') -> str:
+                          output_file_type='xlsx',
+                          append = False,
+                          progress_callback:progress_events.ProgressCallback = None,
+                          xlsx_partition:str = utils.XLSX_PARTITION_ROWS,
+                          xlsx_max_rows:int = utils.XLSX_MAX_ROWS - 1) -> str:
     """
     Функция конвертирует текстовый файл Сбербанка, полученный из выписки PDF в Excel или CSV форматы
     Если output_file_name не задан, то он создаётся из input_txt_file_name путём удаления расширения
+    Если append == True, то в уже существующий выходной файл дописываются только новые трансакции
+    output_file_name может быть также открытым текстовым потоком (например sys.stdout) для форматов utils.STREAMABLE_OUTPUT_FILE_TYPES
+    output_file_type - тип создаваемого файла или несколько типов через запятую ("xlsx,csv,parquet"). Трансакции разбираются
+    один раз, и все файлы записываются одновременно в отдельных потоках
+    progress_callback - функция, которая получает события о ходе конвертации (см. progress_events.py)
+    xlsx_partition, xlsx_max_rows - как разделяются трансакции, которые не помещаются на один лист Excel (см. utils.XlsxPartitionedWriter)
     """
 
+    output_file_types = utils.get_output_file_types(output_file_type)
+
+    for output_file_type in output_file_types:
+        if append and output_file_type not in utils.APPENDABLE_OUTPUT_FILE_TYPES:
+            raise exceptions.UserInputError(f"Дописывание в существующий файл не поддерживается для формата '{output_file_type}'")
+
     # creating output file name for Excel file, if not provided
     if not output_file_name:
         pre, ext = os.path.splitext(input_txt_file_name)
         output_file_name = pre
 
+    if append and not isinstance(output_file_name, str):
+        raise exceptions.UserInputError("Дописывание в существующий файл невозможно при выводе в поток")
+
+    if len(output_file_types) > 1 and not isinstance(output_file_name, str):
+        raise exceptions.UserInputError("Вывод в поток возможен только для одного типа файла")
+
     # считываем входной файл в текст
-    with open(input_txt_file_name, encoding="utf8") as file:
+    with memory_profile.measure("text_extraction"), open(input_txt_file_name, encoding="utf8") as file:
         file_text = file.read()
 
     extractor_type = None
 
-    if format=='auto':
-        extractor_type = determine_extractor_auto(file_text)
-        print(r"Формат файла определён как " + extractor_type.__name__)
+    with memory_profile.measure("extractor_construction"):
+        with timings.measure("determine_extractor"):
+            if format=='auto':
+                extractor_type = determine_extractor_auto(file_text)
+                print(r"Формат файла определён как " + extractor_type.__name__)
 
-    else:
-        for extractor in extractors.extractors_list:
-            if extractor.__name__ == format:
-                extractor_type = extractor
-                break
-        else:
-            raise exceptions.UserInputError(f"Задан неизвестный формат {format}")
+            else:
+                extractor_type = determine_extractor_by_name(format)
 
-        print(r"Конвертируем файл как формат " + format)
+                print(r"Конвертируем файл как формат " + format)
 
+        progress_events.emit(progress_callback, progress_events.EVENT_EXTRACTOR_DETECTED, extractor=extractor_type.__name__)
 
-    # in this case extractor_type is not a function, but a class
-    # if you call it like this extractor_type() it returns an object with the type of extractor_type
-    extractor = extractor_type(file_text)
+        # in this case extractor_type is not a function, but a class
+        # if you call it like this extractor_type() it returns an object with the type of extractor_type
+        extractor = extractor_type(file_text)
 
-    # extracting entries (operations) from big text to list of dictionaries
-    individual_entries = extractor.get_entries()
+        # getting balance, written in the bank statement, in kopecks
+        extracted_balance = extractor.get_period_balance()
 
-    # converting list of dictionaries to pandas dataframe
-    df = pd.DataFrame(individual_entries,
-                      columns=extractor.get_columns_info().keys())
+    # a single jsonl or xlsx file is written without building a dataframe. Several output files are written
+    # from one dataframe, so that transactions are decomposed only once
+    if output_file_types == ["jsonl"]:
+        return _convert_to_jsonl_stream(extractor, output_file_name, extracted_balance, perform_balance_check, progress_callback)
 
-    # getting balance, written in the bank statement
-    extracted_balance = extractor.get_period_balance()
+    if output_file_types == ["xlsx"]:
+        return _convert_to_xlsx_stream(extractor, output_file_name, extracted_balance, perform_balance_check, progress_callback,
+                                       xlsx_partition, xlsx_max_rows)
 
-    # checking, if balance, extracted from text file is equal to the balance, found by summing column in Pandas dataframe
+    # pandas is imported only here, as it takes noticeable time and is not needed e.g. for jsonl output
+    import pandas as pd
 
-    error = ""
+    with progress_events.stage(progress_callback, progress_events.STAGE_EXTRACTION):
+        # extracting entries (operations) from big text to list of dictionaries
+        with memory_profile.measure("entry_list"):
+            individual_entries = extractor.get_entries(progress_callback)
+        memory_profile.add_counts("entry_list", entries=len(individual_entries))
 
-    try:
-        utils.check_transactions_balance(input_pd=df,
-                                         balance=extracted_balance,
-                                         column_name_for_balance_calculation=extractor.get_column_name_for_balance_calculation())
-
-    except exceptions.BalanceVerificationError as e:
-        if perform_balance_check:
-            raise
-        else:
-            print(bcolors.FAIL + str(e) + bcolors.ENDC)
-            error = str(e)
+        with timings.measure("dataframe_construction", rows=len(individual_entries)), memory_profile.measure("dataframe"):
+            # converting list of dictionaries to pandas dataframe
+            df = pd.DataFrame(individual_entries,
+                              columns=extractor.get_columns_info().keys())
 
+            # storing data in compact data types: categoricals, int64 kopecks, datetime64
+            columns_types = extractor.get_columns_types()
+            df = utils.compact_df_dtypes(df, columns_types)
 
-    df = utils.rename_sort_df(df = df,
-                              columns_info=extractor.get_columns_info())
-
-    utils.write_df_to_file(df, output_file_name,
-                            extractor_name = extractor_type.__name__,
-                            errors=error,
-                            output_file_format=output_file_type)
+    # checking, if balance, extracted from text file is equal to the balance, found by summing column in Pandas dataframe
+    # Both are in kopecks, so the sum is exact
+    balance_column = extractor.get_column_name_for_balance_calculation()
+    remainder_column = extractor.get_column_name_for_running_balance()
+
+    def describe_mismatch():
+        if remainder_column not in df.columns or df[remainder_column].hasnans:
+            return ""
+        return _describe_running_balance_mismatch(extractor, df[balance_column].to_numpy(), df[remainder_column].to_numpy())
+
+    with progress_events.stage(progress_callback, progress_events.STAGE_BALANCE_CHECK), timings.measure("balance_check"):
+        error = _verify_balance(balance=extracted_balance,
+                                calculated_balance=int(df[balance_column].sum()),
+                                perform_balance_check=perform_balance_check,
+                                describe_mismatch=describe_mismatch)
+
+    with progress_events.stage(progress_callback, progress_events.STAGE_WRITING), memory_profile.measure("writer"):
+        if len(output_file_types) == 1:
+            _write_df_to_output(df, extractor, output_file_name, output_file_types[0], error, append, progress_callback,
+                                xlsx_partition, xlsx_max_rows)
+        else:
+            # all output files are written from the same dataframe at the same time. Every thread gets a copy
+            # of the context, so that timings of its output file are collected (see timings.py)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=len(output_file_types)) as executor:
+                futures = [executor.submit(contextvars.copy_context().run, _write_df_to_output,
+                                           df, extractor, output_file_name, output_file_type, error, append, progress_callback,
+                                           xlsx_partition, xlsx_max_rows)
+                           for output_file_type in output_file_types]
 
+            for future in futures:
+                future.result()
 
     # writer = pd.ExcelWriter(output_excel_file_name,
     #                         engine='xlsxwriter',
@@ -128,6 +465,17 @@ def sberbankPDFtext2Excel(input_txt_file_name:str,
 
     return output_file_name
 
+def _output_file_types_argument(value:str) -> str:
+    """
+    Checks the value of the argument -t (see utils.get_output_file_types())
+    """
+    try:
+        utils.get_output_file_types(value)
+    except exceptions.UserInputError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+    return value
+
 def genarate_PDFtext2Excel_argparser()->argparse.ArgumentParser:
     """
     The function generates the argparser object. It is used in this module and later on as a parent in other module
@@ -136,13 +484,55 @@ def genarate_PDFtext2Excel_argparser()->argparse.ArgumentParser:
     # parser = argparse.ArgumentParser(description='Конвертация выписки банка из текстового формата в формат Excel или CSV. Для конвертации в текстовый формат, нужно воспользоваться утилитой pdf2txtev')
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument('input_file_name', type=str, help='Файла для конвертации')
-    parser.add_argument('-o','--output', type=str, default=None, dest='output_Excel_file_name', help='Имя файла (без расшмрения) который будет создан в формате Excel или CSV')
+    parser.add_argument('-o','--output', type=str, default=None, dest='output_Excel_file_name', help='Имя файла (без расшмрения) который будет создан в формате Excel или CSV. "-" - вывод в stdout (для csv, jsonl)')
     parser.add_argument('-b','--balcheck', action='store_false', default=True, dest='perform_balance_check', help='Игнорировать результаты сверки баланса по транзакциям и в шапке выписки')
     parser.add_argument('-f', '--format', type=str,default='auto', dest='format', choices = extractors.get_list_extractors_in_text(),help = 'Формат выписки. Если не указан, определяется автоматически' )
-    parser.add_argument('-t', '--type', type=str,default='xlsx', dest='output_file_type', choices = ["xlsx","csv"],help = 'Тип создаваемого файла' )
+    parser.add_argument('-t', '--type', type=_output_file_types_argument, default='xlsx', dest='output_file_type',
+                        help=f'Тип создаваемого файла: {", ".join(utils.OUTPUT_FILE_TYPES)}. Несколько типов через запятую (например xlsx,csv,parquet) '
+                             f'создаются за одну конвертацию')
+    parser.add_argument('--xlsx-partition', type=str, default=utils.XLSX_PARTITION_ROWS, dest='xlsx_partition', choices=utils.XLSX_PARTITION_MODES,
+                        help='Как разделять трансакции xlsx файла: rows - на следующий лист, когда лист заполнен (по умолчанию), year, month - на листы по годам, месяцам операций, '
+                             'workbooks - в следующий файл, когда лист заполнен')
+    parser.add_argument('--xlsx-max-rows', type=int, default=utils.XLSX_MAX_ROWS - 1, dest='xlsx_max_rows',
+                        help=f'Максимальное количество трансакций на листе xlsx файла (по умолчанию {utils.XLSX_MAX_ROWS - 1} - предел Excel)')
+    parser.add_argument('--timings', action='store_true', default=False, dest='timings', help='Вывести в stderr время выполнения этапов конвертации в формате JSON')
+    parser.add_argument('--memory-profile', action='store_true', default=False, dest='memory_profile', help='Вывести в stderr пиковую и оставшуюся занятой память по этапам конвертации в формате JSON (замедляет конвертацию)')
+    parser.add_argument('--profile-out', type=str, default=None, dest='profile_out', help=f'Директория, в которую записывается профиль конвертации (.pstats и .collapsed для flamegraph). Также может быть задана переменной окружения {profiling.PROFILE_OUT_ENV_VAR}')
+    parser.add_argument('-a', '--append', action='store_true', default=False, dest='append', help='Дописать в уже существующий файл только новые трансакции (только для csv, parquet, sqlite)')
 
     return parser
 
+def get_output_and_messages_redirection(output_file_name_argument:str):
+    """
+    If the output is requested to stdout ('-o -'), then stdout is reserved for the data and all messages
+    are redirected to stderr.
+    Returns the output (file name or stream) and the context manager, within which the conversion shall be done
+    """
+    if output_file_name_argument == utils.STDOUT_FILE_NAME:
+        return sys.stdout, contextlib.redirect_stdout(sys.stderr)
+
+    return output_file_name_argument, contextlib.nullcontext()
+
+def get_timings_collection(timings_requested:bool):
+    """
+    Timings are collected only on request (see timings.py).
+    Returns the context manager, which yields the collected timings or None
+    """
+    if timings_requested:
+        return timings.collect()
+
+    return contextlib.nullcontext()
+
+def get_memory_profile_collection(memory_profile_requested:bool):
+    """
+    Memory is profiled only on request, as tracemalloc slows down the conversion.
+    Returns the context manager, which yields the memory profile or None
+    """
+    if memory_profile_requested:
+        return memory_profile.collect()
+
+    return contextlib.nullcontext()
+
 def main():
 
     # print(extractors.get_list_extractors_in_text())
@@ -150,13 +540,27 @@ def main():
                                      parents=[genarate_PDFtext2Excel_argparser()])
     args = parser.parse_args()
 
-    print(args)
+    output_file_name, messages_redirection = get_output_and_messages_redirection(args.output_Excel_file_name)
+
+    with messages_redirection, get_timings_collection(args.timings) as collected_timings, \
+            get_memory_profile_collection(args.memory_profile) as collected_memory_profile, \
+            profiling.profile(args.input_file_name, args.profile_out):
+        print(args)
+
+        sberbankPDFtext2Excel(input_txt_file_name=args.input_file_name,
+                              output_file_name = output_file_name,
+                              format=args.format,
+                              perform_balance_check = args.perform_balance_check,
+                              output_file_type=args.output_file_type,
+                              append=args.append,
+                              xlsx_partition=args.xlsx_partition,
+                              xlsx_max_rows=args.xlsx_max_rows)
+
+    if args.timings:
+        timings.print_json({"file": args.input_file_name, **collected_timings.to_dict()})
 
-    sberbankPDFtext2Excel(input_txt_file_name=args.input_file_name,
-                          output_file_name = args.output_Excel_file_name,
-                          format=args.format,
-                          perform_balance_check = args.perform_balance_check,
-                          output_file_type=args.output_file_type)
+    if args.memory_profile:
+        memory_profile.print_json({"file": args.input_file_name, **collected_memory_profile.to_dict()})
 
 
 if __name__=='__main__':
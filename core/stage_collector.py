@@ -0,0 +1,112 @@
+"""
+Сбор показателей по этапам конвертации: общая часть timings.py и memory_profile.py
+
+Внутри блока collect() все этапы, обёрнутые в measure(), записывают свои показатели, количество вызовов и
+количество обработанных элементов. Набор показателей этапа и способ их замера задаёт подкласс StageCollection.
+Собираемые показатели хранятся в contextvars, поэтому каждый поток, запущенный с копией контекста, пишет в тот же
+набор, а вне блока collect() measure() ничего не делает
+"""
+
+import sys
+import json
+import contextlib
+import contextvars
+
+
+class StageCollection:
+    """
+    Measured values, amount of calls and item counts per stage.
+    Subclasses define the measured values of a stage (_new_stage()) and how they are measured
+    (start_stage() and finish_stage())
+    """
+
+    def __init__(self):
+        # stage name : {measured values of _new_stage(), "calls": int, "counts": {count name : int}}
+        self.stages = {}
+
+    def _new_stage(self) -> dict:
+        return {}
+
+    def _get_stage(self, stage_name:str) -> dict:
+        stage = self.stages.get(stage_name)
+        if stage is None:
+            stage = self.stages[stage_name] = {**self._new_stage(), "calls": 0, "counts": {}}
+
+        return stage
+
+    def start_stage(self):
+        """
+        Starts measuring a stage. Returns the state, which is given back to finish_stage()
+        """
+        return None
+
+    def finish_stage(self, stage_name:str, state, **counts) -> None:
+        """
+        Records the stage, started by start_stage(). Subclasses add their measured values and call this function
+        """
+        self._get_stage(stage_name)["calls"] += 1
+        self.add_counts(stage_name, **counts)
+
+    def add_counts(self, stage_name:str, **counts) -> None:
+        stage_counts = self._get_stage(stage_name)["counts"]
+        for count_name, count in counts.items():
+            stage_counts[count_name] = stage_counts.get(count_name, 0) + count
+
+    def to_dict(self) -> dict:
+        return {"stages": self.stages}
+
+
+class StageCollector:
+    """
+    Collection of the current context: collect(), measure() and add_counts() of one kind of measurements
+    """
+
+    def __init__(self, name:str, collection_type:type):
+        self._active_collection = contextvars.ContextVar(name, default=None)
+        self._collection_type = collection_type
+
+    @contextlib.contextmanager
+    def collect(self):
+        """
+        Collects all stages, measured within this block. The whole block is recorded as stage 'total'
+        """
+        collection = self._collection_type()
+        token = self._active_collection.set(collection)
+
+        state = collection.start_stage()
+        try:
+            yield collection
+        finally:
+            collection.finish_stage("total", state)
+            self._active_collection.reset(token)
+
+    @contextlib.contextmanager
+    def measure(self, stage_name:str, **counts):
+        """
+        Measures the block as the stage stage_name. counts - amount of processed items (e.g. pages=1)
+        """
+        collection = self._active_collection.get()
+        if collection is None:
+            yield
+            return
+
+        state = collection.start_stage()
+        try:
+            yield
+        finally:
+            collection.finish_stage(stage_name, state, **counts)
+
+    def add_counts(self, stage_name:str, **counts) -> None:
+        """
+        Adds item counts to the stage, when they become known only after the stage is measured
+        """
+        collection = self._active_collection.get()
+        if collection is not None:
+            collection.add_counts(stage_name, **counts)
+
+
+def print_json(data:dict) -> None:
+    """
+    Prints collected stages as one line of JSON to stderr, so that they are not mixed with the messages and data in stdout
+    """
+    print(json.dumps(data, ensure_ascii=False), file=sys.stderr)
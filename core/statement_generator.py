@@ -0,0 +1,298 @@
+"""
+Генератор синтетических выписок в формате промежуточного текстового файла (такого, какой создаёт pdf2txtev.py)
+
+Позволяет тестировать и замерять скорость конвертации без настоящих выписок. Для каждого поддерживаемого формата
+(SBER_DEBIT_2005, SBER_DEBIT_2107, SBER_CREDIT_2107, SBER_PAYMENT_2208) создаётся текст, который:
+    - содержит шапку с балансом периода, который сходится с суммой всех трансакций
+    - содержит остатки после каждой трансакции (для форматов, где они есть)
+    - содержит описания операций, перенесённые на следующую строку
+    - содержит суммы в иностранной валюте (только для форматов, экстракторы которых их поддерживают:
+      SBER_DEBIT_2005, SBER_DEBIT_2107)
+    - разбит на страницы с колонтитулами и строкой "Продолжение на следующей странице"
+
+*********************************************
+при использовании из командной строки
+*********************************************
+py statement_generator.py <формат> <количество трансакций> <имя файла> [-s SEED]
+
+*********************************************
+при использовании в качестве модуля
+*********************************************
+использовать функции generate_statement_text() или write_statement()
+"""
+
+import sys
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Iterator, TextIO
+
+SUPPORTED_FORMATS = ['SBER_DEBIT_2005', 'SBER_DEBIT_2107', 'SBER_CREDIT_2107', 'SBER_PAYMENT_2208']
+
+# formats, extractors of which understand amounts in the currency of the operation
+FORMATS_WITH_FOREIGN_CURRENCY = ['SBER_DEBIT_2005', 'SBER_DEBIT_2107']
+
+CATEGORIES = ['Супермаркеты', 'Рестораны и кафе', 'Транспорт', 'Перевод с карты', 'Перевод на карту',
+              'Выдача наличных', 'Все для дома', 'Отдых и развлечения', 'Здоровье и красота', 'Прочие операции']
+
+INCOME_CATEGORIES = ['Перевод на карту', 'Зарплата', 'Прочие выплаты']
+
+BANK_FEE_CATEGORY = 'Комиссия банка'
+
+DESCRIPTION_WORDS = ['SBOL', 'перевод', 'PYATEROCHKA', 'MOSKVA', 'RUS', 'YANDEX', 'TAXI', 'OZON', 'APTEKA',
+                     'ИВАН', 'ИВАНОВИЧ', 'И.', 'КОМИССИЯ', 'ЗА', 'ВЫДАЧУ', 'НАЛИЧНЫХ', 'MAGNIT', 'WB', '1234****5678']
+
+CURRENCIES = [('€', 'EUR'), ('$', 'USD'), ('₸', 'KZT')]
+
+# descriptions longer than this are wrapped to the next line, as it happens in real statements
+MAX_DESCRIPTION_LINE_LENGTH = 40
+
+ENTRIES_PER_PAGE = (8, 14)
+
+PAGE_CONTINUATION = 'Продолжение на следующей странице'
+
+START_BALANCE_KOPECKS = 10_000_000
+
+
+def _format_money(kopecks:int, plus_sign:bool = False) -> str:
+    """
+    Formats kopecks like Sberbank does: 118940 -> '1 189,40'
+    """
+    sign = '-' if kopecks < 0 else ('+' if plus_sign else '')
+    rubles, kopecks = divmod(abs(kopecks), 100)
+    return f"{sign}{rubles:,}".replace(',', ' ') + f",{kopecks:02d}"
+
+
+def _iter_transactions(format_name:str, qnt_transactions:int, seed:int) -> Iterator[dict]:
+    """
+    Generates transactions. Amounts are in kopecks: income is positive, spending is negative.
+    The same seed always gives the same transactions, therefore the generator can be run twice:
+    first to calculate totals for the header, then to write the transactions
+    """
+    rnd = random.Random(seed)
+    operation_date = datetime(2021, 1, 1)
+    with_foreign_currency = format_name in FORMATS_WITH_FOREIGN_CURRENCY
+
+    for _ in range(qnt_transactions):
+        operation_date += timedelta(minutes=rnd.randint(1, 300))
+
+        kind = rnd.random()
+        if kind < 0.1:
+            value = rnd.randint(100_00, 150_000_00)
+            category = rnd.choice(INCOME_CATEGORIES)
+        elif kind < 0.13:
+            value = -rnd.randint(10_00, 500_00)
+            category = BANK_FEE_CATEGORY
+        else:
+            value = -rnd.randint(1_00, 50_000_00)
+            category = rnd.choice(CATEGORIES)
+
+        # long descriptions are wrapped to the next line. They are not longer than two lines, which fit into
+        # the column of the description in PDF (see statement_pdf_generator.py)
+        description = ' '.join(rnd.choices(DESCRIPTION_WORDS, k=rnd.choice((2, 3, 4, 6))))
+
+        transaction = {'operation_date': operation_date,
+                       'processing_date': operation_date.replace(hour=0, minute=0) + timedelta(days=rnd.randint(0, 2)),
+                       'authorisation_code': str(rnd.randint(100000, 999999)) if rnd.random() < 0.9 else '-',
+                       'category': category,
+                       'description': description,
+                       'value': value,
+                       'foreign_value': None,
+                       'currency': None}
+
+        if with_foreign_currency and value < 0 and rnd.random() < 0.05:
+            # amounts in the currency of the operation are below 1000 only, as the extractors split them on the first space
+            transaction['foreign_value'] = -rnd.randint(1_00, 999_99)
+            transaction['currency'] = rnd.choice(CURRENCIES)
+
+        yield transaction
+
+
+def _split_description(description:str) -> tuple:
+    """
+    Returns (1st line, rest or None)
+    """
+    if len(description) <= MAX_DESCRIPTION_LINE_LENGTH:
+        return description, None
+
+    split_position = description.rfind(' ', 0, MAX_DESCRIPTION_LINE_LENGTH)
+    return description[:split_position], description[split_position + 1:]
+
+
+def _get_totals(format_name:str, qnt_transactions:int, seed:int) -> dict:
+    totals = {'income': 0, 'spending': 0, 'bank_fees': 0, 'last_date': datetime(2021, 1, 1)}
+    for transaction in _iter_transactions(format_name, qnt_transactions, seed):
+        if transaction['value'] > 0:
+            totals['income'] += transaction['value']
+        elif transaction['category'] == BANK_FEE_CATEGORY:
+            totals['bank_fees'] -= transaction['value']
+        else:
+            totals['spending'] -= transaction['value']
+        totals['last_date'] = transaction['operation_date']
+
+    return totals
+
+
+def _render_header(format_name:str, totals:dict) -> str:
+    start_date = '01.01.2021'
+    end_date = totals['last_date'].strftime('%d.%m.%Y')
+    spending = totals['spending'] + totals['bank_fees']
+    end_balance = START_BALANCE_KOPECKS + totals['income'] - spending
+
+    header = 'ПАО Сбербанк. Генеральная лицензия Банка России на осуществление банковских операций 1481\n' \
+             'ул. Вавилова, д. 19, Москва, 117312\t19 Vavilova St., Moscow, 117312\n' \
+             '900\t+7 495 500-55-50\twww.sberbank.ru\n' \
+             'Сформировано в СберБанк Онлайн\n'
+
+    if format_name == 'SBER_DEBIT_2005':
+        return header + 'Выписка по счёту дебетовой карты\n' \
+                        'Visa Classic\n' \
+                        f'Итого по операциям с {start_date} по {end_date}\n' \
+                        f'ОСТАТОК НА {start_date}\t{_format_money(START_BALANCE_KOPECKS)}\n' \
+                        f'СУММА ПОПОЛНЕНИЙ\t{_format_money(totals["income"])}\n' \
+                        f'СУММА СПИСАНИЙ\t{_format_money(spending)}\n' \
+                        f'ОСТАТОК НА {end_date}\t{_format_money(end_balance)}\n\n'
+
+    if format_name == 'SBER_DEBIT_2107':
+        return header + 'Выписка по счёту дебетовой карты\n' \
+                        'MasterCard Mass\n\n' \
+                        f'ОСТАТОК НА {start_date}\tОСТАТОК НА {end_date}\tВСЕГО СПИСАНИЙ\tВСЕГО ПОПОЛНЕНИЙ\n' \
+                        f'{_format_money(START_BALANCE_KOPECKS)}\t{_format_money(end_balance)}\t{_format_money(spending)}\t{_format_money(totals["income"])}\n\n'
+
+    if format_name == 'SBER_CREDIT_2107':
+        return header + 'Выписка по счёту кредитной карты\n' \
+                        'Visa Gold\n\n' \
+                        'СУММА ПОПОЛНЕНИЙ\tСУММА СПИСАНИЙ\tСУММА СПИСАНИЙ БАНКА\n' \
+                        f'{_format_money(totals["income"])}\t{_format_money(totals["spending"])}\t{_format_money(totals["bank_fees"])}\n\n'
+
+    if format_name == 'SBER_PAYMENT_2208':
+        return header + 'Выписка по платёжному счёту\n\n' \
+                        f'ОСТАТОК НА {start_date}\tОСТАТОК НА {end_date}\tВСЕГО СПИСАНИЙ\tВСЕГО ПОПОЛНЕНИЙ\n' \
+                        f'{_format_money(START_BALANCE_KOPECKS)}\t{_format_money(end_balance)}\t{_format_money(spending)}\t{_format_money(totals["income"])}\n\n'
+
+    raise ValueError(f"Неизвестный формат выписки '{format_name}'")
+
+
+def _render_transaction(format_name:str, transaction:dict, remainder:int) -> str:
+    operation_date = transaction['operation_date'].strftime('%d.%m.%Y')
+    operation_time = transaction['operation_date'].strftime('%H:%M')
+    processing_date = transaction['processing_date'].strftime('%d.%m.%Y')
+    code = transaction['authorisation_code']
+    category = transaction['category']
+    description, description_rest = _split_description(transaction['description'])
+
+    if format_name == 'SBER_PAYMENT_2208':
+        # in this format the sign of the amount is written explicitly
+        value = _format_money(transaction['value'], plus_sign=True)
+    else:
+        # spending is written without sign, income - with '+'
+        value = _format_money(abs(transaction['value']), plus_sign=transaction['value'] > 0)
+
+    if format_name == 'SBER_DEBIT_2005':
+        lines = [f'{operation_date} {operation_time}\t{description}\t{value}\t{_format_money(remainder)}']
+        if description_rest:
+            lines.append(description_rest)
+
+        last_line = f'{processing_date} / {code}\t{category}'
+        if transaction['currency']:
+            last_line += f'\t({_format_money(abs(transaction["foreign_value"]))} {transaction["currency"][1]})'
+        lines.append(last_line)
+
+    elif format_name == 'SBER_DEBIT_2107':
+        second_line = f'{processing_date}\t{code}\t{description}'
+        if transaction['currency']:
+            second_line += f'\t{_format_money(abs(transaction["foreign_value"]))} {transaction["currency"][0]}'
+
+        lines = [f'{operation_date}\t{operation_time}\t{category}\t{value}\t{_format_money(remainder)}', second_line]
+        if description_rest:
+            lines.append(description_rest)
+
+    elif format_name == 'SBER_CREDIT_2107':
+        lines = [f'{operation_date}\t{operation_time}\t{category}\t{value}',
+                 f'{processing_date}\t{code}\t{description}']
+        if description_rest:
+            lines.append(description_rest)
+
+    else:
+        lines = [f'{operation_date}\t{operation_time}\t{description}\t{value}\t{_format_money(remainder)}',
+                 f'{processing_date}\t{code}\t{category}']
+        if description_rest:
+            lines.append(description_rest)
+
+    return '\n'.join(lines) + '\n'
+
+
+def _render_table_header(format_name:str) -> str:
+    """
+    Two lines of the header of the table of transactions, which is repeated on every page
+    """
+    if format_name == 'SBER_DEBIT_2005':
+        return 'ДАТА ОПЕРАЦИИ (МСК)\tОПИСАНИЕ ОПЕРАЦИИ\tСУММА В ВАЛЮТЕ СЧЁТА\tОСТАТОК СРЕДСТВ\n' \
+               'Дата обработки и код авторизации\tКатегория\tСумма в валюте операции\n'
+
+    return 'ДАТА ОПЕРАЦИИ (МСК)\tКАТЕГОРИЯ\tСУММА В ВАЛЮТЕ СЧЁТА\tОСТАТОК СРЕДСТВ В ВАЛЮТЕ СЧЁТА\n' \
+           'Дата обработки и код авторизации\tОписание операции\tСумма в валюте операции\n'
+
+
+def _render_page_break(format_name:str, page_number:int) -> str:
+    return f'{PAGE_CONTINUATION}\nСтраница {page_number - 1}\n' + _render_table_header(format_name)
+
+
+def write_statement_text(output:TextIO, format_name:str, qnt_transactions:int, seed:int = 0) -> None:
+    """
+    Writes synthetic statement to the text stream output. Transactions are written one by one,
+    therefore even statements with millions of transactions are not kept in memory
+    """
+    if format_name not in SUPPORTED_FORMATS:
+        raise ValueError(f"Неизвестный формат выписки '{format_name}'")
+
+    output.write(_render_header(format_name, _get_totals(format_name, qnt_transactions, seed)))
+    output.write(_render_table_header(format_name))
+
+    rnd = random.Random(seed + 1)
+    remainder = START_BALANCE_KOPECKS
+    page_number = 1
+    entries_left_on_page = rnd.randint(*ENTRIES_PER_PAGE)
+
+    for transaction in _iter_transactions(format_name, qnt_transactions, seed):
+        if entries_left_on_page == 0:
+            page_number += 1
+            output.write(_render_page_break(format_name, page_number))
+            entries_left_on_page = rnd.randint(*ENTRIES_PER_PAGE)
+
+        remainder += transaction['value']
+        output.write(_render_transaction(format_name, transaction, remainder))
+        entries_left_on_page -= 1
+
+    output.write(f'{PAGE_CONTINUATION}\nРеквизиты для перевода\nПолучатель\tИВАНОВ ИВАН ИВАНОВИЧ\n')
+
+
+def generate_statement_text(format_name:str, qnt_transactions:int, seed:int = 0) -> str:
+    """
+    Returns synthetic statement of the format format_name with qnt_transactions transactions
+    """
+    import io
+
+    output = io.StringIO()
+    write_statement_text(output, format_name, qnt_transactions, seed)
+    return output.getvalue()
+
+
+def write_statement(file_name:str, format_name:str, qnt_transactions:int, seed:int = 0) -> None:
+    with open(file_name, 'w', encoding='utf-8') as output_file:
+        write_statement_text(output_file, format_name, qnt_transactions, seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических выписок в формате промежуточного текстового файла')
+    parser.add_argument('format', choices=SUPPORTED_FORMATS, help='Формат выписки')
+    parser.add_argument('transactions', type=int, help='Количество трансакций')
+    parser.add_argument('output_file_name', help='Имя создаваемого текстового файла')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    args = parser.parse_args()
+
+    write_statement(args.output_file_name, args.format, args.transactions, args.seed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import re
+
+import pytest
+import pandas as pd
+
+import utils
+import timings
+import exceptions
+import extractors_generic
+import statement_generator
+from sberbankPDFtext2Excel import sberbankPDFtext2Excel
+
+
+@pytest.mark.parametrize("format_name", statement_generator.SUPPORTED_FORMATS)
+def test_generated_statement_is_detected_and_converted(format_name, tmp_path):
+    input_file_name = str(tmp_path / "statement.txt")
+    statement_generator.write_statement(input_file_name, format_name, 300, seed=1)
+
+    with open(input_file_name, encoding="utf-8") as input_file:
+        assert extractors_generic.determine_extractor_auto(input_file.read()).__name__ == format_name
+
+    # balance in the header shall be consistent with the transactions, otherwise the conversion fails
+    sberbankPDFtext2Excel(input_file_name, output_file_type="csv", perform_balance_check=True)
+
+    assert len(pd.read_csv(str(tmp_path / "statement.csv"), sep=";")) == 300
+
+
+def test_generator_is_deterministic():
+    assert statement_generator.generate_statement_text("SBER_DEBIT_2107", 50, seed=7) == \
+           statement_generator.generate_statement_text("SBER_DEBIT_2107", 50, seed=7)
+
+
+@pytest.mark.parametrize("format_name", ["SBER_DEBIT_2005", "SBER_DEBIT_2107", "SBER_PAYMENT_2208"])
+@pytest.mark.parametrize("output_file_type", ["csv", "jsonl", "xlsx"])
+def test_first_transaction_with_wrong_value_is_reported(format_name, output_file_type, tmp_path):
+    lines = statement_generator.generate_statement_text(format_name, 300, seed=1).splitlines(keepends=True)
+
+    # the last digit of the value of the 37th transaction is changed
+    entry_line_numbers = [line_number for line_number, line in enumerate(lines) if re.match(r'\d\d\.\d\d\.\d\d\d\d[ \t]\d\d:\d\d', line)]
+    wrong_line_number = entry_line_numbers[36]
+    line_parts = lines[wrong_line_number].split('\t')
+    line_parts[-2] = line_parts[-2][:-1] + str((int(line_parts[-2][-1]) + 1) % 10)
+    lines[wrong_line_number] = '\t'.join(line_parts)
+
+    input_file_name = str(tmp_path / "statement.txt")
+    with open(input_file_name, "w", encoding="utf-8") as input_file:
+        input_file.write(''.join(lines))
+
+    with pytest.raises(exceptions.BalanceVerificationError, match=f"трансакции № 37 .*строка {wrong_line_number + 1} "):
+        sberbankPDFtext2Excel(input_file_name, output_file_type=output_file_type, perform_balance_check=True)
+
+    # xlsx and jsonl are written before the balance is verified, but no output is left after the failed check
+    assert not (tmp_path / f"statement.{output_file_type}").exists()
+
+
+def test_big_statement_is_split_into_xlsx_sheets(tmp_path):
+    input_file_name = str(tmp_path / "statement.txt")
+    statement_generator.write_statement(input_file_name, "SBER_DEBIT_2107", 300, seed=1)
+
+    sberbankPDFtext2Excel(input_file_name, output_file_type="xlsx", perform_balance_check=True,
+                          xlsx_partition=utils.XLSX_PARTITION_WORKBOOKS, xlsx_max_rows=120)
+
+    assert [file.name for file in sorted(tmp_path.glob("*.xlsx"))] == ["statement.xlsx", "statement_2.xlsx", "statement_3.xlsx"]
+
+
+def test_several_output_types_are_written_from_one_decomposition(tmp_path):
+    input_file_name = str(tmp_path / "statement.txt")
+    statement_generator.write_statement(input_file_name, "SBER_DEBIT_2107", 300, seed=1)
+
+    with timings.collect() as collected_timings:
+        sberbankPDFtext2Excel(input_file_name, str(tmp_path / "all"), output_file_type="xlsx,csv,jsonl", perform_balance_check=True)
+
+    stages = collected_timings.to_dict()["stages"]
+    assert stages["decompose_entry_to_dict"]["counts"] == {"entries": 300}
+    assert all(stages["write_" + output_file_type]["counts"] == {"rows": 300} for output_file_type in ("xlsx", "csv", "jsonl"))
+
+    # the files are the same as written one by one
+    for output_file_type in ("csv", "jsonl"):
+        sberbankPDFtext2Excel(input_file_name, str(tmp_path / "single"), output_file_type=output_file_type)
+        assert (tmp_path / f"all.{output_file_type}").read_text(encoding="utf-8") == \
+               (tmp_path / f"single.{output_file_type}").read_text(encoding="utf-8")
+
+    assert (tmp_path / "all.xlsx").exists()
+
+    with pytest.raises(exceptions.UserInputError):
+        sberbankPDFtext2Excel(input_file_name, output_file_type="csv,pdf")
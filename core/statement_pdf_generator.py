@@ -0,0 +1,232 @@
+"""
+Генератор синтетических выписок в формате PDF
+
+Текст синтетической выписки (statement_generator.py) раскладывается по страницам в виде таблицы: каждая часть строки,
+которая в промежуточном текстовом файле отделена табуляцией, выводится отдельным текстовым блоком в своей колонке.
+Страница заканчивается строкой "Продолжение на следующей странице". Таким образом pdf2txtev.py должен получить из
+такого PDF исходный текст, что позволяет замерять скорость и проверять качество разбора PDF без настоящих выписок.
+
+PDF создаётся без сторонних библиотек и записывается постранично, поэтому можно создавать файлы в тысячи страниц.
+Шрифт не встраивается: используется шрифт с метриками Helvetica и кодировкой cp1251 (кириллица), поэтому программы
+просмотра подставляют похожий шрифт. Символы, которых нет в cp1251, заменяются на '?'
+
+*********************************************
+при использовании из командной строки
+*********************************************
+py statement_pdf_generator.py <формат> <количество трансакций> <имя файла> [-s SEED]
+
+*********************************************
+при использовании в качестве модуля
+*********************************************
+использовать функцию write_statement_pdf()
+"""
+
+import sys
+import argparse
+from typing import List, Union
+
+import statement_generator
+
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 36
+FONT_SIZE = 8
+LINE_HEIGHT = 11
+
+# default x coordinates of the columns. A column is moved to the right, if the text of the previous one is too long
+COLUMNS_X = [MARGIN, 130, 220, 400, 500]
+MIN_COLUMN_GAP = 12
+
+# x coordinates of the cells of the header of the table. As in real statements 'ДАТА ОПЕРАЦИИ (МСК)' is above
+# the columns of both the date and the time of the operation, so that every header cell is above its column
+TABLE_HEADER_COLUMNS_X = {'SBER_DEBIT_2005': [MARGIN, 130, 220, 400]}
+DEFAULT_TABLE_HEADER_COLUMNS_X = [MARGIN, 220, 400, 500]
+
+# x coordinate of the wrapped part of the description of an operation, which is a separate line without tabs
+DESCRIPTION_COLUMN_X = {'SBER_DEBIT_2005': 130}
+DEFAULT_DESCRIPTION_COLUMN_X = 220
+
+TABLE_HEADER_STARTS = ('ДАТА ОПЕРАЦИИ', 'Дата обработки и код авторизации')
+TABLE_END_STARTS = (statement_generator.PAGE_CONTINUATION, 'Реквизиты для перевода')
+
+# name of the font is not one of the standard PDF fonts on purpose: for standard fonts PDF readers (including pdfminer)
+# take glyph widths from their built-in metrics, which do not have cyrillic glyphs, and ignore /Widths of the font
+FONT_NAME = 'StatementSans'
+
+# average widths of Helvetica glyphs, 1/1000 of the font size
+CHAR_WIDTH = 556
+SPACE_WIDTH = 278
+
+ENCODING = 'cp1251'
+
+
+def _get_text_width(text:str) -> float:
+    return sum(SPACE_WIDTH if char == ' ' else CHAR_WIDTH for char in text) * FONT_SIZE / 1000
+
+
+def _encode_pdf_string(text:str) -> str:
+    """
+    Encodes text as a PDF literal string in cp1251. Non ASCII bytes are written as octal escapes
+    """
+    result = []
+    for byte in text.encode(ENCODING, errors='replace'):
+        if byte in b'()\\':
+            result.append('\\' + chr(byte))
+        elif 32 <= byte < 127:
+            result.append(chr(byte))
+        else:
+            result.append(f'\\{byte:03o}')
+
+    return '(' + ''.join(result) + ')'
+
+
+def _get_font_object() -> str:
+    """
+    Font with cp1251 encoding: bytes above 127 are mapped to unicode glyph names like /uni0410
+    """
+    differences = []
+    for code in range(128, 256):
+        char = bytes([code]).decode(ENCODING, errors='ignore')
+        if char:
+            differences.append(f'{code} /uni{ord(char):04X}')
+
+    widths = ' '.join(str(SPACE_WIDTH if code == 32 else CHAR_WIDTH) for code in range(32, 256))
+
+    return (f'<< /Type /Font /Subtype /Type1 /BaseFont /{FONT_NAME} /FontDescriptor 4 0 R '
+            f'/Encoding << /Type /Encoding /BaseEncoding /WinAnsiEncoding /Differences [{" ".join(differences)}] >> '
+            f'/FirstChar 32 /LastChar 255 /Widths [{widths}] >>')
+
+
+def _render_page_content(lines:List[str], format_name:Union[str, None] = None) -> bytes:
+    """
+    Content stream of one page. Every tab separated part of the line is a separate text object in its column.
+    If the format of the statement is given, the header of the table and wrapped descriptions are placed
+    above and in the columns of the transactions (see TABLE_HEADER_COLUMNS_X and DESCRIPTION_COLUMN_X)
+    """
+    commands = []
+    y = PAGE_HEIGHT - MARGIN
+    in_table = False
+
+    for line in lines:
+        cells = line.split('\t')
+        columns_x = COLUMNS_X
+
+        if format_name is not None:
+            if line.startswith(TABLE_HEADER_STARTS):
+                columns_x = TABLE_HEADER_COLUMNS_X.get(format_name, DEFAULT_TABLE_HEADER_COLUMNS_X)
+                in_table = True
+            elif line.startswith(TABLE_END_STARTS):
+                in_table = False
+            elif in_table and len(cells) == 1:
+                columns_x = [DESCRIPTION_COLUMN_X.get(format_name, DEFAULT_DESCRIPTION_COLUMN_X)]
+
+        x_min = 0.0
+        for column_index, cell in enumerate(cells):
+            column_x = columns_x[column_index] if column_index < len(columns_x) else columns_x[-1]
+            x = max(column_x, x_min)
+            commands.append(f'BT /F1 {FONT_SIZE} Tf {x:.2f} {y} Td {_encode_pdf_string(cell)} Tj ET')
+            x_min = x + _get_text_width(cell) + MIN_COLUMN_GAP
+
+        y -= LINE_HEIGHT
+
+    return '\n'.join(commands).encode('latin-1')
+
+
+def split_text_on_pages(text:str) -> List[List[str]]:
+    """
+    Splits the text of a synthetic statement on pages after every 'Продолжение на следующей странице'.
+    Empty lines are skipped, as they do not produce any text in PDF
+    """
+    max_lines_per_page = (PAGE_HEIGHT - 2 * MARGIN) // LINE_HEIGHT
+
+    pages = [[]]
+    for line in text.split('\n'):
+        if not line:
+            continue
+
+        if len(pages[-1]) >= max_lines_per_page:
+            pages.append([])
+
+        pages[-1].append(line)
+
+        if line == statement_generator.PAGE_CONTINUATION:
+            pages.append([])
+
+    return [page for page in pages if page]
+
+
+def write_pdf(output, pages:List[List[str]], format_name:Union[str, None] = None) -> None:
+    """
+    Writes PDF with the given pages (lists of lines) to the binary stream output
+    format_name - format of the statement, the text of which is written (see _render_page_content())
+    """
+    offsets = {}
+    position = 0
+
+    def write_object(object_number:int, content:bytes) -> None:
+        nonlocal position
+        offsets[object_number] = position
+        data = f'{object_number} 0 obj\n'.encode('latin-1') + content + b'\nendobj\n'
+        output.write(data)
+        position += len(data)
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    output.write(header)
+    position += len(header)
+
+    # 1 - catalog, 2 - pages tree, 3 - font, 4 - font descriptor, then page and its content for every page
+    write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+    write_object(3, _get_font_object().encode('latin-1'))
+    write_object(4, f'<< /Type /FontDescriptor /FontName /{FONT_NAME} /Flags 32 /FontBBox [-166 -225 1000 931] '
+                    f'/ItalicAngle 0 /Ascent 718 /Descent -207 /CapHeight 718 /StemV 88 >>'.encode('latin-1'))
+
+    page_numbers = []
+    for page_index, lines in enumerate(pages):
+        page_object_number = 5 + 2 * page_index
+        content = _render_page_content(lines, format_name)
+
+        write_object(page_object_number,
+                     f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] '
+                     f'/Resources << /Font << /F1 3 0 R >> >> /Contents {page_object_number + 1} 0 R >>'.encode('latin-1'))
+        write_object(page_object_number + 1,
+                     f'<< /Length {len(content)} >>\nstream\n'.encode('latin-1') + content + b'\nendstream')
+        page_numbers.append(page_object_number)
+
+    kids = ' '.join(f'{page_number} 0 R' for page_number in page_numbers)
+    write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>'.encode('latin-1'))
+
+    qnt_objects = max(offsets) + 1
+    xref = [f'xref\n0 {qnt_objects}\n', '0000000000 65535 f \n']
+    xref.extend(f'{offsets[object_number]:010d} 00000 n \n' for object_number in range(1, qnt_objects))
+    xref.append(f'trailer\n<< /Size {qnt_objects} /Root 1 0 R >>\nstartxref\n{position}\n%%EOF\n')
+    output.write(''.join(xref).encode('latin-1'))
+
+
+def write_statement_pdf(file_name:str, format_name:str, qnt_transactions:int, seed:int = 0) -> str:
+    """
+    Creates synthetic statement in PDF format. Returns the text, from which the PDF was created
+    (without empty lines), so that the result of the PDF conversion can be compared with it
+    """
+    text = statement_generator.generate_statement_text(format_name, qnt_transactions, seed)
+    pages = split_text_on_pages(text)
+
+    with open(file_name, 'wb') as output_file:
+        write_pdf(output_file, pages, format_name)
+
+    text = ''.join(line + '\n' for page in pages for line in page)
+    return text.encode(ENCODING, errors='replace').decode(ENCODING)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Генератор синтетических выписок в формате PDF')
+    parser.add_argument('format', choices=statement_generator.SUPPORTED_FORMATS, help='Формат выписки')
+    parser.add_argument('transactions', type=int, help='Количество трансакций (примерно 11 трансакций на страницу)')
+    parser.add_argument('output_file_name', help='Имя создаваемого PDF файла')
+    parser.add_argument('-s', '--seed', type=int, default=0, help='Начальное значение генератора случайных чисел')
+    args = parser.parse_args()
+
+    write_statement_pdf(args.output_file_name, args.format, args.transactions, args.seed)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,67 @@
+import pytest
+import pandas as pd
+
+import pdf2txtev
+import exceptions
+import progress_events
+import statement_generator
+import statement_pdf_generator
+from sberbankPDF2Excel import sberbankPDF2Excel, convert_pdf_to_text, PROBE_QNT_PAGES
+
+
+@pytest.mark.parametrize("format_name", statement_generator.SUPPORTED_FORMATS)
+def test_pdf_text_is_the_same_as_the_generated_text(format_name, tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    expected_text = statement_pdf_generator.write_statement_pdf(pdf_file_name, format_name, 40, seed=2)
+
+    assert pdf2txtev.pdf_2_text(pdf_file_name) == expected_text
+
+
+def test_qnt_pages(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    text = statement_generator.generate_statement_text("SBER_DEBIT_2107", 100)
+    qnt_pages = len(statement_pdf_generator.split_text_on_pages(text))
+    statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_DEBIT_2107", 100)
+
+    assert qnt_pages > 1
+    assert pdf2txtev.get_qnt_pages(pdf_file_name) == qnt_pages
+    assert pdf2txtev.get_qnt_pages(pdf_file_name, maxpages=1) == 1
+    assert pdf2txtev.get_qnt_pages(pdf_file_name, page_numbers=[0, 1, 1000]) == 2
+
+
+def test_generated_pdf_is_converted(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_CREDIT_2107", 50, seed=3)
+
+    sberbankPDF2Excel(pdf_file_name, output_file_type="csv", perform_balance_check=True)
+
+    assert len(pd.read_csv(str(tmp_path / "statement.csv"), sep=";")) == 50
+
+
+def _get_laid_out_pages(progress_callback_events:list) -> list:
+    return [event["page"] for event in progress_callback_events if event["event"] == progress_events.EVENT_PAGE_LAID_OUT]
+
+
+def test_unsupported_pdf_is_rejected_after_the_first_pages(tmp_path):
+    pdf_file_name = str(tmp_path / "unsupported.pdf")
+    with open(pdf_file_name, "wb") as pdf_file:
+        statement_pdf_generator.write_pdf(pdf_file, [[f"Страница {page} строка {line}" for line in range(40)] for page in range(10)])
+
+    events = []
+    with pytest.raises(exceptions.InputFileStructureError):
+        sberbankPDF2Excel(pdf_file_name, output_file_type="csv", progress_callback=events.append)
+
+    assert _get_laid_out_pages(events) == list(range(1, PROBE_QNT_PAGES + 1))
+
+
+def test_probed_pages_are_not_laid_out_again(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    txt_file_name = str(tmp_path / "statement.txt")
+    expected_text = statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_PAYMENT_2208", 100)
+
+    events = []
+    assert convert_pdf_to_text(pdf_file_name, txt_file_name, progress_callback=events.append) == "SBER_PAYMENT_2208"
+
+    assert _get_laid_out_pages(events) == list(range(1, pdf2txtev.get_qnt_pages(pdf_file_name) + 1))
+    with open(txt_file_name, encoding="utf-8") as txt_file:
+        assert txt_file.read() == expected_text
@@ -0,0 +1,103 @@
+"""
+Замер времени по этапам конвертации (ключ --timings)
+
+Внутри блока timings.collect() все этапы, обёрнутые в timings.measure(), записывают своё время (wall - реальное
+время, cpu - процессорное время процесса), количество вызовов и количество обработанных элементов
+(страниц, текстовых блоков, трансакций, строк). Вне блока timings.collect() timings.measure() ничего не делает,
+поэтому обычная конвертация не тратит время на замеры.
+
+С ключом --timings результаты выводятся в stderr в виде JSON, по одной строке на файл. В пакетном режиме
+в конце выводится ещё одна строка с перцентилями по всем файлам (см. aggregate()).
+Общая с memory_profile.py часть (collect, measure, add_counts) находится в stage_collector.py
+
+Этапы:
+    format_probe          разбор первых страниц PDF выписки и определение формата по ним (см. sberbankPDF2Excel.convert_pdf_to_text)
+    pdf_interpretation    интерпретация страниц PDF библиотекой pdfminer (pages)
+    layout_to_matrix      _list_LTTextBoxHorizontal_2_matrix и _matrix_2_txt (boxes)
+    layout_to_table_rows  _list_LTTextBoxHorizontal_2_matrix и _matrix_2_table_rows в структурированном режиме (boxes)
+    determine_extractor   определение формата выписки
+    classify_lines        разметка строк текста: шапка, баланс, трансакции, колонтитулы страниц, окончание
+    split_text_on_entries разбиение текста на трансакции (entries)
+    decompose_entry_to_dict разбор трансакций (entries)
+    dataframe_construction создание dataframe и приведение типов (rows)
+    balance_check         сверка баланса
+    write_<тип файла>     запись результата (rows). Для jsonl и xlsx включает в себя и разбор трансакций
+                          Если задано несколько типов файлов, они записываются параллельно, и cpu этих этапов - время всего процесса
+    total                 вся конвертация
+"""
+
+import time
+from typing import List
+
+import stage_collector
+
+
+class Timings(stage_collector.StageCollection):
+    """
+    Wall time, CPU time, amount of calls and item counts per stage
+    """
+
+    def _new_stage(self) -> dict:
+        return {"wall": 0.0, "cpu": 0.0}
+
+    def start_stage(self) -> tuple:
+        return time.perf_counter(), time.process_time()
+
+    def finish_stage(self, stage_name:str, state:tuple, **counts) -> None:
+        start_wall, start_cpu = state
+
+        stage = self._get_stage(stage_name)
+        stage["wall"] += time.perf_counter() - start_wall
+        stage["cpu"] += time.process_time() - start_cpu
+        super().finish_stage(stage_name, state, **counts)
+
+
+_collector = stage_collector.StageCollector("active_timings", Timings)
+
+collect = _collector.collect
+measure = _collector.measure
+add_counts = _collector.add_counts
+print_json = stage_collector.print_json
+
+
+def _percentile(sorted_values:List[float], percent:float) -> float:
+    """
+    Nearest-rank percentile of already sorted values
+    """
+    rank = max(1, -(-len(sorted_values) * percent // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def aggregate(timings_list:List[dict]) -> dict:
+    """
+    Aggregates timings (results of Timings.to_dict()) of many files:
+    percentiles p50, p90, p99, max and sum of wall and CPU time per stage and total item counts
+    """
+    stage_names = []
+    for file_timings in timings_list:
+        for stage_name in file_timings["stages"]:
+            if stage_name not in stage_names:
+                stage_names.append(stage_name)
+
+    result = {"files": len(timings_list), "stages": {}}
+    for stage_name in stage_names:
+        stages = [file_timings["stages"][stage_name] for file_timings in timings_list if stage_name in file_timings["stages"]]
+
+        aggregated_stage = {}
+        for time_kind in ("wall", "cpu"):
+            values = sorted(stage[time_kind] for stage in stages)
+            aggregated_stage[time_kind] = {"p50": _percentile(values, 50),
+                                           "p90": _percentile(values, 90),
+                                           "p99": _percentile(values, 99),
+                                           "max": values[-1],
+                                           "sum": sum(values)}
+
+        counts = {}
+        for stage in stages:
+            for count_name, count in stage["counts"].items():
+                counts[count_name] = counts.get(count_name, 0) + count
+        aggregated_stage["counts"] = counts
+
+        result["stages"][stage_name] = aggregated_stage
+
+    return result
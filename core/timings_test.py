@@ -0,0 +1,31 @@
+import timings
+
+
+def test_measure_is_recorded_only_inside_collect():
+    with timings.measure("outside", items=1):
+        pass
+
+    with timings.collect() as collected_timings:
+        for _ in range(3):
+            with timings.measure("stage", pages=1):
+                pass
+        timings.add_counts("stage", boxes=10)
+
+    stages = collected_timings.to_dict()["stages"]
+
+    assert set(stages) == {"stage", "total"}
+    assert stages["stage"]["calls"] == 3
+    assert stages["stage"]["counts"] == {"pages": 3, "boxes": 10}
+
+
+def test_aggregate_percentiles():
+    timings_list = [{"stages": {"stage": {"wall": float(wall), "cpu": 0.0, "calls": 1, "counts": {"rows": 1}}}}
+                    for wall in range(1, 101)]
+
+    aggregated = timings.aggregate(timings_list)["stages"]["stage"]
+
+    assert aggregated["wall"]["p50"] == 50.0
+    assert aggregated["wall"]["p90"] == 90.0
+    assert aggregated["wall"]["p99"] == 99.0
+    assert aggregated["wall"]["max"] == 100.0
+    assert aggregated["counts"] == {"rows": 100}
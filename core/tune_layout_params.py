@@ -0,0 +1,200 @@
+"""
+Подбор параметров разбора PDF (LAParams) для экстракторов на корпусе выписок
+
+Параметры разбора (char_margin, line_margin, word_margin) определяют, на сколько текстовых блоков pdfminer разбивает
+страницу, и заметно влияют на время получения layout. Параметры по умолчанию (pdf2txtev.DEFAULT_LAYOUT_PARAMS)
+дробят текст на очень много блоков, но подходят для всех форматов. Экстрактор может объявить свои параметры
+(Extractor.layout_params), этот модуль помогает их подобрать.
+
+Для каждого PDF файла корпуса сначала получается эталон: текст с параметрами по умолчанию, формат выписки и список
+трансакций. Файлы, которые уже с параметрами по умолчанию не проходят сверку баланса, в подборе не участвуют.
+Затем для каждого набора параметров из сетки (все сочетания значений --char-margins, --line-margins, --word-margins)
+замеряется время разбора PDF и проверяется, что:
+    трансакции, полученные тем же экстрактором, совпадают с эталонными
+    баланс из шапки выписки совпадает с балансом, вычисленным по трансакциям
+Для каждого формата выбирается самый быстрый набор параметров, с которым результат верен на всех файлах этого
+формата, и выводится строка для класса экстрактора: layout_params = {...}
+
+Корпус должен состоять из настоящих выписок. Для проверки самого модуля можно использовать синтетические PDF выписки
+(ключ --synthetic, см. statement_pdf_generator.py), но параметры, подобранные на них, не стоит переносить в экстракторы.
+
+Usage:
+    py tune_layout_params.py <PDF файлы или директории> [-f FORMAT] [--char-margins ...] [--line-margins ...] [--word-margins ...] [-r REPEAT]
+    py tune_layout_params.py --synthetic QNT_TRANSACTIONS
+"""
+
+import os
+import sys
+import time
+import argparse
+import itertools
+import tempfile
+from typing import List, Union
+
+import accounting
+import extractors
+import pdf2txtev
+import statement_generator
+import statement_pdf_generator
+from sberbankPDF2ExcelBatch import get_input_files
+from extractors_generic import determine_extractor_auto, determine_extractor_by_name
+
+DEFAULT_CHAR_MARGINS = [0.001, 0.1, 0.5, 2.0]
+DEFAULT_LINE_MARGINS = [0.001, 0.1, 0.5]
+DEFAULT_WORD_MARGINS = [0.1, 0.5]
+
+
+def get_candidates(char_margins:List[float], line_margins:List[float], word_margins:List[float]) -> List[dict]:
+    """
+    All combinations of the values as keyword arguments of LAParams
+    """
+    return [{"char_margin": char_margin, "line_margin": line_margin, "word_margin": word_margin}
+            for char_margin, line_margin, word_margin in itertools.product(char_margins, line_margins, word_margins)]
+
+
+def parse_statement(text:str, extractor_type:type) -> list:
+    """
+    Returns transactions of the text. Raises an exception, if the text can not be parsed or the balance check fails
+    """
+    extractor = extractor_type(text)
+    balance = extractor.get_period_balance()
+    entries = extractor.get_entries()
+
+    balance_column = extractor.get_column_name_for_balance_calculation()
+    accounting.check_balance(balance, sum(accounting.get_kopecks_from_money(entry.get(balance_column, '0')) for entry in entries))
+
+    return entries
+
+
+def _measure_pdf_2_text(pdf_file_name:str, layout_params:Union[dict, None], repeat:int) -> tuple:
+    """
+    Returns (text, the shortest time of repeat conversions in seconds)
+    """
+    laparams = pdf2txtev.get_laparams(layout_params)
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = pdf2txtev.pdf_2_text(pdf_file_name, laparams=laparams)
+        seconds.append(time.perf_counter() - start)
+
+    return text, min(seconds)
+
+
+def tune(pdf_file_names:List[str], candidates:List[dict], format:str = 'auto', repeat:int = 1) -> dict:
+    """
+    Returns {"skipped": [(file name, error), ...],
+             "extractors": {extractor name: {"files": [...],
+                                             "candidates": [{"layout_params": ..., "seconds": ..., "errors": [...]}, ...],
+                                             "best": layout_params of the fastest candidate without errors or None}}}
+    seconds - total time of conversion of all files of the format
+    """
+    skipped = []
+    # extractor name : (extractor class, [(file name, reference transactions), ...])
+    references = {}
+
+    for pdf_file_name in pdf_file_names:
+        try:
+            text, _ = _measure_pdf_2_text(pdf_file_name, None, 1)
+            extractor_type = determine_extractor_auto(text) if format == 'auto' else determine_extractor_by_name(format)
+            entries = parse_statement(text, extractor_type)
+        except Exception as e:
+            skipped.append((pdf_file_name, f"{type(e).__name__}: {e}"))
+            continue
+
+        references.setdefault(extractor_type.__name__, (extractor_type, []))[1].append((pdf_file_name, entries))
+
+    results = {}
+    for extractor_name, (extractor_type, files) in references.items():
+        candidate_results = []
+        for layout_params in candidates:
+            seconds = 0.0
+            errors = []
+            for pdf_file_name, reference_entries in files:
+                text, pdf_seconds = _measure_pdf_2_text(pdf_file_name, layout_params, repeat)
+                seconds += pdf_seconds
+                try:
+                    if parse_statement(text, extractor_type) != reference_entries:
+                        errors.append(f"{pdf_file_name}: трансакции отличаются от полученных с параметрами по умолчанию")
+                except Exception as e:
+                    errors.append(f"{pdf_file_name}: {type(e).__name__}: {e}")
+
+            candidate_results.append({"layout_params": layout_params, "seconds": seconds, "errors": errors})
+
+        valid_results = [result for result in candidate_results if not result["errors"]]
+        best = min(valid_results, key=lambda result: result["seconds"])["layout_params"] if valid_results else None
+
+        results[extractor_name] = {"files": [pdf_file_name for pdf_file_name, _ in files],
+                                   "candidates": candidate_results,
+                                   "best": best}
+
+    return {"skipped": skipped, "extractors": results}
+
+
+def write_synthetic_corpus(directory:str, qnt_transactions:int) -> List[str]:
+    """
+    Creates a synthetic PDF statement of every format, which statement_generator supports
+    """
+    pdf_file_names = []
+    for format_name in statement_generator.SUPPORTED_FORMATS:
+        pdf_file_name = os.path.join(directory, format_name + ".pdf")
+        statement_pdf_generator.write_statement_pdf(pdf_file_name, format_name, qnt_transactions)
+        pdf_file_names.append(pdf_file_name)
+
+    return pdf_file_names
+
+
+def print_results(results:dict) -> None:
+    for pdf_file_name, error in results["skipped"]:
+        print(f"Файл {pdf_file_name} не участвует в подборе: с параметрами по умолчанию он не конвертируется\n    {error}")
+
+    for extractor_name, extractor_results in results["extractors"].items():
+        print("*" * 30)
+        print(f"{extractor_name}, файлов: {len(extractor_results['files'])}")
+        print(f"{'char_margin':>12}{'line_margin':>12}{'word_margin':>12}{'сек':>10}  результат")
+        for result in sorted(extractor_results["candidates"], key=lambda result: result["seconds"]):
+            layout_params = result["layout_params"]
+            status = "верный" if not result["errors"] else f"ошибок: {len(result['errors'])}, {result['errors'][0]}"
+            print(f"{layout_params['char_margin']:>12}{layout_params['line_margin']:>12}{layout_params['word_margin']:>12}"
+                  f"{result['seconds']:>10.3f}  {status}")
+
+        if extractor_results["best"] is None:
+            print("Ни один набор параметров не даёт верного результата")
+        else:
+            print(f"Самые быстрые параметры с верным результатом. Для класса {extractor_name}:")
+            print(f"    layout_params = {extractor_results['best']!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Подбор параметров разбора PDF (LAParams) для экстракторов на корпусе выписок')
+    parser.add_argument('inputs', type=str, nargs='*', help='PDF выписки или директории с ними')
+    parser.add_argument('-f', '--format', type=str, default='auto', choices=['auto'] + extractors.get_list_extractors_in_text(),
+                        help='Формат выписок. По умолчанию определяется для каждого файла')
+    parser.add_argument('--char-margins', type=float, nargs='+', default=DEFAULT_CHAR_MARGINS, help='Значения char_margin')
+    parser.add_argument('--line-margins', type=float, nargs='+', default=DEFAULT_LINE_MARGINS, help='Значения line_margin')
+    parser.add_argument('--word-margins', type=float, nargs='+', default=DEFAULT_WORD_MARGINS, help='Значения word_margin')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='Сколько раз замерять разбор каждого файла (берётся лучшее время)')
+    parser.add_argument('--synthetic', type=int, default=None, dest='qnt_synthetic_transactions', metavar='QNT_TRANSACTIONS',
+                        help='Вместо корпуса использовать синтетические выписки всех форматов с таким количеством трансакций')
+    args = parser.parse_args()
+
+    candidates = get_candidates(args.char_margins, args.line_margins, args.word_margins)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.qnt_synthetic_transactions:
+            pdf_file_names = write_synthetic_corpus(tmp_dir, args.qnt_synthetic_transactions)
+        else:
+            pdf_file_names = get_input_files(args.inputs)
+
+        if not pdf_file_names:
+            print("Не заданы PDF выписки")
+            return 1
+
+        results = tune(pdf_file_names, candidates, args.format, args.repeat)
+
+    print_results(results)
+
+    return 0 if results["extractors"] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
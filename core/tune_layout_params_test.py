@@ -0,0 +1,49 @@
+import pdf2txtev
+import extractors
+import statement_pdf_generator
+import tune_layout_params
+from sberbankPDF2Excel import convert_pdf_to_text
+
+
+def test_tune_rejects_parameters_which_change_transactions(tmp_path):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_DEBIT_2107", 30, seed=1)
+
+    # line_margin=0.5 merges lines of the header into one text box
+    candidates = tune_layout_params.get_candidates([0.001], [0.001, 0.5], [0.1])
+    results = tune_layout_params.tune([pdf_file_name], candidates)
+
+    assert results["skipped"] == []
+    extractor_results = results["extractors"]["SBER_DEBIT_2107"]
+    errors = {result["layout_params"]["line_margin"]: result["errors"] for result in extractor_results["candidates"]}
+    assert errors[0.001] == []
+    assert errors[0.5]
+    assert extractor_results["best"] == {"char_margin": 0.001, "line_margin": 0.001, "word_margin": 0.1}
+
+
+def test_layout_params_of_the_extractor_are_used(tmp_path, monkeypatch):
+    pdf_file_name = str(tmp_path / "statement.pdf")
+    txt_file_name = str(tmp_path / "statement.txt")
+    statement_pdf_generator.write_statement_pdf(pdf_file_name, "SBER_DEBIT_2005", 30, seed=1)
+
+    used_layout_params = []
+    get_laparams = pdf2txtev.get_laparams
+    monkeypatch.setattr(pdf2txtev, "get_laparams", lambda layout_params=None: used_layout_params.append(layout_params) or get_laparams(layout_params))
+
+    assert convert_pdf_to_text(pdf_file_name, txt_file_name) == "SBER_DEBIT_2005"
+    assert used_layout_params == [None]
+
+    layout_params = {"char_margin": 0.1}
+    monkeypatch.setattr(extractors.get_extractor("SBER_DEBIT_2005"), "layout_params", layout_params)
+    used_layout_params.clear()
+
+    # the first pages are laid out again with the parameters of the detected extractor
+    assert convert_pdf_to_text(pdf_file_name, txt_file_name) == "SBER_DEBIT_2005"
+    assert used_layout_params == [None, layout_params]
+
+    used_layout_params.clear()
+    convert_pdf_to_text(pdf_file_name, txt_file_name, "SBER_DEBIT_2005")
+    assert used_layout_params == [layout_params]
+
+    assert get_laparams(layout_params).char_margin == 0.1
+    assert get_laparams(layout_params).line_margin == pdf2txtev.DEFAULT_LAYOUT_PARAMS["line_margin"]
@@ -1,15 +1,93 @@
 #coding=utf-8
 '''
 Разные отдельностоящие функции, которые используются в других модулях
+
+Тяжёлые зависимости (pandas, unidecode) импортируются только внутри функций, которым они нужны,
+чтобы не замедлять запуск утилиты
 '''
+from __future__ import annotations
 
-import unidecode
 import re
-import pandas as pd
+import os
+import sys
+import json
+import math
+import sqlite3
+import importlib.util
+from datetime import datetime
+from contextlib import closing
 from typing import *
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 import exceptions
 import version_info
+import accounting
+
+# all output file types, supported by the function write_df_to_file
+OUTPUT_FILE_TYPES = ["xlsx", "csv", "parquet", "sqlite", "jsonl"]
+
+# output file types, to which new transactions can be appended without rewriting existing data
+APPENDABLE_OUTPUT_FILE_TYPES = ["csv", "parquet", "sqlite"]
+
+# parquet and sqlite store money as int64 kopecks in columns, whose names have this suffix, so that they are not
+# confused with the same columns in rubles in other formats and in files, written by older versions
+KOPECKS_COLUMN_SUFFIX = " (коп.)"
+
+# rows of the dataframe, which are converted and written to csv at once
+CSV_CHUNK_ROWS = 100_000
+
+# pandas writes parquet with one of these optional packages
+PARQUET_ENGINES = ["pyarrow", "fastparquet"]
+
+# output file types, which can be written to a stream (e.g. stdout) instead of a file
+STREAMABLE_OUTPUT_FILE_TYPES = ["csv", "jsonl"]
+
+# output file name, which means "write to stdout"
+STDOUT_FILE_NAME = "-"
+
+# name of the table in the sqlite output file
+SQLITE_TABLE_NAME = "data"
+
+# Excel limit of rows in one sheet, the header row included
+XLSX_MAX_ROWS = 1048576
+
+# ways to split xlsx output into partitions (see XlsxPartitionedWriter)
+XLSX_PARTITION_ROWS = "rows"             # the next sheet data_2, data_3, ... when the sheet is full
+XLSX_PARTITION_YEAR = "year"             # a sheet per year of the operation: data_2021, data_2022, ...
+XLSX_PARTITION_MONTH = "month"           # a sheet per month of the operation: data_2021-01, data_2021-02, ...
+XLSX_PARTITION_WORKBOOKS = "workbooks"   # the next workbook <name>_2.xlsx, <name>_3.xlsx, ... when the sheet is full
+XLSX_PARTITION_MODES = [XLSX_PARTITION_ROWS, XLSX_PARTITION_YEAR, XLSX_PARTITION_MONTH, XLSX_PARTITION_WORKBOOKS]
+
+# kinds of transaction fields (see Extractor.get_columns_types()), which define their compact data type in the dataframe
+COLUMN_TYPE_DATETIME = "datetime"   # datetime64
+COLUMN_TYPE_MONEY = "money"         # int64 kopecks
+COLUMN_TYPE_CATEGORY = "category"   # pandas categorical, for text fields with few distinct values
+COLUMN_TYPE_TEXT = "text"           # left as is
+
+def get_output_file_types(output_file_type:Union[str, List[str]]) -> List[str]:
+    """
+    Returns the list of output file types from one type, comma separated types ("xlsx,csv,parquet") or a list of them.
+    Repeated types are written once
+    """
+    if isinstance(output_file_type, str):
+        output_file_type = output_file_type.split(",")
+
+    output_file_types = []
+    for file_type in output_file_type:
+        file_type = file_type.strip().lower()
+        if file_type not in OUTPUT_FILE_TYPES:
+            raise exceptions.UserInputError(f"Неподдерживаемый тип файла '{file_type}', возможные типы: {', '.join(OUTPUT_FILE_TYPES)}")
+
+        # checked before the conversion starts, so that a big statement is not parsed in vain
+        if file_type == "parquet" and not any(importlib.util.find_spec(engine) for engine in PARQUET_ENGINES):
+            raise exceptions.UserInputError("Для формата parquet требуется установить пакет pyarrow (pip install pyarrow)")
+
+        if file_type not in output_file_types:
+            output_file_types.append(file_type)
+
+    return output_file_types
 
 def get_float_from_money(money_str: str, process_no_sign_as_negative=False) -> float:
     """
@@ -19,23 +97,20 @@ def get_float_from_money(money_str: str, process_no_sign_as_negative=False) -> f
     Example:
     get_float_from_money('1 189,40', True) -> -1189.4
     """
-    
-    money_str = unidecode.unidecode(money_str)
-    # избавляемся от пробелов
-    money_str = money_str.replace(' ','')
-    # заменяем запятую на точку
-    money_str = money_str.replace(',','.')
-
-    leading_plus = False
-    if money_str[0] == '+':
-        leading_plus = True
-
-    money_float = float(money_str)
+    # parsing is done in exact integer kopecks. Division of two integers gives exactly the same float as float('1189.40')
+    return accounting.get_kopecks_from_money(money_str, process_no_sign_as_negative) / 100
 
-    if (process_no_sign_as_negative and not leading_plus):
-        money_float = -1*money_float
+def get_signed_money(money_str: str, process_no_sign_as_negative=False) -> str:
+    """
+    Checks money string and returns it with its actual sign. See accounting.get_signed_money()
+    """
+    return accounting.get_signed_money(money_str, process_no_sign_as_negative)
 
-    return money_float
+def get_kopecks_from_money(money_str: str, process_no_sign_as_negative=False) -> int:
+    """
+    Converts string, representing money to an integer amount of kopecks. See accounting.get_kopecks_from_money()
+    """
+    return accounting.get_kopecks_from_money(money_str, process_no_sign_as_negative)
 
 def split_Sberbank_line(line:str)->List[str]:
     """
@@ -54,68 +129,474 @@ def rename_sort_df(df:pd.DataFrame, columns_info:dict)->pd.DataFrame:
     df = df.rename(columns = columns_info)
     return df
 
-def check_transactions_balance(input_pd: pd.DataFrame, balance: float, column_name_for_balance_calculation:str)->None:
+def compact_df_dtypes(df:pd.DataFrame, columns_types:dict)->pd.DataFrame:
+    """
+    Converts columns of the dataframe to compact data types according to their kind (see COLUMN_TYPE_*)
+    Money is converted to int64 kopecks (nullable Int64 only if some values are missing).
+    Columns, which are not mentioned in columns_types, are left as is
+    """
+    import pandas as pd
+
+    for column, column_type in columns_types.items():
+        if column not in df.columns:
+            continue
+
+        if column_type == COLUMN_TYPE_DATETIME:
+            df[column] = pd.to_datetime(df[column], dayfirst=True)
+
+        elif column_type == COLUMN_TYPE_MONEY:
+            # extractors return money as strings (see accounting.get_signed_money()), which are parsed to kopecks
+            # at once for the whole column. Integer columns already hold kopecks
+            if not pd.api.types.is_integer_dtype(df[column]):
+                df[column] = accounting.money_series_to_kopecks(df[column])
+
+        elif column_type == COLUMN_TYPE_CATEGORY:
+            df[column] = df[column].astype("category")
+
+    return df
+
+def kopecks_to_rubles(df:pd.DataFrame, money_columns:List[str])->pd.DataFrame:
+    """
+    Returns a copy of the dataframe, where int64 kopecks in money_columns are converted back to float rubles
+    """
+    return df.assign(**{column: df[column].astype("float64") / 100 for column in money_columns if column in df.columns})
+
+def _iter_rows_in_rubles(df:pd.DataFrame, money_columns:List[str])->Iterator[tuple]:
+    """
+    Yields rows of the dataframe as tuples, where int64 kopecks in money_columns are converted to float rubles
+    value by value, so that the dataframe itself is not copied. Missing money is returned as None
+    """
+    import pandas as pd
+
+    money_positions = {position for position, column in enumerate(df.columns) if column in money_columns}
+
+    for row in df.itertuples(index=False, name=None):
+        yield tuple((None if pd.isna(value) else value / 100) if position in money_positions else value
+                    for position, value in enumerate(row))
+
+def check_transactions_balance(input_pd: pd.DataFrame, balance: int, column_name_for_balance_calculation:str)->None:
     """
     сравниваем вычисленный баланс периода (get_period_balance) и баланс периода, полученный сложением всех трансакций в
     pandas dataframe.
 
-    Если разница одна копейка или больше, то выдаётся ошибка
+    Баланс и колонка column_name_for_balance_calculation заданы в копейках (см. compact_df_dtypes()), поэтому
+    сравнение точное: при любой разнице выдаётся ошибка
+    """
+    calculated_balance = int(input_pd[column_name_for_balance_calculation].sum())
+    accounting.check_balance(balance, calculated_balance)
+
+def _to_json_value(value):
+    """
+    Converts a value of a transaction field to a value, which can be serialised to JSON
+    Dates are converted to ISO-8601 strings, missing values to None
+    """
+    # pd.Timestamp is a subclass of datetime. pd.NaT, like NaN, is not equal to itself
+    if isinstance(value, datetime):
+        return None if value != value else value.isoformat()
+
+    if isinstance(value, float) and math.isnan(value):
+        return None
+
+    return value
+
+def write_entries_to_jsonl(entries:Iterable[dict],
+                           output:Union[str, TextIO],
+                           columns:List[str])->int:
+    """
+    Writes transactions to JSON Lines format: one JSON object per line.
+    Every transaction is written as soon as it is received, so that the whole list is never kept in memory
+
+    output - either a file name (with extension) or an already opened text stream (e.g. sys.stdout)
+    columns - keys of the transaction dictionaries in the order they shall appear in every JSON object
+
+    returns amount of written transactions
     """
-    calculated_balance = input_pd[column_name_for_balance_calculation].sum()
-    if (abs(balance-calculated_balance) >= 0.01):
-        raise exceptions.BalanceVerificationError(f"""
-            Ошибка проверки балланса по трансакциям: 
-                Вычисленный баланс по информации в шапке выписки = {balance}
-                Вычисленный баланс по всем трансакциям = {calculated_balance}
-        """)
+    is_stream = not isinstance(output, str)
+
+    output_stream = output if is_stream else open(output, "w", encoding="utf-8")
+
+    qnt_entries = 0
+    try:
+        for entry in entries:
+            output_stream.write(json.dumps({column: _to_json_value(entry.get(column)) for column in columns},
+                                           ensure_ascii=False) + "\n")
+
+            # downstream consumer shall be able to start working before the whole statement is processed
+            if is_stream:
+                output_stream.flush()
+
+            qnt_entries += 1
+    finally:
+        if not is_stream:
+            output_stream.close()
+
+    return qnt_entries
+
+class XlsxPartitionedWriter:
+    """
+    Writes transactions to xlsx row by row. Sheets are created in the constant memory mode of xlsxwriter:
+    every row is flushed to a temporary file as soon as the next one is written, so that neither the dataframe
+    nor the whole sheet has to be kept in memory.
+
+    A sheet holds at most max_rows transactions (Excel allows XLSX_MAX_ROWS rows including the header).
+    Transactions, which do not fit, go to the next partition: the next sheet or, for XLSX_PARTITION_WORKBOOKS,
+    the next workbook. For XLSX_PARTITION_YEAR and XLSX_PARTITION_MONTH every period of the first date column
+    (the operation date) gets its own sheet from the beginning.
+    The Info sheet of the first workbook lists all partitions, it is written by close()
+    """
+
+    def __init__(self,
+                 file_name:str,
+                 columns:List[str],
+                 partition:str = XLSX_PARTITION_ROWS,
+                 max_rows:int = XLSX_MAX_ROWS - 1,
+                 period_column:Union[int, None] = None):
+        """
+        file_name - name of the first workbook without extension
+        columns - titles of the columns in the order of the values of the rows
+        period_column - index of the date column, by which XLSX_PARTITION_YEAR and XLSX_PARTITION_MONTH split rows
+        """
+        if partition not in XLSX_PARTITION_MODES:
+            raise exceptions.UserInputError(f"Неизвестный способ разбиения xlsx файла '{partition}'")
+
+        if not 0 < max_rows < XLSX_MAX_ROWS:
+            raise exceptions.UserInputError(f"Количество трансакций на листе xlsx файла должно быть от 1 до {XLSX_MAX_ROWS - 1}")
+
+        if partition in (XLSX_PARTITION_YEAR, XLSX_PARTITION_MONTH) and period_column is None:
+            raise exceptions.UserInputError("Для разбиения xlsx файла по периодам нужна колонка с датой операции")
+
+        self.file_name = file_name
+        self.columns = columns
+        self.partition = partition
+        self.max_rows = max_rows
+        self.period_column = period_column
+
+        # [(file name, workbook)]. Workbooks stay open till close(), as Info sheets are written after all rows.
+        # In the constant memory mode an open workbook holds only its current row
+        self._workbooks = []
+        # [(file name, sheet name, amount of rows, number of the first transaction)]
+        self.partitions = []
+        # period (or None) : [index in self.partitions, worksheet] of the partition, to which rows are written now
+        self._current = {}
+        # period (or None) : amount of sheets of this period
+        self._qnt_sheets = {}
+        self._qnt_rows = 0
+
+    def _add_workbook(self):
+        import xlsxwriter
+
+        file_name = self.file_name + ("" if not self._workbooks else f"_{len(self._workbooks) + 1}") + ".xlsx"
+        workbook = xlsxwriter.Workbook(file_name, {'constant_memory': True,
+                                                   'default_date_format': 'dd.mm.yyyy HH:MM',
+                                                   'strings_to_formulas': False,
+                                                   'strings_to_urls': False})
+        self._workbooks.append((file_name, workbook))
+
+        return file_name, workbook
+
+    def _add_sheet(self, period:Union[str, None]) -> list:
+        if self.partition == XLSX_PARTITION_WORKBOOKS or not self._workbooks:
+            file_name, workbook = self._add_workbook()
+        else:
+            file_name, workbook = self._workbooks[-1]
+
+        sheet_name = "data" if period is None else f"data_{period}"
+        if self.partition != XLSX_PARTITION_WORKBOOKS:
+            self._qnt_sheets[period] = self._qnt_sheets.get(period, 0) + 1
+            if self._qnt_sheets[period] > 1:
+                sheet_name += f"_{self._qnt_sheets[period]}"
+
+        worksheet = workbook.add_worksheet(sheet_name)
+        worksheet.write_row(0, 0, self.columns, workbook.add_format({'bold': True}))
+
+        self.partitions.append((file_name, sheet_name, 0, self._qnt_rows + 1))
+        self._current[period] = [len(self.partitions) - 1, worksheet]
+        return self._current[period]
+
+    def _get_period(self, row:Sequence) -> Union[str, None]:
+        if self.partition not in (XLSX_PARTITION_YEAR, XLSX_PARTITION_MONTH):
+            return None
+
+        date = row[self.period_column]
+        if not isinstance(date, datetime) or date != date:
+            return None
+
+        return f"{date.year}" if self.partition == XLSX_PARTITION_YEAR else f"{date.year}-{date.month:02d}"
+
+    def write_row(self, row:Sequence) -> None:
+        period = self._get_period(row)
+        current = self._current.get(period)
+        if current is None or self.partitions[current[0]][2] == self.max_rows:
+            current = self._add_sheet(period)
+
+        partition_index, worksheet = current
+        file_name, sheet_name, qnt_rows, first_row = self.partitions[partition_index]
+
+        # missing values (NaN, NaT, None) are written as empty cells. NaN and NaT are not equal to themselves
+        worksheet.write_row(qnt_rows + 1, 0, [None if value != value else value for value in row])
+
+        self.partitions[partition_index] = (file_name, sheet_name, qnt_rows + 1, first_row)
+        self._qnt_rows += 1
+
+    def write_rows(self, rows:Iterable[Sequence]) -> int:
+        """
+        returns amount of written rows
+        """
+        qnt_rows = 0
+        for row in rows:
+            self.write_row(row)
+            qnt_rows += 1
+
+        return qnt_rows
+
+    def close(self, extractor_name:str, errors:str = "") -> List[str]:
+        """
+        Writes Info sheets and closes all workbooks. Returns names of the created files
+        """
+        if not self._workbooks:
+            # there are no transactions: the workbook still has the data sheet with the header
+            self._add_sheet(None)
+
+        for workbook_number, (file_name, workbook) in enumerate(self._workbooks, start=1):
+            info_worksheet = workbook.add_worksheet('Info')
+
+            info_worksheet.write('A3', f'Файл создан утилитой "{version_info.NAME}", доступной для скачивания по ссылке {version_info.PERMANENT_LOCATION}')
+            info_worksheet.write('A4', f'Версия утилиты "{version_info.VERSION}"')
+            info_worksheet.write('A5', f'Для выделения информации был использован экстрактор типа "{extractor_name}"')
+            info_worksheet.write('A6', f'Ошибки при конвертации: "{errors}"')
+
+            if workbook_number > 1:
+                info_worksheet.write('A8', f'Это часть {workbook_number} из {len(self._workbooks)}, список всех частей - на листе Info файла {self._workbooks[0][0]}')
+
+            elif len(self.partitions) > 1:
+                info_worksheet.write('A8', f'Трансакции не помещаются на один лист Excel и разделены на части ({len(self.partitions)}):')
+                info_worksheet.write_row('A9', ['Файл', 'Лист', 'Трансакций', 'Начиная с трансакции №'])
+                for row_number, (partition_file_name, sheet_name, qnt_rows, first_row) in enumerate(self.partitions, start=9):
+                    info_worksheet.write_row(row_number, 0, [os.path.basename(partition_file_name), sheet_name, qnt_rows, first_row])
+
+        for _, workbook in self._workbooks:
+            workbook.close()
+
+        return [file_name for file_name, _ in self._workbooks]
+
+    def discard(self) -> None:
+        """
+        Closes all workbooks and deletes the created files, e.g. when the balance check fails after all rows are written
+        """
+        for file_name, workbook in self._workbooks:
+            if not workbook.fileclosed:
+                workbook.close()
+            if os.path.exists(file_name):
+                os.remove(file_name)
 
 def write_df_to_file(df:pd.DataFrame, 
-                        filename:str, 
+                        filename:Union[str, TextIO], 
                         extractor_name:str, 
                         errors:str="",
-                        output_file_format:str="xlsx")->None:
+                        output_file_format:str="xlsx",
+                        append:bool=False,
+                        money_columns:Union[List[str], None]=None,
+                        xlsx_partition:str=XLSX_PARTITION_ROWS,
+                        xlsx_max_rows:int=XLSX_MAX_ROWS - 1)->None:
     """
-        output_file_format - supported values xlsx, csv
+        output_file_format - supported values see OUTPUT_FILE_TYPES
+        filename - file name without extension or, for STREAMABLE_OUTPUT_FILE_TYPES, an opened text stream
+        append - if True, rows of df are added to the already existing file instead of overwriting it.
+            Supported only for APPENDABLE_OUTPUT_FILE_TYPES
+        money_columns - columns, which hold money as int64 kopecks (see compact_df_dtypes()).
+            parquet and sqlite store them as they are in columns with KOPECKS_COLUMN_SUFFIX, other formats get rubles,
+            converted while the rows are written
+        xlsx_partition, xlsx_max_rows - how transactions, which do not fit into one sheet, are split (see XlsxPartitionedWriter)
     """
 
     global version_info
 
-    def print_message_about_file_creation(file_name:str)->None:
-        print(f"Создан файл {file_name}")
+    import pandas as pd
 
-    filename = filename + "." + output_file_format
+    def print_message_about_file_creation(file_name:Union[str, TextIO])->None:
+        # nothing is created, if the data is written to a stream
+        if isinstance(file_name, str):
+            print(f"Создан файл {file_name}")
+
+    if isinstance(filename, str):
+        filename = filename + "." + output_file_format
+
+    elif output_file_format not in STREAMABLE_OUTPUT_FILE_TYPES or append:
+        raise exceptions.UserInputError(f"Вывод в поток не поддерживается для формата '{output_file_format}'")
+
+    if append and output_file_format not in APPENDABLE_OUTPUT_FILE_TYPES:
+        raise exceptions.UserInputError(f"Дописывание в существующий файл не поддерживается для формата '{output_file_format}'")
+
+    money_columns = [column for column in money_columns or [] if column in df.columns]
 
     if output_file_format == "xlsx":
+        datetime_columns = [column_number for column_number, dtype in enumerate(df.dtypes) if pd.api.types.is_datetime64_any_dtype(dtype)]
 
-        writer = pd.ExcelWriter(filename,
-                                engine='xlsxwriter',
-                                datetime_format='dd.mm.yyyy HH:MM')
+        xlsx_writer = XlsxPartitionedWriter(filename[:-len(".xlsx")],
+                                            list(df.columns),
+                                            partition=xlsx_partition,
+                                            max_rows=xlsx_max_rows,
+                                            period_column=datetime_columns[0] if datetime_columns else None)
+        try:
+            xlsx_writer.write_rows(_iter_rows_in_rubles(df, money_columns))
+        except:
+            xlsx_writer.discard()
+            raise
 
-        df.to_excel(writer, sheet_name='data', index=False)
+        for file_name in xlsx_writer.close(extractor_name, errors):
+            print_message_about_file_creation(file_name)
 
-        workbook = writer.book
-        info_worksheet = workbook.add_worksheet('Info')
+    elif output_file_format == "csv":
+        write_header = not (append and os.path.exists(filename))
 
-        info_worksheet.write('A3', f'Файл создан утилитой "{version_info.NAME}", доступной для скачивания по ссылке {version_info.PERMANENT_LOCATION}')
-        info_worksheet.write('A4', f'Версия утилиты "{version_info.VERSION}"')
-        info_worksheet.write('A5', f'Для выделения информации был использован экстрактор типа "{extractor_name}"')
-        info_worksheet.write('A6', f'Ошибки при конвертации: "{errors}"')
+        # money is converted to rubles chunk by chunk, so that only a chunk and not the whole dataframe is copied
+        for chunk_start in range(0, max(len(df), 1), CSV_CHUNK_ROWS):
+            chunk = kopecks_to_rubles(df.iloc[chunk_start:chunk_start + CSV_CHUNK_ROWS], money_columns)
 
-        writer.save()
+            chunk.to_csv(filename,
+                        sep=";",
+                        index=False,
+                        mode="a" if append or chunk_start > 0 else "w",
+                        header=write_header and chunk_start == 0
+                        # date_format='dd.mm.yyyy HH:MM'
+                        )
 
         print_message_about_file_creation(filename)
 
-    elif output_file_format == "csv":
-        df.to_csv(filename,
-                    sep=";",
-                    index=False,
-                    # date_format='dd.mm.yyyy HH:MM'
-                    )
+    elif output_file_format == "parquet":
+        if append and os.path.exists(filename):
+            _check_kopecks_columns(_get_existing_columns(filename, output_file_format), money_columns, filename)
+
+        df = _with_kopecks_column_names(df, money_columns)
+
+        if append:
+            # parquet file cannot be appended in place. Therefore in append mode the output is a parquet dataset:
+            # a directory, where every run adds a new part file
+            if os.path.isfile(filename):
+                raise exceptions.UserInputError(f"Для дописывания в формате parquet '{filename}' должен быть директорией, а не файлом")
+
+            os.makedirs(filename, exist_ok=True)
+            qnt_parts = len([name for name in os.listdir(filename) if name.endswith(".parquet")])
+            df.to_parquet(os.path.join(filename, f"part-{qnt_parts:05d}.parquet"), index=False)
+
+        else:
+            df.to_parquet(filename, index=False)
+
+        print_message_about_file_creation(filename)
+
+    elif output_file_format == "sqlite":
+        if append and os.path.exists(filename):
+            _check_kopecks_columns(_get_existing_columns(filename, output_file_format), money_columns, filename)
+
+        df = _with_kopecks_column_names(df, money_columns)
+
+        with closing(sqlite3.connect(filename)) as connection:
+            df.to_sql(SQLITE_TABLE_NAME,
+                      connection,
+                      index=False,
+                      if_exists="append" if append else "replace")
+
+        print_message_about_file_creation(filename)
+
+    elif output_file_format == "jsonl":
+        columns = list(df.columns)
+        write_entries_to_jsonl((dict(zip(columns, row)) for row in _iter_rows_in_rubles(df, money_columns)),
+                               filename,
+                               columns=columns)
 
         print_message_about_file_creation(filename)
+
     else:
         raise exceptions.UserInputError(f"not supported output file format '{output_file_format}' is gven to the function 'write_df_to_file'")
 
+def _with_kopecks_column_names(df:pd.DataFrame, money_columns:List[str])->pd.DataFrame:
+    """
+    Returns the dataframe with KOPECKS_COLUMN_SUFFIX added to the names of money_columns. The data is not copied
+    """
+    df = df.copy(deep=False)
+    df.columns = [column + KOPECKS_COLUMN_SUFFIX if column in money_columns else column for column in df.columns]
+    return df
+
+def _get_existing_columns(filename:str, output_file_format:str)->List[str]:
+    """
+    Names of the columns of the existing parquet (file or dataset directory) or sqlite output file
+    """
+    import pandas as pd
+
+    if output_file_format == "sqlite":
+        with closing(sqlite3.connect(filename)) as connection:
+            return [row[1] for row in connection.execute(f"PRAGMA table_info({SQLITE_TABLE_NAME})")]
+
+    if os.path.isdir(filename):
+        part_names = sorted(name for name in os.listdir(filename) if name.endswith(".parquet"))
+        if not part_names:
+            return []
+        filename = os.path.join(filename, part_names[0])
+
+    try:
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_schema(filename).names
+    except ImportError:
+        return list(pd.read_parquet(filename).columns)
+
+def _check_kopecks_columns(existing_columns:List[str], money_columns:List[str], filename:str)->None:
+    """
+    Raises UserInputError, if the file was written by an older version, which stored money in rubles
+    without KOPECKS_COLUMN_SUFFIX, so that kopecks are not mixed with rubles in the same file
+    """
+    for column in money_columns:
+        if column in existing_columns and column + KOPECKS_COLUMN_SUFFIX not in existing_columns:
+            raise exceptions.UserInputError(f"Файл {filename} создан предыдущей версией программы: суммы в нём записаны в рублях "
+                                            f"(колонка '{column}'). Дописать в него трансакции нельзя, создайте новый файл")
+
+def read_df_from_file(filename:str,
+                      output_file_format:str,
+                      money_columns:Union[List[str], None]=None,
+                      datetime_columns:Union[List[str], None]=None)->pd.DataFrame:
+    """
+    Reads back the transactions from the file, written by write_df_to_file() in one of APPENDABLE_OUTPUT_FILE_TYPES
+        filename - file name without extension
+        money_columns - columns with money, which are returned as int64 kopecks (as after compact_df_dtypes()).
+            csv holds them in rubles, parquet and sqlite in kopecks in columns with KOPECKS_COLUMN_SUFFIX (see write_df_to_file())
+        datetime_columns - columns, which are returned as datetime
+    Other columns are returned as text, as it was written
+    """
+    import pandas as pd
+
+    filename = filename + "." + output_file_format
+
+    if output_file_format == "csv":
+        df = pd.read_csv(filename, sep=";", dtype=str)
+
+    elif output_file_format == "parquet":
+        # a directory of part files, written in append mode, is read as one dataset
+        df = pd.read_parquet(filename)
+
+    elif output_file_format == "sqlite":
+        with closing(sqlite3.connect(filename)) as connection:
+            df = pd.read_sql(f"SELECT * FROM {SQLITE_TABLE_NAME}", connection)
+
+    else:
+        raise exceptions.UserInputError(f"Чтение из файла не поддерживается для формата '{output_file_format}'")
+
+    if output_file_format != "csv":
+        _check_kopecks_columns(list(df.columns), money_columns or [], filename)
+        df = df.rename(columns={column + KOPECKS_COLUMN_SUFFIX: column for column in money_columns or []})
+
+    for column in datetime_columns or []:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column])
+
+    for column in money_columns or []:
+        if column in df.columns:
+            kopecks = pd.to_numeric(df[column])
+            if output_file_format == "csv":
+                kopecks = (kopecks * 100).round()
+            df[column] = kopecks.astype("Int64" if kopecks.isna().any() else "int64")
+
+    return df
+
 def main():
     print('this module is not designed to work standalone')
 
@@ -0,0 +1,114 @@
+import re
+import json
+import sqlite3
+import zipfile
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import utils
+import exceptions
+
+
+def test_compact_df_dtypes_and_back_to_rubles():
+    df = pd.DataFrame({'operation_date': [datetime(2021, 7, 3, 12, 52), datetime(2021, 7, 4, 10, 0)],
+                       'category': ['Перевод с карты', 'Перевод с карты'],
+                       'value_account_currency': ['-3 500,00', '0,29'],
+                       'value_operational_currency': [None, '2,09']})
+
+    compact_df = utils.compact_df_dtypes(df, {'operation_date': utils.COLUMN_TYPE_DATETIME,
+                                              'category': utils.COLUMN_TYPE_CATEGORY,
+                                              'value_account_currency': utils.COLUMN_TYPE_MONEY,
+                                              'value_operational_currency': utils.COLUMN_TYPE_MONEY})
+
+    assert str(compact_df['category'].dtype) == 'category'
+    assert list(compact_df['value_account_currency']) == [-350000, 29]
+    assert compact_df['value_operational_currency'].isna().iloc[0]
+
+    rubles_df = utils.kopecks_to_rubles(compact_df, ['value_account_currency', 'value_operational_currency'])
+
+    assert list(rubles_df['value_account_currency']) == [-3500.0, 0.29]
+    assert rubles_df['value_operational_currency'].iloc[1] == 2.09
+
+
+def _read_xlsx_sheets(file_name:str) -> dict:
+    """
+    sheet name : amount of rows. xlsx is read without openpyxl, which is not a dependency
+    """
+    with zipfile.ZipFile(file_name) as xlsx_file:
+        sheet_names = re.findall(r'<sheet name="([^"]+)"', xlsx_file.read('xl/workbook.xml').decode('utf-8'))
+        return {sheet_name: xlsx_file.read(f'xl/worksheets/sheet{sheet_number}.xml').decode('utf-8').count('<row ')
+                for sheet_number, sheet_name in enumerate(sheet_names, start=1)}
+
+
+def test_xlsx_is_partitioned_when_sheet_is_full(tmp_path):
+    df = pd.DataFrame({'Дата операции': pd.date_range('2021-12-01', periods=50, freq='D'),
+                       'Сумма': [float(row_number) for row_number in range(50)]})
+
+    utils.write_df_to_file(df, str(tmp_path / "rows"), "SBER_DEBIT_2107", xlsx_max_rows=20)
+    # header + 20 rows. Info lists 3 partitions after its own 4 lines, the title and the header of the list
+    assert _read_xlsx_sheets(str(tmp_path / "rows.xlsx")) == {'data': 21, 'data_2': 21, 'data_3': 11, 'Info': 9}
+
+    utils.write_df_to_file(df, str(tmp_path / "year"), "SBER_DEBIT_2107", xlsx_partition=utils.XLSX_PARTITION_YEAR, xlsx_max_rows=20)
+    assert _read_xlsx_sheets(str(tmp_path / "year.xlsx")) == {'data_2021': 21, 'data_2021_2': 12, 'data_2022': 20, 'Info': 9}
+
+    utils.write_df_to_file(df, str(tmp_path / "book"), "SBER_DEBIT_2107", xlsx_partition=utils.XLSX_PARTITION_WORKBOOKS, xlsx_max_rows=30)
+    assert _read_xlsx_sheets(str(tmp_path / "book.xlsx")) == {'data': 31, 'Info': 8}
+    assert _read_xlsx_sheets(str(tmp_path / "book_2.xlsx")) == {'data': 21, 'Info': 5}
+
+    # everything fits into one sheet: the same workbook as without partitioning
+    utils.write_df_to_file(df, str(tmp_path / "one"), "SBER_DEBIT_2107")
+    assert _read_xlsx_sheets(str(tmp_path / "one.xlsx")) == {'data': 51, 'Info': 4}
+
+
+def test_money_is_written_without_copying_the_dataframe(tmp_path, monkeypatch):
+    df = pd.DataFrame({'Дата операции': [datetime(2021, 7, 3, 12, 52), datetime(2021, 7, 4, 10, 0)],
+                       'Сумма': pd.Series([-350000, 29], dtype='int64'),
+                       'Сумма в валюте': pd.Series([None, 209], dtype='Int64')})
+    money_columns = ['Сумма', 'Сумма в валюте']
+
+    monkeypatch.setattr(utils, 'CSV_CHUNK_ROWS', 1)
+
+    for output_file_format in ('csv', 'jsonl', 'sqlite', 'parquet'):
+        utils.write_df_to_file(df, str(tmp_path / "out"), "SBER_DEBIT_2107", output_file_format=output_file_format,
+                               money_columns=money_columns)
+
+    assert (tmp_path / "out.csv").read_text(encoding="utf-8").splitlines() == \
+           ['Дата операции;Сумма;Сумма в валюте', '2021-07-03 12:52:00;-3500.0;', '2021-07-04 10:00:00;0.29;2.09']
+
+    rows = [json.loads(line) for line in (tmp_path / "out.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(row['Сумма'], row['Сумма в валюте']) for row in rows] == [(-3500.0, None), (0.29, 2.09)]
+
+    # parquet and sqlite keep int64 kopecks in columns, which are named so
+    with sqlite3.connect(str(tmp_path / "out.sqlite")) as connection:
+        assert connection.execute('SELECT "Сумма (коп.)", "Сумма в валюте (коп.)" FROM data').fetchall() == [(-350000, None), (29, 209)]
+
+    assert list(pd.read_parquet(str(tmp_path / "out.parquet"))['Сумма (коп.)']) == [-350000, 29]
+
+    # the file is read back with money in kopecks, whatever format it has
+    for output_file_format in ('csv', 'sqlite', 'parquet'):
+        read_df = utils.read_df_from_file(str(tmp_path / "out"), output_file_format, money_columns, ['Дата операции'])
+        assert list(read_df['Сумма']) == [-350000, 29]
+        assert read_df['Сумма в валюте'].isna().tolist() == [True, False]
+
+
+def test_file_with_money_in_rubles_is_not_appended(tmp_path):
+    old_df = pd.DataFrame({'Дата операции': [datetime(2021, 7, 3, 12, 52)], 'Сумма': [-3500.0]})
+    new_df = pd.DataFrame({'Дата операции': [datetime(2021, 7, 4, 10, 0)], 'Сумма': pd.Series([29], dtype='int64')})
+
+    for output_file_format in ('sqlite', 'parquet'):
+        # a file, written by an older version: money in rubles without the suffix
+        utils.write_df_to_file(old_df, str(tmp_path / "old"), "SBER_DEBIT_2107", output_file_format=output_file_format,
+                               append=output_file_format == 'parquet')
+
+        with pytest.raises(exceptions.UserInputError, match='в рублях'):
+            utils.write_df_to_file(new_df, str(tmp_path / "old"), "SBER_DEBIT_2107", output_file_format=output_file_format,
+                                   append=True, money_columns=['Сумма'])
+
+def test_parquet_requires_an_engine(monkeypatch):
+    monkeypatch.setattr(utils, 'PARQUET_ENGINES', ['no_such_parquet_engine'])
+
+    assert utils.get_output_file_types('csv,xlsx') == ['csv', 'xlsx']
+    with pytest.raises(exceptions.UserInputError, match='pyarrow'):
+        utils.get_output_file_types('csv,parquet')
@@ -0,0 +1,334 @@
+"""
+Изолированные процессы конвертации с ограничением времени и памяти
+
+pdfminer на повреждённых PDF иногда зависает или неограниченно расходует память. В пакетном режиме, режиме наблюдения
+за директорией, сервисе и GUI такой файл не должен останавливать всю работу, поэтому конвертации выполняются
+в пуле SandboxedExecutor, который используется так же, как concurrent.futures.ProcessPoolExecutor, но:
+    timeout             если задача выполняется дольше timeout секунд, процесс убивается, а future получает
+                        исключение exceptions.WorkerTimeoutError
+    max_rss             если размер процесса в памяти (RSS) превышает max_rss байт, процесс убивается, а future
+                        получает исключение exceptions.WorkerMemoryLimitError. RSS проверяется каждые
+                        RSS_CHECK_INTERVAL секунд, только там, где его можно узнать из /proc (Linux)
+    max_address_space   ограничение адресного пространства процесса (RLIMIT_AS) в байтах. Выделение памяти сверх
+                        него вызывает MemoryError внутри задачи. Только там, где есть модуль resource (Linux, macOS).
+                        Учитывается всё адресное пространство, включая pandas и pdfminer, поэтому ограничение
+                        должно быть заметно больше max_rss
+    max_tasks_per_worker после такого количества задач процесс завершается и заменяется новым, чтобы вернуть
+                        операционной системе фрагментированную память
+
+Если процесс завершился сам (например убит системой при нехватке памяти), future получает исключение
+exceptions.WorkerCrashError. Во всех этих случаях вместо процесса запускается новый, остальные задачи продолжают
+выполняться.
+"""
+
+import os
+import time
+import argparse
+import threading
+import traceback
+import collections
+import multiprocessing
+import concurrent.futures
+from multiprocessing import connection
+from typing import Union
+
+import exceptions
+
+try:
+    import resource
+except ImportError:
+    # there is no resource module on Windows
+    resource = None
+
+DEFAULT_TIMEOUT = 600
+DEFAULT_MAX_TASKS_PER_WORKER = 100
+
+RSS_CHECK_INTERVAL = 0.1
+
+# how long a worker, which is asked to finish, may take before it is killed
+RETIRE_TIMEOUT = 5
+
+
+def _get_rss(pid:int) -> Union[int, None]:
+    """
+    Resident set size of the process in bytes or None, if it can not be determined
+    """
+    try:
+        with open(f"/proc/{pid}/statm") as statm_file:
+            return int(statm_file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _worker_main(task_connection, initializer, max_address_space:Union[int, None]) -> None:
+    """
+    Main function of the worker process: receives (function, args, kwargs) and sends back (True, result)
+    or (False, exception) until it receives None
+    """
+    try:
+        if max_address_space is not None and resource is not None:
+            resource.setrlimit(resource.RLIMIT_AS, (max_address_space, resource.getrlimit(resource.RLIMIT_AS)[1]))
+
+        if initializer is not None:
+            initializer()
+
+        while (task := task_connection.recv()) is not None:
+            function, args, kwargs = task
+            try:
+                message = (True, function(*args, **kwargs))
+            except Exception as e:
+                message = (False, e)
+
+            try:
+                task_connection.send(message)
+            except Exception:
+                # the result or the exception can not be pickled
+                task_connection.send((False, exceptions.WorkerError(traceback.format_exc())))
+
+    except (KeyboardInterrupt, EOFError):
+        # Ctrl+C is handled by the main process, EOFError - the main process has exited
+        pass
+
+
+class _Worker:
+    def __init__(self, context, initializer, max_address_space:Union[int, None]):
+        self.connection, child_connection = context.Pipe()
+        self.process = context.Process(target=_worker_main,
+                                       args=(child_connection, initializer, max_address_space),
+                                       daemon=True)
+        self.process.start()
+        child_connection.close()
+
+        # future of the task, which is being executed right now, and the time when it was started
+        self.future = None
+        self.task_start = None
+        self.qnt_tasks = 0
+
+
+class SandboxedExecutor(concurrent.futures.Executor):
+    """
+    Pool of worker processes, each task of which is limited in time and memory (see the module description)
+    """
+
+    def __init__(self,
+                 max_workers:Union[int, None] = None,
+                 initializer = None,
+                 timeout:Union[float, None] = DEFAULT_TIMEOUT,
+                 max_rss:Union[int, None] = None,
+                 max_address_space:Union[int, None] = None,
+                 max_tasks_per_worker:Union[int, None] = DEFAULT_MAX_TASKS_PER_WORKER,
+                 mp_context = None):
+
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self.timeout = timeout
+        self.max_rss = max_rss
+        self.max_address_space = max_address_space
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._context = mp_context or multiprocessing.get_context()
+
+        # (future, function, args, kwargs) of tasks, which wait for a free worker
+        self._pending = collections.deque()
+        # workers are created and stopped only by the management thread
+        self._workers = []
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        # submit() and shutdown() wake up the management thread, which waits for results of the workers
+        self._wakeup_reader, self._wakeup_writer = multiprocessing.Pipe(duplex=False)
+        self._wakeup_sent = False
+
+        self._thread = threading.Thread(target=self._manage, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, /, *args, **kwargs) -> concurrent.futures.Future:
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new futures after shutdown')
+
+            future = concurrent.futures.Future()
+            self._pending.append((future, fn, args, kwargs))
+            self._wake_up()
+
+        return future
+
+    def shutdown(self, wait:bool = True, *, cancel_futures:bool = False) -> None:
+        """
+        Pending tasks are cancelled, if cancel_futures is True, otherwise they are executed before workers are stopped
+        """
+        with self._lock:
+            self._shutdown = True
+            if cancel_futures:
+                while self._pending:
+                    self._pending.popleft()[0].cancel()
+            self._wake_up()
+
+        if wait:
+            self._thread.join()
+
+    def _wake_up(self) -> None:
+        # is called under the lock. One message is enough, however many tasks are submitted before it is read
+        if not self._wakeup_sent:
+            self._wakeup_sent = True
+            self._wakeup_writer.send(None)
+
+    def _manage(self) -> None:
+        while True:
+            self._dispatch()
+
+            busy_workers = [worker for worker in self._workers if worker.future is not None]
+            with self._lock:
+                if self._shutdown and not self._pending and not busy_workers:
+                    break
+
+            ready = connection.wait([self._wakeup_reader] + [worker.connection for worker in busy_workers],
+                                    self._get_wait_timeout(busy_workers))
+
+            for worker in busy_workers:
+                if worker.connection in ready:
+                    self._receive_result(worker)
+
+            if self._wakeup_reader in ready:
+                with self._lock:
+                    self._wakeup_reader.recv()
+                    self._wakeup_sent = False
+
+            self._check_limits()
+
+        for worker in list(self._workers):
+            self._retire(worker)
+
+    def _dispatch(self) -> None:
+        """
+        Sends pending tasks to idle workers, starting new workers, if there are less than max_workers
+        """
+        while True:
+            idle_workers = [worker for worker in self._workers if worker.future is None]
+            if not idle_workers and len(self._workers) >= self.max_workers:
+                return
+
+            with self._lock:
+                if not self._pending:
+                    return
+                future, function, args, kwargs = self._pending.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if idle_workers:
+                worker = idle_workers[0]
+            else:
+                worker = _Worker(self._context, self.initializer, self.max_address_space)
+                self._workers.append(worker)
+
+            try:
+                worker.connection.send((function, args, kwargs))
+            except (OSError, ValueError):
+                # the idle worker has died
+                self._stop(worker, future, exceptions.WorkerCrashError("Процесс конвертации неожиданно завершился"))
+                continue
+            except Exception as e:
+                # the task can not be pickled
+                future.set_exception(e)
+                continue
+
+            worker.future = future
+            worker.task_start = time.monotonic()
+
+    def _get_wait_timeout(self, busy_workers:list) -> Union[float, None]:
+        if not busy_workers:
+            return None
+
+        timeouts = []
+        if self.max_rss is not None:
+            timeouts.append(RSS_CHECK_INTERVAL)
+        if self.timeout is not None:
+            timeouts.append(max(min(worker.task_start for worker in busy_workers) + self.timeout - time.monotonic(), 0))
+
+        return min(timeouts) if timeouts else None
+
+    def _receive_result(self, worker:_Worker) -> None:
+        try:
+            ok, result = worker.connection.recv()
+        except (EOFError, OSError):
+            worker.process.join(RETIRE_TIMEOUT)
+            self._stop(worker, worker.future,
+                       exceptions.WorkerCrashError(f"Процесс конвертации неожиданно завершился с кодом {worker.process.exitcode}"))
+            return
+
+        future = worker.future
+        worker.future = None
+        worker.qnt_tasks += 1
+
+        if ok:
+            future.set_result(result)
+        else:
+            future.set_exception(result)
+
+        # recycling of the worker returns fragmented memory to the operating system
+        if self.max_tasks_per_worker is not None and worker.qnt_tasks >= self.max_tasks_per_worker:
+            self._retire(worker)
+
+    def _check_limits(self) -> None:
+        now = time.monotonic()
+        for worker in [worker for worker in self._workers if worker.future is not None]:
+            if self.timeout is not None and now - worker.task_start > self.timeout:
+                self._stop(worker, worker.future,
+                           exceptions.WorkerTimeoutError(f"Конвертация не завершилась за {self.timeout} сек"))
+
+            elif self.max_rss is not None and (rss := _get_rss(worker.process.pid)) is not None and rss > self.max_rss:
+                self._stop(worker, worker.future,
+                           exceptions.WorkerMemoryLimitError(f"Процесс конвертации занял {rss / 1024 / 1024:.0f} МБ памяти "
+                                                             f"при ограничении {self.max_rss / 1024 / 1024:.0f} МБ"))
+
+    def _stop(self, worker:_Worker, future:concurrent.futures.Future, error:exceptions.WorkerError) -> None:
+        """
+        Kills the worker and sets the error to the future of its task. A new worker is started, when it is needed
+        """
+        worker.process.kill()
+        worker.process.join()
+        worker.connection.close()
+        self._workers.remove(worker)
+
+        worker.future = None
+        future.set_exception(error)
+
+    def _retire(self, worker:_Worker) -> None:
+        try:
+            worker.connection.send(None)
+        except (OSError, ValueError):
+            pass
+
+        worker.process.join(RETIRE_TIMEOUT)
+        if worker.process.is_alive():
+            worker.process.kill()
+            worker.process.join()
+
+        worker.connection.close()
+        self._workers.remove(worker)
+
+
+def generate_sandbox_argparser() -> argparse.ArgumentParser:
+    """
+    Arguments with the limits of worker processes. It is used as a parent in modules, which convert files in a pool
+    """
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='Максимальное время конвертации одного файла, сек. 0 - без ограничения')
+    parser.add_argument('--max-rss', type=int, default=None, dest='max_rss_mb', help='Максимальный размер процесса конвертации в памяти (RSS), МБ. Только Linux')
+    parser.add_argument('--max-address-space', type=int, default=None, dest='max_address_space_mb', help='Ограничение адресного пространства процесса конвертации, МБ. Только Linux и macOS')
+    parser.add_argument('--recycle', type=int, default=DEFAULT_MAX_TASKS_PER_WORKER, dest='max_tasks_per_worker', help='Перезапускать процесс конвертации после такого количества файлов. 0 - не перезапускать')
+
+    return parser
+
+
+def get_sandbox_limits(args:argparse.Namespace) -> dict:
+    """
+    Converts arguments of generate_sandbox_argparser() to keyword arguments of SandboxedExecutor
+    """
+    def megabytes_to_bytes(megabytes):
+        return megabytes * 1024 * 1024 if megabytes else None
+
+    return {"timeout": args.timeout or None,
+            "max_rss": megabytes_to_bytes(args.max_rss_mb),
+            "max_address_space": megabytes_to_bytes(args.max_address_space_mb),
+            "max_tasks_per_worker": args.max_tasks_per_worker or None}
@@ -0,0 +1,72 @@
+import os
+import time
+
+import pytest
+
+import exceptions
+import worker_sandbox
+
+
+def _get_pid() -> int:
+    return os.getpid()
+
+
+def _sleep(seconds:float) -> float:
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail() -> None:
+    raise exceptions.InputFileStructureError("wrong text")
+
+
+def _crash() -> None:
+    os._exit(3)
+
+
+def _allocate(qnt_bytes:int) -> int:
+    data = bytearray(qnt_bytes)
+    time.sleep(5)
+    return len(data)
+
+
+def test_results_and_exceptions_of_tasks_are_returned():
+    with worker_sandbox.SandboxedExecutor(max_workers=2) as executor:
+        assert executor.submit(_sleep, 0.01).result() == 0.01
+        with pytest.raises(exceptions.InputFileStructureError):
+            executor.submit(_fail).result()
+
+
+def test_hanging_task_is_stopped_and_the_pool_keeps_working():
+    with worker_sandbox.SandboxedExecutor(max_workers=1, timeout=0.5) as executor:
+        hanging = executor.submit(_sleep, 30)
+        after = executor.submit(_sleep, 0.01)
+
+        start = time.monotonic()
+        with pytest.raises(exceptions.WorkerTimeoutError):
+            hanging.result()
+        assert time.monotonic() - start < 10
+
+        assert after.result() == 0.01
+
+
+def test_crashed_worker_is_replaced():
+    with worker_sandbox.SandboxedExecutor(max_workers=1) as executor:
+        with pytest.raises(exceptions.WorkerCrashError):
+            executor.submit(_crash).result()
+        assert executor.submit(_sleep, 0.01).result() == 0.01
+
+
+@pytest.mark.skipif(worker_sandbox._get_rss(os.getpid()) is None, reason="RSS is known only from /proc")
+def test_worker_above_rss_limit_is_stopped():
+    max_rss = worker_sandbox._get_rss(os.getpid()) + 100 * 1024 * 1024
+    with worker_sandbox.SandboxedExecutor(max_workers=1, max_rss=max_rss) as executor:
+        with pytest.raises(exceptions.WorkerMemoryLimitError):
+            executor.submit(_allocate, 300 * 1024 * 1024).result()
+
+
+def test_worker_is_recycled_after_max_tasks():
+    with worker_sandbox.SandboxedExecutor(max_workers=1, max_tasks_per_worker=2) as executor:
+        pids = [executor.submit(_get_pid).result() for _ in range(4)]
+
+    assert pids[0] == pids[1] != pids[2] == pids[3]